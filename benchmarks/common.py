@@ -0,0 +1,96 @@
+"""Shared helpers for the benchmark scripts: percentiles, process memory and result files."""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of already collected samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+def latency_summary(samples_s: Sequence[float]) -> Dict[str, float]:
+    """Latency stats in milliseconds"""
+    ms = [sample * 1000 for sample in samples_s]
+    return {
+        "count": len(ms),
+        "mean_ms": round(sum(ms) / len(ms), 4) if ms else 0.0,
+        "p50_ms": round(percentile(ms, 50), 4),
+        "p95_ms": round(percentile(ms, 95), 4),
+        "p99_ms": round(percentile(ms, 99), 4),
+        "max_ms": round(max(ms), 4) if ms else 0.0
+    }
+
+def _children(pid: int) -> List[int]:
+    children = []
+    try:
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                children.extend(int(child) for child in f.read().split())
+    except OSError:
+        pass
+    return children
+
+def peak_rss_kb(pid: int) -> Optional[int]:
+    """Peak resident memory (VmHWM) of a process and all its descendants, Linux only"""
+    total = 0
+    found = False
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/status") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        total += int(line.split()[1])
+                        found = True
+                        break
+        except OSError:
+            continue
+        pending.extend(_children(current))
+    return total if found else None
+
+def environment_info() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    }
+
+def save_results(kind: str, results: Dict[str, Any], output: Optional[str] = None) -> Path:
+    """Write results as JSON, by default to benchmarks/results/<kind>-<commit>-<time>.json"""
+    document = {"kind": kind, "environment": environment_info(), **results}
+    if output:
+        path = Path(output)
+    else:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        path = RESULTS_DIR / f"{kind}-{document['environment']['commit'] or 'nogit'}-{stamp}.json"
+    path.write_text(json.dumps(document, indent=2) + "\n")
+    return path
+
+def print_table(rows: List[Dict[str, Any]], columns: Sequence[str]) -> None:
+    widths = {column: max(len(column), *(len(str(row.get(column, ""))) for row in rows)) for column in columns}
+    print("  ".join(column.ljust(widths[column]) for column in columns))
+    for row in rows:
+        print("  ".join(str(row.get(column, "")).ljust(widths[column]) for column in columns))
+    sys.stdout.flush()
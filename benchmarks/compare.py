@@ -0,0 +1,70 @@
+"""Compare a benchmark result file against a baseline.
+
+    python -m benchmarks.compare BASELINE.json CURRENT.json [--threshold 10]
+
+Prints per-case p50/p99 latency and throughput deltas and exits non-zero
+when any case regressed by more than --threshold percent.
+"""
+
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Optional
+
+from .common import print_table
+
+def _cases(document: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    rows: List[Dict[str, Any]] = document.get("cases") or document.get("tools") or []
+    cases = {row["name"]: row for row in rows}
+    if "total" in document:
+        cases["TOTAL"] = document["total"]
+    return cases
+
+def _delta(before: Optional[float], after: Optional[float]) -> Optional[float]:
+    if not before or after is None:
+        return None
+    return round((after - before) / before * 100, 1)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Allowed regression in percent")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    if baseline.get("kind") != current.get("kind"):
+        sys.exit(f"Cannot compare '{baseline.get('kind')}' results with '{current.get('kind')}' results")
+
+    before_cases = _cases(baseline)
+    rows = []
+    regressions = []
+    for name, after in _cases(current).items():
+        before = before_cases.get(name)
+        if before is None:
+            continue
+        throughput_key = "ops_per_s" if "ops_per_s" in after else "throughput_rps"
+        row = {
+            "name": name,
+            "p50_delta_%": _delta(before.get("p50_ms"), after.get("p50_ms")),
+            "p99_delta_%": _delta(before.get("p99_ms"), after.get("p99_ms")),
+            "throughput_delta_%": _delta(before.get(throughput_key), after.get(throughput_key)),
+            "bytes_delta_%": _delta(before.get("response_bytes"), after.get("response_bytes"))
+        }
+        rows.append(row)
+        slower = [value for value in (row["p50_delta_%"], row["p99_delta_%"]) if value is not None]
+        throughput = row["throughput_delta_%"]
+        if any(value > args.threshold for value in slower) or (throughput is not None and throughput < -args.threshold):
+            regressions.append(name)
+
+    print(f"Baseline {baseline['environment'].get('commit')} -> current {current['environment'].get('commit')}")
+    print_table(rows, ("name", "p50_delta_%", "p99_delta_%", "throughput_delta_%", "bytes_delta_%"))
+    if regressions:
+        print(f"Regressed beyond {args.threshold}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""HTTP load test: starts the server locally and drives it with concurrent MCP clients.
+
+    python -m benchmarks.load [--concurrency 16] [--duration 20] [--mix list=4,get=5,plan=1]
+                              [--workers N] [--url URL] [--output FILE]
+
+Each client holds its own MCP session and issues tool calls back to back,
+picking tools at random according to the weighted mix. Reports throughput,
+latency percentiles and response bytes per tool, plus the server's peak RSS.
+Pass --url to benchmark an already running server instead of starting one.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import warnings
+from typing import Any, Dict, List, Optional, Tuple
+
+from .common import ROOT, latency_summary, peak_rss_kb, print_table, save_results
+
+# Named tool calls that can appear in --mix
+CALLS: Dict[str, Tuple[str, Dict[str, Any]]] = {
+    "list": ("list_playbooks", {}),
+    "page": ("list_playbooks", {"limit": 2}),
+    "get": ("get_playbook", {"playbook_id": "comprehensive_wiki"}),
+    "get_small": ("get_playbook", {"playbook_id": "product_owner_story"}),
+    "section": ("get_playbook", {"playbook_id": "product_owner_epic", "sections": ["Acceptance Criteria"]}),
+    "batch": ("get_playbooks", {"ids": ["epic_story_review", "product_owner_epic", "product_owner_story"]}),
+    "search": ("search_playbooks", {"query": "acceptance criteria"}),
+    "plan": ("plan_feature", {"feature_description": "User authentication system", "project_type": "web", "complexity": "medium"})
+}
+
+def parse_mix(mix: str) -> List[Tuple[str, int]]:
+    weights = []
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in CALLS:
+            raise SystemExit(f"Unknown call '{name}' in --mix (choose from {', '.join(CALLS)})")
+        weights.append((name, int(weight or 1)))
+    return weights
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(port: int, workers: Optional[int], extra_env: Optional[Dict[str, str]] = None) -> subprocess.Popen:
+    env = dict(os.environ, PORT=str(port), HOST="127.0.0.1", **(extra_env or {}))
+    if workers is not None:
+        env["WORKERS"] = str(workers)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "src.server"],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"Server exited with code {process.returncode}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return process
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise SystemExit("Server did not start listening within 30s")
+
+async def _client(url: str, mix: List[Tuple[str, int]], deadline: float, samples: Dict[str, List[Tuple[float, int]]], errors: Dict[str, int], seed: int) -> None:
+    from fastmcp import Client
+
+    rng = random.Random(seed)
+    names = [name for name, _ in mix]
+    weights = [weight for _, weight in mix]
+    async with Client(url) as client:
+        while time.monotonic() < deadline:
+            name = rng.choices(names, weights)[0]
+            tool, arguments = CALLS[name]
+            start = time.perf_counter()
+            try:
+                result = await client.call_tool(tool, arguments, raise_on_error=False)
+            except Exception:
+                errors[name] = errors.get(name, 0) + 1
+                continue
+            elapsed = time.perf_counter() - start
+            size = sum(len(getattr(block, "text", "").encode()) for block in result.content)
+            samples.setdefault(name, []).append((elapsed, size))
+            if result.is_error:
+                errors[name] = errors.get(name, 0) + 1
+
+async def drive(url: str, concurrency: int, duration: float, warmup: float, mix: List[Tuple[str, int]]) -> Dict[str, Any]:
+    if warmup > 0:
+        await asyncio.gather(*(
+            _client(url, mix, time.monotonic() + warmup, {}, {}, seed) for seed in range(concurrency)
+        ))
+
+    samples: Dict[str, List[Tuple[float, int]]] = {}
+    errors: Dict[str, int] = {}
+    start = time.monotonic()
+    await asyncio.gather(*(
+        _client(url, mix, start + duration, samples, errors, 1000 + seed) for seed in range(concurrency)
+    ))
+    elapsed = time.monotonic() - start
+
+    tools = []
+    all_latencies = []
+    for name, entries in sorted(samples.items()):
+        latencies = [latency for latency, _ in entries]
+        all_latencies.extend(latencies)
+        tools.append({
+            "name": name,
+            "requests": len(entries),
+            "errors": errors.get(name, 0),
+            "throughput_rps": round(len(entries) / elapsed, 2),
+            "response_bytes": round(sum(size for _, size in entries) / len(entries)),
+            **latency_summary(latencies)
+        })
+    return {
+        "total": {
+            "requests": len(all_latencies),
+            "errors": sum(errors.values()),
+            "elapsed_s": round(elapsed, 3),
+            "throughput_rps": round(len(all_latencies) / elapsed, 2),
+            **latency_summary(all_latencies)
+        },
+        "tools": tools
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent MCP client sessions")
+    parser.add_argument("--duration", type=float, default=20.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Unmeasured warm-up seconds")
+    parser.add_argument("--mix", default="list=4,get=5,plan=1", help=f"Weighted call mix from: {', '.join(CALLS)}")
+    parser.add_argument("--workers", type=int, help="WORKERS for the started server (default: server setting)")
+    parser.add_argument("--url", help="Benchmark a running server at this MCP URL instead of starting one")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/load-<commit>-<time>.json)")
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore", category=DeprecationWarning)
+    mix = parse_mix(args.mix)
+    process = None
+    url = args.url
+    if url is None:
+        port = _free_port()
+        process = start_server(port, args.workers)
+        url = f"http://127.0.0.1:{port}/mcp"
+
+    try:
+        results = asyncio.run(drive(url, args.concurrency, args.duration, args.warmup, mix))
+        results["config"] = {
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "mix": dict(mix),
+            "workers": args.workers,
+            "url": url if args.url else None
+        }
+        results["server_peak_rss_kb"] = peak_rss_kb(process.pid) if process else None
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=10)
+
+    print_table(results["tools"] + [{"name": "TOTAL", **results["total"]}],
+                ("name", "requests", "errors", "throughput_rps", "p50_ms", "p95_ms", "p99_ms", "response_bytes"))
+    if results["server_peak_rss_kb"]:
+        print(f"Server peak RSS: {results['server_peak_rss_kb'] / 1024:.1f} MiB")
+    print(f"Saved {save_results('load', results, args.output)}")
+
+if __name__ == "__main__":
+    main()
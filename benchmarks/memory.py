@@ -0,0 +1,105 @@
+"""Memory footprint of the playbook registry, per playbook.
+
+    python -m benchmarks.memory [--playbooks 10000] [--budget-mib 512] [--output FILE]
+
+Builds a synthetic catalog by re-parsing the built-in playbooks under new IDs
+(as a catalog of separate files would produce them), with one section per
+playbook made unique, and measures with tracemalloc:
+
+- ``plain``: parsed dicts and lists plus a metadata dict per playbook, the
+  representation before registry records were frozen
+- ``registry``: a fully loaded Registry (frozen, interned bodies and
+  PlaybookMetadata records)
+- ``registry+cache``: the registry plus every playbook's encoded response
+"""
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+import warnings
+from typing import Any, Callable, Dict, List
+
+from .common import print_table, save_results
+
+def synthetic_catalog(count: int) -> List[str]:
+    """Playbook files as JSON text, derived from the built-in playbooks"""
+    from src.server import PLAYBOOKS
+
+    builtin = list(PLAYBOOKS.values())
+    files = []
+    for number in range(count):
+        playbook = json.loads(json.dumps(builtin[number % len(builtin)]))
+        playbook["name"] = f"{playbook['name']} #{number}"
+        sections = playbook["template"].get("sections")
+        if sections:
+            sections[0]["content"] += f"\n\nVariant {number}"
+        files.append(json.dumps(playbook))
+    return files
+
+def _measure(build: Callable[[], Any]) -> Dict[str, Any]:
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    kept = build()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return {"bytes": size, "build_s": round(elapsed, 3)}
+
+def run(count: int, budget_mib: int) -> Dict[str, Any]:
+    from src.cache import ResponseCache
+    from src.registry import Registry
+    from src.server import _listing_payload, _playbook_payload
+
+    files = synthetic_catalog(count)
+    ids = [f"playbook_{number}" for number in range(count)]
+
+    def plain() -> Any:
+        bodies = {playbook_id: json.loads(text) for playbook_id, text in zip(ids, files)}
+        index = {
+            playbook_id: {field: body[field] for field in ("name", "description", "category")}
+            for playbook_id, body in bodies.items()
+        }
+        return bodies, index
+
+    def registry() -> Any:
+        return Registry.from_playbooks({playbook_id: json.loads(text) for playbook_id, text in zip(ids, files)})
+
+    def registry_and_cache() -> Any:
+        playbooks = registry()
+        cache = ResponseCache(_listing_payload, _playbook_payload)
+        cache.warm(playbooks)
+        return playbooks, cache
+
+    rows = []
+    for name, build in (("plain", plain), ("registry", registry), ("registry+cache", registry_and_cache)):
+        measured = _measure(build)
+        per_playbook = measured["bytes"] / count
+        rows.append({
+            "name": name,
+            "playbooks": count,
+            "total_mib": round(measured["bytes"] / 2**20, 2),
+            "bytes_per_playbook": round(per_playbook),
+            "fit_in_budget": int(budget_mib * 2**20 / per_playbook),
+            "build_s": measured["build_s"]
+        })
+    return {"playbooks": count, "budget_mib": budget_mib, "cases": rows}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--playbooks", type=int, default=10000, help="Synthetic catalog size")
+    parser.add_argument("--budget-mib", type=int, default=512, help="Memory budget used for the fit_in_budget column")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/memory-<commit>-<time>.json)")
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore", category=DeprecationWarning)
+    results = run(args.playbooks, args.budget_mib)
+    print_table(results["cases"], ("name", "playbooks", "total_mib", "bytes_per_playbook", "fit_in_budget", "build_s"))
+    print(f"Saved {save_results('memory', results, args.output)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""In-process micro-benchmarks of the tool functions, without the MCP transport.
+
+    python -m benchmarks.micro [--iterations N] [--output FILE]
+"""
+
+import argparse
+import asyncio
+import inspect
+import time
+import warnings
+from typing import Any, Callable, Dict, List, Tuple
+
+import pydantic_core
+
+from .common import latency_summary, print_table, save_results
+
+def _sync(function: Callable[..., Any]) -> Callable[..., Any]:
+    """Call a tool function; async ones are driven without an event loop while they never wait on I/O"""
+    def call(*args: Any) -> Any:
+        result = function(*args)
+        if not inspect.iscoroutine(result):
+            return result
+        try:
+            result.send(None)
+        except StopIteration as done:
+            return done.value
+        except RuntimeError:
+            pass
+        # It needed a loop (e.g. to read a body not loaded yet): run it properly; the result is cached after
+        result.close()
+        return asyncio.run(function(*args))
+    return call
+
+def _cases() -> List[Tuple[str, Callable[[], Any]]]:
+    from src import server
+    from src.tenants import TenantOverlay
+
+    list_playbooks, get_playbook, get_playbooks, search_playbooks = (
+        _sync(tool.fn) for tool in (server.list_playbooks, server.get_playbook, server.get_playbooks, server.search_playbooks)
+    )
+
+    wiki_hash = server.registry.current().content_hash("comprehensive_wiki")
+    overlays = dict(server.tenant_views.overlays)
+    overlays["benchmark"] = TenantOverlay("benchmark", {
+        "code_review": {"template": {"atlassian_integration": {"instructions": {"$append": ["Link the review to the pull request"]}}}}
+    })
+    server.tenant_views.load(overlays)
+    return [
+        ("list_playbooks", lambda: list_playbooks(None, None, None, None)),
+        ("list_playbooks_page", lambda: list_playbooks("Product Management", 2, None, None)),
+        ("list_categories", lambda: server.list_categories.fn()),
+        ("get_playbook", lambda: get_playbook("comprehensive_wiki", None, None, False, None, False, None)),
+        ("get_playbook_sections", lambda: get_playbook("product_owner_epic", ["Acceptance Criteria"], None, False, None, False, None)),
+        ("get_playbook_summary", lambda: get_playbook("comprehensive_wiki", None, None, True, None, False, None)),
+        ("get_playbook_not_modified", lambda: get_playbook("comprehensive_wiki", None, None, False, wiki_hash, False, None)),
+        ("get_playbook_tenant", lambda: get_playbook("code_review", None, None, False, None, False, "benchmark")),
+        ("get_playbook_missing", lambda: get_playbook("does_not_exist", None, None, False, None, False, None)),
+        ("get_playbooks", lambda: get_playbooks(["epic_story_review", "product_owner_epic", "product_owner_story"], True, None)),
+        ("search_playbooks", lambda: search_playbooks("acceptance criteria", None, 5)),
+        ("plan_feature", lambda: server.plan_feature.fn("User authentication system", "web", "medium"))
+    ]
+
+def _encoded_size(result: Any) -> int:
+    # Tool results served from the response cache are already encoded
+    content = getattr(result, "content", None)
+    if content:
+        return sum(len(block.text.encode()) for block in content)
+    return len(pydantic_core.to_json(result))
+
+def run(iterations: int) -> Dict[str, Any]:
+    rows = []
+    for name, call in _cases():
+        call()
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            call()
+            samples.append(time.perf_counter() - start)
+        summary = latency_summary(samples)
+        rows.append({
+            "name": name,
+            "ops_per_s": round(iterations / sum(samples)) if sum(samples) else None,
+            "response_bytes": _encoded_size(call()),
+            **summary
+        })
+    return {"iterations": iterations, "cases": rows}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/micro-<commit>-<time>.json)")
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore", category=DeprecationWarning)
+    results = run(args.iterations)
+    print_table(results["cases"], ("name", "ops_per_s", "p50_ms", "p95_ms", "p99_ms", "response_bytes"))
+    print(f"Saved {save_results('micro', results, args.output)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Cold-start report: where a fresh server process spends its time before and on its first requests.
+
+    python -m benchmarks.startup [--runs 5] [--snapshot] [--http] [--output FILE]
+
+Each run starts a new interpreter that imports the dependencies, then the
+server module (broken down into the server's own startup phases), then
+makes the first tool calls through an in-memory MCP client. --snapshot
+builds a registry snapshot and loads it via SNAPSHOT_PATH, --http also
+times a real server from spawn until it listens and answers its first call.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from typing import Any, Dict, List, Optional
+
+from .common import ROOT, latency_summary, print_table, save_results
+
+FIRST_CALLS = (
+    ("first_list_playbooks", "list_playbooks", {}),
+    ("first_get_playbook", "get_playbook", {"playbook_id": "comprehensive_wiki"}),
+    ("first_search_playbooks", "search_playbooks", {"query": "acceptance criteria"})
+)
+
+def probe() -> None:
+    """Run inside the measured process; prints one JSON line of timestamps and durations"""
+    started = time.time()
+    start = time.perf_counter()
+    warnings.filterwarnings("ignore")
+    import fastmcp  # noqa: F401
+    import pydantic_settings  # noqa: F401
+    import starlette.responses  # noqa: F401
+    dependencies = time.perf_counter()
+    from src import server
+    imported = time.perf_counter()
+
+    async def first_calls() -> Dict[str, float]:
+        from fastmcp import Client
+
+        timings = {}
+        connect = time.perf_counter()
+        async with Client(server.mcp) as client:
+            timings["client_connect"] = (time.perf_counter() - connect) * 1000
+            for phase, tool, arguments in FIRST_CALLS:
+                call = time.perf_counter()
+                await client.call_tool(tool, arguments)
+                timings[phase] = (time.perf_counter() - call) * 1000
+        return timings
+
+    phases = {
+        "import_dependencies": (dependencies - start) * 1000,
+        "import_server": (imported - dependencies) * 1000,
+        **{f"server.{phase}": value for phase, value in server.startup_timings.items()},
+        **asyncio.run(first_calls())
+    }
+    print(json.dumps({"started": started, "phases": phases}))
+
+def _run_probe(env: Dict[str, str]) -> Dict[str, Any]:
+    spawned = time.time()
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--probe"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    finished = time.time()
+    report = json.loads(output.strip().splitlines()[-1])
+    report["phases"] = {
+        "interpreter_start": (report["started"] - spawned) * 1000,
+        **report["phases"],
+        "process_total": (finished - spawned) * 1000
+    }
+    return report
+
+def _time_http(extra_env: Dict[str, str]) -> Dict[str, float]:
+    from fastmcp import Client
+
+    from .load import _free_port, start_server
+
+    port = _free_port()
+    spawned = time.perf_counter()
+    process = start_server(port, 1, extra_env)
+    listening = time.perf_counter()
+
+    async def first_call() -> float:
+        start = time.perf_counter()
+        async with Client(f"http://127.0.0.1:{port}/mcp") as client:
+            await client.call_tool("list_playbooks", {})
+        return (time.perf_counter() - start) * 1000
+
+    try:
+        return {
+            "http_time_to_listen": (listening - spawned) * 1000,
+            "http_first_call": asyncio.run(first_call())
+        }
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+def run(runs: int, snapshot: Optional[str], http: bool) -> Dict[str, Any]:
+    extra_env = {"SNAPSHOT_PATH": snapshot} if snapshot else {}
+    env = dict(os.environ, **extra_env)
+
+    samples: Dict[str, List[float]] = {}
+    for _ in range(runs):
+        phases = _run_probe(env)["phases"]
+        if http:
+            phases.update(_time_http(extra_env))
+        for phase, value in phases.items():
+            samples.setdefault(phase, []).append(value / 1000)
+
+    cases = [{"name": phase, **latency_summary(values)} for phase, values in samples.items()]
+    return {"runs": runs, "snapshot": bool(snapshot), "cases": cases}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes to average over")
+    parser.add_argument("--snapshot", action="store_true", help="Build a registry snapshot and start from it")
+    parser.add_argument("--http", action="store_true", help="Also time a real HTTP server until its first response")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/startup-<commit>-<time>.json)")
+    parser.add_argument("--probe", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.probe:
+        probe()
+        return
+
+    warnings.filterwarnings("ignore", category=DeprecationWarning)
+    with tempfile.TemporaryDirectory() as directory:
+        snapshot = None
+        if args.snapshot:
+            snapshot = os.path.join(directory, "registry.snapshot")
+            subprocess.run([sys.executable, "-m", "src.snapshot", "build", snapshot], cwd=ROOT, check=True, capture_output=True)
+        results = run(args.runs, snapshot, args.http)
+
+    print_table(results["cases"], ("name", "mean_ms", "p50_ms", "max_ms"))
+    print(f"Saved {save_results('startup', results, args.output)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""SQLite playbook store: import, registry load, concurrent body reads and FTS search.
+
+    python -m benchmarks.storage [--playbooks 20000] [--threads 8] [--output FILE]
+
+Imports a synthetic catalog (see benchmarks/memory.py) into a fresh
+database, then times loading the registry (metadata and hashes only),
+reading every body from several threads with a single pooled connection and
+with one connection per thread, and full-text searches.
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from .common import latency_summary, print_table, save_results
+from .memory import synthetic_catalog
+
+QUERIES = ("acceptance criteria", "security review", "folder structure", "jira epic", "troubleshooting guide")
+
+def _timed(name: str, seconds: float, **extra: Any) -> Dict[str, Any]:
+    return {"name": name, **latency_summary([seconds]), **extra}
+
+def _read_all(store: Any, versions: List[Any], threads: int) -> float:
+    chunks = [versions[number::threads] for number in range(threads)]
+
+    def read(chunk: List[Any]) -> None:
+        for playbook_id, digest in chunk:
+            store.version(playbook_id, digest)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(read, chunks))
+    return time.perf_counter() - start
+
+def run(count: int, threads: int) -> Dict[str, Any]:
+    from src.storage import SQLiteStore
+
+    playbooks = {f"playbook_{number}": json.loads(text) for number, text in enumerate(synthetic_catalog(count))}
+    cases = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "playbooks.db")
+        start = time.perf_counter()
+        SQLiteStore(path).put_many(playbooks)
+        cases.append(_timed("import", time.perf_counter() - start, playbooks=count))
+
+        start = time.perf_counter()
+        registry = SQLiteStore(path).load_registry()
+        cases.append(_timed("load_registry", time.perf_counter() - start, playbooks=len(registry)))
+        versions = [(playbook_id, registry.content_hash(playbook_id)) for playbook_id in registry]
+
+        for pool_size in (1, threads):
+            store = SQLiteStore(path, pool_size)
+            elapsed = _read_all(store, versions, threads)
+            cases.append(_timed(
+                f"read_bodies_pool_{pool_size}", elapsed,
+                playbooks=count, reads_per_s=round(count / elapsed)
+            ))
+
+        store = SQLiteStore(path, threads)
+        samples = []
+        for query in QUERIES * 4:
+            start = time.perf_counter()
+            store.search(query, None, 5)
+            samples.append(time.perf_counter() - start)
+        cases.append({"name": "search", **latency_summary(samples), "playbooks": count})
+    return {"playbooks": count, "threads": threads, "cases": cases}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--playbooks", type=int, default=20000, help="Synthetic catalog size")
+    parser.add_argument("--threads", type=int, default=8, help="Concurrent reader threads")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/storage-<commit>-<time>.json)")
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore", category=DeprecationWarning)
+    results = run(args.playbooks, args.threads)
+    print_table(results["cases"], ("name", "playbooks", "mean_ms", "p50_ms", "p95_ms", "reads_per_s"))
+    print(f"Saved {save_results('storage', results, args.output)}")
+
+if __name__ == "__main__":
+    main()
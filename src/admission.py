@@ -0,0 +1,236 @@
+"""Admission control and per-client rate limiting for MCP calls over HTTP.
+
+Tool calls, resource reads and prompt renders first take a token from the
+calling client's token bucket, then a slot from the worker's concurrency
+limit. Calls beyond the limit wait in a short FIFO queue; when the queue is
+full, or a call waits longer than the queue timeout, it is shed with a
+JSON-RPC error instead of queueing without bound, so latency stays bounded
+for the calls that are admitted.
+
+Admission wraps the low-level MCP request handlers rather than running as
+FastMCP middleware: errors raised inside a tool call become ordinary
+``isError`` tool results, so only errors raised before dispatch reach
+clients with their JSON-RPC code and ``retry_after`` data.
+
+Clients are identified by the access token an auth provider validated, then
+an API key header (only when configured, since clients could rotate unchecked
+keys to dodge their limit), then the MCP session (only with stateful sessions,
+whose IDs the server issues), then the client address. Token buckets live in a
+memory-mapped file so every worker on a host draws from the same buckets;
+the concurrency limit is per worker. The file is kept in a directory only
+the server's user can write to, and is never opened through a symlink or
+when another user owns it.
+"""
+
+import asyncio
+import fcntl
+import hashlib
+import mmap
+import os
+import stat
+import struct
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Optional
+
+from fastmcp.server.dependencies import get_access_token
+from mcp.server.lowlevel.server import request_ctx
+from mcp.shared.exceptions import McpError
+from mcp.types import CallToolRequest, ErrorData, GetPromptRequest, ReadResourceRequest
+
+# JSON-RPC implementation-defined server error codes
+OVERLOADED = -32000
+RATE_LIMITED = -32001
+
+# (client key hash, tokens, last refill on the monotonic clock); a zero key marks a free slot
+SLOT = struct.Struct("<Qdd")
+BUCKET_SLOTS = 4096
+# Slots tried for a client before the least recently used one is taken over
+PROBES = 8
+# MCP requests that are rate-limited and admitted
+ADMITTED_REQUESTS = (CallToolRequest, ReadResourceRequest, GetPromptRequest)
+
+class AdmissionController:
+    """At most ``limit`` calls at once per worker, with up to ``queue_size`` calls waiting ``timeout`` seconds for a slot"""
+
+    def __init__(self, limit: int, queue_size: int, timeout: float):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    async def acquire(self) -> None:
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return
+        if len(self._waiters) >= self.queue_size:
+            raise self._overloaded("Server overloaded: too many calls in progress")
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait((waiter,), timeout=self.timeout)
+        except BaseException:
+            self._abandon(waiter)
+            raise
+        if not waiter.done():
+            self._abandon(waiter)
+            raise self._overloaded(f"Server overloaded: no capacity within {self.timeout:g}s")
+
+    def release(self) -> None:
+        # A freed slot passes straight to the longest-waiting call
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def _overloaded(self, message: str) -> McpError:
+        # A queued call waits at most the queue timeout, so that is when capacity is worth trying again
+        return McpError(ErrorData(code=OVERLOADED, message=message, data={"retry_after": self.timeout}))
+
+    def _abandon(self, waiter: asyncio.Future) -> None:
+        if waiter.done() and not waiter.cancelled():
+            # The slot was handed over just as the wait ended
+            self.release()
+            return
+        waiter.cancel()
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+class RateLimiter:
+    """Token buckets per client in a memory-mapped file shared by the workers on a host"""
+
+    def __init__(self, rate: float, burst: int, path: str, slots: int = BUCKET_SLOTS):
+        self.rate = rate
+        self.burst = float(max(burst, 1))
+        self.slots = slots
+        size = slots * SLOT.size
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_NOFOLLOW, 0o600)
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                info = os.fstat(self._fd)
+                if not stat.S_ISREG(info.st_mode) or info.st_uid != os.getuid():
+                    raise PermissionError(f"Token bucket file {path} is not a regular file owned by this user")
+                if info.st_size != size:
+                    # New file, or one laid out for another slot count: start with empty buckets
+                    os.ftruncate(self._fd, 0)
+                    os.ftruncate(self._fd, size)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            self._map = mmap.mmap(self._fd, size)
+        except BaseException:
+            os.close(self._fd)
+            raise
+        # flock excludes other processes; threads of this one share the descriptor
+        self._lock = threading.Lock()
+
+    def take(self, client: str) -> float:
+        """Take a token for a client; 0 when the call may proceed, otherwise seconds until a token is available"""
+        key = int.from_bytes(hashlib.blake2b(client.encode(), digest_size=8).digest(), "little") or 1
+        now = time.monotonic()
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                offset, tokens, last = self._bucket(key, now)
+                elapsed = now - last
+                # A clock behind the stored time (the host rebooted) refills the bucket
+                tokens = self.burst if elapsed < 0 else min(self.burst, tokens + elapsed * self.rate)
+                wait = 0.0
+                if tokens >= 1:
+                    tokens -= 1
+                else:
+                    wait = (1 - tokens) / self.rate
+                SLOT.pack_into(self._map, offset, key, tokens, now)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return wait
+
+    def _bucket(self, key: int, now: float):
+        """Offset, tokens and last refill of a client's slot, claiming a free or the stalest slot for new clients"""
+        start = key % self.slots
+        stalest, stalest_time = None, now
+        for probe in range(PROBES):
+            offset = (start + probe) % self.slots * SLOT.size
+            slot_key, tokens, last = SLOT.unpack_from(self._map, offset)
+            if slot_key == key:
+                return offset, tokens, last
+            if slot_key == 0:
+                return offset, self.burst, now
+            if stalest is None or last < stalest_time:
+                stalest, stalest_time = offset, last
+        # Buckets idle for burst / rate seconds are full, so taking over a stale one loses nothing
+        return stalest, self.burst, now
+
+def default_bucket_path(port: int) -> str:
+    """Token bucket file for the server on a port, in the user's runtime directory or a private temporary one"""
+    directory = os.environ.get("XDG_RUNTIME_DIR")
+    if not directory:
+        directory = os.path.join(tempfile.gettempdir(), f"playbook-mcp-{os.getuid()}")
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise PermissionError(f"Token bucket directory {directory} must be a directory only this user can access")
+    return os.path.join(directory, f"playbook-mcp-{port}.buckets")
+
+def client_key(key_header: Optional[str], sessions: bool = True) -> str:
+    """Rate-limit key of the client behind the current MCP call"""
+    request = getattr(request_ctx.get(None), "request", None)
+    if request is None:
+        return "local"
+    token = get_access_token()
+    if token is not None:
+        return f"client:{token.client_id}"
+    headers = request.headers
+    if key_header and headers.get(key_header):
+        return f"key:{headers[key_header]}"
+    if sessions and headers.get("mcp-session-id"):
+        return f"session:{headers['mcp-session-id']}"
+    return f"address:{request.client.host if request.client else 'unknown'}"
+
+class Admission:
+    """Rate-limit and admit tool calls, resource reads and prompt renders before they are dispatched"""
+
+    def __init__(
+        self,
+        controller: Optional[AdmissionController],
+        limiter: Optional[RateLimiter],
+        key_header: Optional[str],
+        sessions: bool = True
+    ):
+        self.controller = controller
+        self.limiter = limiter
+        self.key_header = key_header
+        self.sessions = sessions
+
+    def install(self, mcp: Any) -> None:
+        """Wrap the low-level request handlers of a FastMCP server"""
+        handlers = mcp._mcp_server.request_handlers
+        for request_type in ADMITTED_REQUESTS:
+            handlers[request_type] = self.wrap(handlers[request_type])
+
+    def wrap(self, handler: Any) -> Any:
+        async def admitted(request: Any) -> Any:
+            if self.limiter is not None:
+                wait = self.limiter.take(client_key(self.key_header, self.sessions))
+                if wait:
+                    raise McpError(ErrorData(
+                        code=RATE_LIMITED,
+                        message=f"Rate limit exceeded: retry in {wait:.2f}s",
+                        data={"retry_after": round(wait, 3)}
+                    ))
+            if self.controller is None:
+                return await handler(request)
+            await self.controller.acquire()
+            try:
+                return await handler(request)
+            finally:
+                self.controller.release()
+
+        return admitted
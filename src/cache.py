@@ -0,0 +1,200 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional, Sequence, Tuple
+
+import pydantic_core
+from fastmcp.tools.tool import ToolResult
+from mcp.types import TextContent
+
+from .projection import PlaybookIndex, projection_key
+from .records import freeze
+from .versioning import json_diff
+
+ListingBuilder = Callable[[Mapping[str, Dict[str, Any]]], Dict[str, Any]]
+PlaybookBuilder = Callable[[Mapping[str, Dict[str, Any]], str, Dict[str, Any]], Dict[str, Any]]
+
+# Encoded projections kept per registry generation
+PROJECTION_CACHE_SIZE = 512
+# Superseded playbook payloads kept across generations, for diffs against older versions
+HISTORY_SIZE = 64
+
+def _generation(playbooks: Mapping[str, Dict[str, Any]]) -> int:
+    # Plain mappings have no generation and always count as current
+    return getattr(playbooks, "generation", 0)
+
+def encode_result(payload: Dict[str, Any]) -> ToolResult:
+    """Encode a tool payload once into a reusable MCP tool result"""
+    payload = freeze(payload)
+    text = pydantic_core.to_json(payload, fallback=str).decode()
+    # ToolResult() would deep-copy the payload through to_jsonable_python; frozen payloads are shared as is.
+    # This sets the two attributes ToolResult.__init__ sets in fastmcp 2.12.4 (pinned in pyproject.toml);
+    # re-check it when upgrading; tests/test_cache.py round-trips a cached result through a tool call.
+    result = ToolResult.__new__(ToolResult)
+    result.content = [TextContent(type="text", text=text)]
+    result.structured_content = payload
+    return result
+
+class _CacheState:
+    """One generation of cached responses, tied to a single registry object"""
+
+    __slots__ = ("source", "listing", "playbooks", "indexes", "projections", "markers", "diffs")
+
+    def __init__(self, source: Optional[Mapping[str, Dict[str, Any]]]):
+        self.source = source
+        self.listing: Optional[ToolResult] = None
+        self.playbooks: Dict[str, ToolResult] = {}
+        self.indexes: Dict[str, PlaybookIndex] = {}
+        self.projections: "OrderedDict[Any, ToolResult]" = OrderedDict()
+        self.markers: Dict[str, ToolResult] = {}
+        self.diffs: "OrderedDict[Tuple[str, str], ToolResult]" = OrderedDict()
+
+class ResponseCache:
+    """Finished list_playbooks/get_playbook responses, serialized to JSON once per registry.
+
+    The cache is bound to the registry mapping it was built from. Passing a
+    newer registry (e.g. after a reload swapped it in) drops every entry and
+    rebuilds; a request still holding an older registry is answered without
+    the cache, so it can never displace the current generation. In-place
+    edits to the same mapping require an explicit invalidate().
+
+    Playbook payloads carry a content ``hash``. Every payload built is also
+    remembered by (ID, hash) in a small history that outlives generations, so
+    a client holding an older version can be sent a diff instead of the body.
+    """
+
+    def __init__(self, build_listing: ListingBuilder, build_playbook: PlaybookBuilder):
+        self._build_listing = build_listing
+        self._build_playbook = build_playbook
+        self._state = _CacheState(None)
+        self._history: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._history_lock = threading.Lock()
+
+    def _current(self, playbooks: Mapping[str, Dict[str, Any]]) -> _CacheState:
+        state = self._state
+        if state.source is not playbooks:
+            if state.source is not None and _generation(playbooks) < _generation(state.source):
+                # A stale registry gets a throwaway generation
+                return _CacheState(playbooks)
+            # Swap in a whole new generation so concurrent readers never mix entries
+            state = _CacheState(playbooks)
+            self._state = state
+        return state
+
+    def invalidate(self) -> None:
+        """Drop all cached responses; they are rebuilt on next access"""
+        self._state = _CacheState(None)
+
+    def warm(self, playbooks: Mapping[str, Dict[str, Any]], playbook_ids: Optional[Iterable[str]] = None) -> None:
+        """Pre-build the listing and the given (by default every) playbook response"""
+        self.listing(playbooks)
+        for playbook_id in playbooks if playbook_ids is None else playbook_ids:
+            self.playbook(playbooks, playbook_id)
+
+    def listing(self, playbooks: Mapping[str, Dict[str, Any]]) -> ToolResult:
+        state = self._current(playbooks)
+        if state.listing is None:
+            state.listing = encode_result(self._build_listing(playbooks))
+        return state.listing
+
+    def playbook(self, playbooks: Mapping[str, Dict[str, Any]], playbook_id: str) -> Optional[ToolResult]:
+        """Return the cached response for a playbook, or None if the ID is unknown"""
+        state = self._current(playbooks)
+        result = state.playbooks.get(playbook_id)
+        if result is None:
+            playbook = playbooks.get(playbook_id)
+            if playbook is None:
+                return None
+            result = encode_result(self._build_playbook(playbooks, playbook_id, playbook))
+            state.playbooks[playbook_id] = result
+            if result.structured_content.get("hash"):
+                self._remember(playbook_id, result.structured_content)
+        return result
+
+    def _remember(self, playbook_id: str, payload: Dict[str, Any]) -> None:
+        key = (playbook_id, payload["hash"])
+        with self._history_lock:
+            self._history[key] = payload
+            self._history.move_to_end(key)
+            if len(self._history) > HISTORY_SIZE:
+                self._history.popitem(last=False)
+
+    def not_modified(self, playbooks: Mapping[str, Dict[str, Any]], playbook_id: str) -> ToolResult:
+        """The marker returned when a client's copy of a playbook is current"""
+        state = self._current(playbooks)
+        result = state.markers.get(playbook_id)
+        if result is None:
+            current = self.playbook(playbooks, playbook_id)
+            result = encode_result({
+                "id": playbook_id,
+                "hash": current.structured_content["hash"],
+                "not_modified": True
+            })
+            state.markers[playbook_id] = result
+        return result
+
+    def diff(
+        self,
+        playbooks: Mapping[str, Dict[str, Any]],
+        playbook_id: str,
+        base_hash: str
+    ) -> Optional[ToolResult]:
+        """A JSON Patch from a remembered older version to the current one, or None if that version is unknown"""
+        state = self._current(playbooks)
+        key = (playbook_id, base_hash)
+        result = state.diffs.get(key)
+        if result is not None:
+            return result
+
+        current = self.playbook(playbooks, playbook_id)
+        with self._history_lock:
+            base = self._history.get(key)
+        if current is None or base is None:
+            return None
+
+        result = encode_result({
+            "id": playbook_id,
+            "hash": current.structured_content["hash"],
+            "base_hash": base_hash,
+            "patch": json_diff(base, current.structured_content)
+        })
+        state.diffs[key] = result
+        if len(state.diffs) > PROJECTION_CACHE_SIZE:
+            state.diffs.popitem(last=False)
+        return result
+
+    def index(self, playbooks: Mapping[str, Dict[str, Any]], playbook_id: str) -> Optional[PlaybookIndex]:
+        """Return the section/pointer index over a playbook's cached payload"""
+        state = self._current(playbooks)
+        index = state.indexes.get(playbook_id)
+        if index is None:
+            full = self.playbook(playbooks, playbook_id)
+            if full is None:
+                return None
+            index = PlaybookIndex(full.structured_content)
+            state.indexes[playbook_id] = index
+        return index
+
+    def projection(
+        self,
+        playbooks: Mapping[str, Dict[str, Any]],
+        playbook_id: str,
+        sections: Optional[Sequence[str]] = None,
+        fields: Optional[Sequence[str]] = None,
+        summary_only: bool = False
+    ) -> Optional[ToolResult]:
+        """Return a partial playbook response, resolved against the playbook's section index"""
+        state = self._current(playbooks)
+        key = (playbook_id,) + projection_key(sections, fields, summary_only)
+        result = state.projections.get(key)
+        if result is not None:
+            return result
+
+        index = self.index(playbooks, playbook_id)
+        if index is None:
+            return None
+
+        result = encode_result(index.project(sections, fields, summary_only))
+        state.projections[key] = result
+        if len(state.projections) > PROJECTION_CACHE_SIZE:
+            state.projections.popitem(last=False)
+        return result
@@ -0,0 +1,229 @@
+"""On-disk playbook catalog.
+
+A catalog is a directory of playbook files (``<playbook_id>.json``,
+``.yaml`` or ``.yml``), each holding ``name``, ``description``, ``category``
+and ``template``. Only listing metadata is read at startup; template bodies
+are parsed on first access. An optional ``index.json`` manifest (written by
+``python -m src.catalog index <dir>``) lets startup skip parsing entirely for
+files that have not changed since the manifest was written.
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from .records import METADATA_FIELDS
+from .registry import Registry, install, playbook_metadata
+from .versioning import content_hash, playbook_hash
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_SUFFIXES = (".json", ".yaml", ".yml")
+MANIFEST_NAME = "index.json"
+
+class CatalogError(ValueError):
+    """A catalog file is missing, unreadable or not a valid playbook"""
+
+# (path, mtime_ns, size) identifies one version of a playbook file
+FileRevision = Tuple[str, int, int]
+
+def read_document(path: Path) -> Tuple[Any, str]:
+    """Parse a JSON or YAML file; also returns the file's content hash"""
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+    except OSError as e:
+        raise CatalogError(f"Cannot read '{path}': {e}") from e
+
+    try:
+        if path.suffix == ".json":
+            return json.loads(raw), content_hash(raw)
+        try:
+            import yaml
+        except ImportError as e:
+            raise CatalogError(f"PyYAML is required to load '{path}' (pip install pyyaml)") from e
+        return yaml.safe_load(raw), content_hash(raw)
+    except CatalogError:
+        raise
+    except Exception as e:
+        raise CatalogError(f"Invalid file '{path}': {e}") from e
+
+def read_playbook_file(path: Path) -> Tuple[Dict[str, Any], str]:
+    """Parse and validate a single playbook file; also returns the file's content hash"""
+    playbook, digest = read_document(path)
+    if not isinstance(playbook, dict):
+        raise CatalogError(f"Playbook file '{path}' must contain a mapping")
+    missing = [field for field in METADATA_FIELDS + ("template",) if field not in playbook]
+    if missing:
+        raise CatalogError(f"Playbook file '{path}' is missing fields: {', '.join(missing)}")
+    invalid = _invalid_metadata(playbook)
+    if invalid:
+        raise CatalogError(f"Playbook file '{path}' fields must be strings: {', '.join(invalid)}")
+    return playbook, digest
+
+def _invalid_metadata(playbook: Mapping[str, Any]) -> List[str]:
+    # YAML reads e.g. "name: 2024" as a number
+    return [field for field in METADATA_FIELDS if not isinstance(playbook.get(field), str)]
+
+def parse_playbook_file(path: Path) -> Dict[str, Any]:
+    """Parse and validate a single playbook file"""
+    return read_playbook_file(path)[0]
+
+def scan_files(directory: Path) -> Dict[str, FileRevision]:
+    """Map playbook IDs to the current revision of their files"""
+    files = {}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            stem, suffix = os.path.splitext(entry.name)
+            if suffix not in SUPPORTED_SUFFIXES or entry.name == MANIFEST_NAME or not entry.is_file():
+                continue
+            if stem in files:
+                logger.warning("Duplicate playbook ID '%s' in catalog, ignoring %s", stem, entry.name)
+                continue
+            stat = entry.stat()
+            files[stem] = (entry.path, stat.st_mtime_ns, stat.st_size)
+    return files
+
+def _read_manifest(directory: Path) -> Dict[str, Dict[str, Any]]:
+    try:
+        with open(directory / MANIFEST_NAME, "rb") as f:
+            return json.load(f).get("playbooks", {})
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+def write_manifest(directory: Path) -> int:
+    """Write the metadata manifest for a catalog directory; returns the playbook count"""
+    directory = Path(directory)
+    playbooks = {}
+    for playbook_id, (path, mtime_ns, size) in sorted(scan_files(directory).items()):
+        playbook, digest = read_playbook_file(Path(path))
+        playbooks[playbook_id] = {
+            "file": os.path.basename(path),
+            "mtime_ns": mtime_ns,
+            "size": size,
+            "hash": digest,
+            **playbook_metadata(playbook)
+        }
+    tmp = directory / f".{MANIFEST_NAME}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "playbooks": playbooks}, f, indent=2)
+    os.replace(tmp, directory / MANIFEST_NAME)
+    return len(playbooks)
+
+def load_registry(
+    directory: Path,
+    builtin: Optional[Mapping[str, Dict[str, Any]]] = None,
+    previous: Optional[Registry] = None
+) -> Registry:
+    """Build a registry from a catalog directory, layered over the built-in playbooks.
+
+    Files whose revision is unchanged from ``previous`` reuse its metadata and
+    any already-parsed body, so a reload only reads what actually changed.
+    """
+    directory = Path(directory)
+    files = scan_files(directory)
+    manifest = None
+
+    index = {}
+    loaded = {}
+    revisions = {}
+    hashes = {}
+    if builtin:
+        for playbook_id, playbook in builtin.items():
+            index[playbook_id] = playbook_metadata(playbook)
+            loaded[playbook_id] = playbook
+            hashes[playbook_id] = playbook_hash(playbook)
+
+    for playbook_id, revision in files.items():
+        path, mtime_ns, size = revision
+        if previous is not None and previous.revision(playbook_id) == revision:
+            index[playbook_id] = previous.index[playbook_id]
+            if previous.is_loaded(playbook_id):
+                loaded[playbook_id] = previous[playbook_id]
+            else:
+                loaded.pop(playbook_id, None)
+            revisions[playbook_id] = revision
+            hashes[playbook_id] = previous.content_hash(playbook_id)
+            continue
+
+        if manifest is None:
+            manifest = _read_manifest(directory)
+        entry = manifest.get(playbook_id)
+        # Manifests written before content hashes existed fall back to parsing the file
+        if (entry and entry.get("file") == os.path.basename(path) and entry.get("hash")
+                and entry.get("mtime_ns") == mtime_ns and entry.get("size") == size and not _invalid_metadata(entry)):
+            index[playbook_id] = playbook_metadata(entry)
+            hashes[playbook_id] = entry["hash"]
+            loaded.pop(playbook_id, None)
+        else:
+            try:
+                playbook, hashes[playbook_id] = read_playbook_file(Path(path))
+            except CatalogError as e:
+                logger.warning("Skipping playbook '%s': %s", playbook_id, e)
+                continue
+            index[playbook_id] = playbook_metadata(playbook)
+            # Only metadata is kept; the body is re-read on first access
+            loaded.pop(playbook_id, None)
+        revisions[playbook_id] = revision
+
+    def loader(playbook_id: str) -> Dict[str, Any]:
+        revision = revisions.get(playbook_id)
+        if revision is None:
+            raise KeyError(playbook_id)
+        return parse_playbook_file(Path(revision[0]))
+
+    return Registry(index, loader=loader, loaded=loaded, revisions=revisions, hashes=hashes)
+
+class CatalogWatcher(threading.Thread):
+    """Poll a catalog directory and swap in a rebuilt registry when files change"""
+
+    def __init__(
+        self,
+        directory: Path,
+        builtin: Optional[Mapping[str, Dict[str, Any]]] = None,
+        interval: float = 2.0,
+        on_reload: Optional[Callable[[Registry], None]] = None
+    ):
+        super().__init__(name="playbook-catalog-watcher", daemon=True)
+        self.directory = Path(directory)
+        self.builtin = builtin
+        self.interval = interval
+        self.on_reload = on_reload or install
+        self._stop_event = threading.Event()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def run(self) -> None:
+        from .registry import current
+
+        last = self._snapshot()
+        while not self._stop_event.wait(self.interval):
+            snapshot = self._snapshot()
+            if snapshot == last:
+                continue
+            try:
+                registry = load_registry(self.directory, self.builtin, previous=current())
+            except Exception:
+                # Keep serving the current registry and keep watching
+                logger.exception("Catalog reload failed")
+                continue
+            last = snapshot
+            self.on_reload(registry)
+            logger.info("Reloaded playbook catalog from %s (%d playbooks)", self.directory, len(registry))
+
+    def _snapshot(self) -> Optional[Dict[str, FileRevision]]:
+        try:
+            return scan_files(self.directory)
+        except OSError:
+            return None
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != "index":
+        sys.exit("usage: python -m src.catalog index <catalog_dir>")
+    count = write_manifest(Path(sys.argv[2]))
+    print(f"Indexed {count} playbooks in {Path(sys.argv[2]) / MANIFEST_NAME}")
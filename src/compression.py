@@ -0,0 +1,210 @@
+"""Accept-Encoding negotiated gzip/zstd compression for the HTTP transport.
+
+Every body chunk (a JSON response, or one SSE event) is compressed into a
+self-contained segment: a deflate block ending in a sync flush for gzip, a
+complete frame for zstd. A segment doesn't depend on the chunks sent before
+it, so SSE events still go out as soon as they are produced. A JSON-RPC
+response chunk is split after its ``"result":`` key: the envelope before it
+carries the request id and is compressed for every response, while the
+result is cached by content digest, so the same playbook requested again, by
+any client, is spliced together from already compressed bytes. Responses
+that already carry a Content-Encoding, and small or non-text bodies, pass
+through as is.
+
+zstd is offered only when the optional ``zstandard`` package is installed
+(``pip install .[compression]``); gzip always works.
+"""
+
+import hashlib
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+# Fixed member header (no file name, no mtime) and the final empty deflate block
+GZIP_HEADER = b"\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff"
+GZIP_LAST_BLOCK = b"\x03\x00"
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+SEGMENT_CACHE_SIZE = 512
+# Results larger than this are compressed every time rather than cached
+MAX_CACHED_CHUNK = 1 << 20
+# A JSON-RPC response (or the SSE event holding it) has its per-request id before this key
+RESULT_KEY = b'"result":'
+# Bytes searched for the result key: the SSE fields and the envelope come first
+MAX_ENVELOPE = 256
+
+def _deflate(chunk: bytes) -> bytes:
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+def _zstd_frame(chunk: bytes) -> bytes:
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(chunk)
+
+ENCODERS: Dict[str, Callable[[bytes], bytes]] = {"gzip": _deflate}
+if zstandard is not None:
+    ENCODERS = {"zstd": _zstd_frame, **ENCODERS}
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Available encoding with the client's highest q-value, or None for identity"""
+    accepted: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    # The client's highest q-value wins; the server's order only breaks ties
+    best, best_quality = None, 0.0
+    for encoding in ENCODERS:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+class SegmentCache:
+    """LRU of compressed results keyed by (encoding, digest of the uncompressed result)"""
+
+    def __init__(self, maxsize: int = SEGMENT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._segments: "OrderedDict[Tuple[str, bytes], bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def segment(self, encoding: str, chunk: bytes) -> bytes:
+        """Compressed segment for a chunk, reusing the cached result of a JSON-RPC response"""
+        encode = ENCODERS[encoding]
+        split = chunk.find(RESULT_KEY, 0, MAX_ENVELOPE)
+        if split < 0:
+            # Errors and notifications are small, and requests never repeat an id
+            return encode(chunk)
+        split += len(RESULT_KEY)
+        return encode(chunk[:split]) + self._cached(encoding, chunk[split:])
+
+    def _cached(self, encoding: str, result: bytes) -> bytes:
+        if len(result) > MAX_CACHED_CHUNK:
+            return ENCODERS[encoding](result)
+        key = (encoding, hashlib.blake2b(result, digest_size=16).digest())
+        with self._lock:
+            segment = self._segments.get(key)
+            if segment is not None:
+                self._segments.move_to_end(key)
+                self.hits += 1
+                return segment
+        segment = ENCODERS[encoding](result)
+        with self._lock:
+            self.misses += 1
+            self._segments[key] = segment
+            if len(self._segments) > self.maxsize:
+                self._segments.popitem(last=False)
+        return segment
+
+class _Encoder:
+    """Turns the chunks of one response into one encoded stream"""
+
+    def __init__(self, encoding: str, cache: SegmentCache):
+        self.encoding = encoding
+        self.cache = cache
+        self.started = False
+        self.crc = 0
+        self.size = 0
+
+    def chunk(self, data: bytes) -> bytes:
+        prefix = b""
+        if self.encoding == "gzip":
+            if not self.started:
+                prefix = GZIP_HEADER
+            self.crc = zlib.crc32(data, self.crc)
+            self.size += len(data)
+        self.started = True
+        return prefix + self.cache.segment(self.encoding, data) if data else prefix
+
+    def finish(self) -> bytes:
+        if self.encoding != "gzip":
+            return b""
+        return GZIP_LAST_BLOCK + struct.pack("<II", self.crc, self.size & 0xFFFFFFFF)
+
+class CompressionMiddleware:
+    """Pure ASGI middleware, so streamed (SSE) responses stay streamed"""
+
+    def __init__(self, app: Any, minimum_size: int = 1024, cache: Optional[SegmentCache] = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.cache = cache or SegmentCache()
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressedResponse(send, _Encoder(encoding, self.cache), self.minimum_size).send)
+
+class _CompressedResponse:
+    """send() wrapper deciding on the first body chunk whether to compress"""
+
+    def __init__(self, send: Callable, encoder: _Encoder, minimum_size: int):
+        self._send = send
+        self.encoder = encoder
+        self.minimum_size = minimum_size
+        self.start: Optional[Dict[str, Any]] = None
+        # None until decided, then True (compress) or False (pass through)
+        self.compress: Optional[bool] = None
+
+    def _eligible(self, body: bytes, more_body: bool) -> bool:
+        headers = Headers(raw=self.start["headers"])
+        if "content-encoding" in headers:
+            return False
+        if not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES):
+            return False
+        length = headers.get("content-length")
+        if length is not None and length.isdigit():
+            return int(length) >= self.minimum_size
+        # Unknown length: a complete small body isn't worth it, an open stream is
+        return more_body or len(body) >= self.minimum_size
+
+    async def send(self, message: Dict[str, Any]) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body" or self.start is None:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.compress is None:
+            self.compress = self._eligible(body, more_body)
+            if self.compress:
+                headers = MutableHeaders(raw=self.start["headers"])
+                del headers["content-length"]
+                headers["content-encoding"] = self.encoder.encoding
+                headers.add_vary_header("Accept-Encoding")
+            await self._send(self.start)
+
+        if self.compress:
+            body = self.encoder.chunk(body)
+            if not more_body:
+                body += self.encoder.finish()
+            message = {"type": "http.response.body", "body": body, "more_body": more_body}
+        await self._send(message)
@@ -3,15 +3,126 @@ try:
 except ImportError:
     from pydantic import BaseSettings
 
+import math
+import os
+from typing import Literal, Optional
+
 from pydantic import ConfigDict
 
+# CPU quota files of cgroup v2 ("<quota> <period>") and cgroup v1 (quota, period)
+CGROUP_CPU_MAX = "/sys/fs/cgroup/cpu.max"
+CGROUP_V1_CPU = ("/sys/fs/cgroup/cpu/cpu.cfs_quota_us", "/sys/fs/cgroup/cpu/cpu.cfs_period_us")
+
+def _read(path: str) -> str:
+    with open(path) as f:
+        return f.read()
+
+def _cpu_quota() -> Optional[int]:
+    """CPUs granted by the cgroup CPU quota, rounded up, or None without a quota"""
+    try:
+        quota, period = _read(CGROUP_CPU_MAX).split()[:2]
+    except (OSError, ValueError):
+        try:
+            quota, period = (_read(path).strip() for path in CGROUP_V1_CPU)
+        except OSError:
+            return None
+    try:
+        quota_us, period_us = int(quota), int(period)
+    except ValueError:
+        # "max" is no quota
+        return None
+    if quota_us <= 0 or period_us <= 0:
+        return None
+    return max(1, math.ceil(quota_us / period_us))
+
+def available_cpus() -> int:
+    """CPUs this process may use: its CPU affinity, capped by a container's CPU quota"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    quota = _cpu_quota()
+    return max(1, min(cpus, quota) if quota else cpus)
+
 class Settings(BaseSettings):
     """Configuration settings for Playbook MCP Server"""
     
     model_config = ConfigDict(env_file=".env")
     
     server_name: str = "Playbook MCP Server"
+    host: str = "0.0.0.0"
     port: int = 8000
     environment: str = "development"
+    
+    # HTTP worker processes sharing the listening port; 0 means one per available CPU in production, 1 otherwise
+    workers: int = 0
+    # Stateless sessions let any worker answer any request; defaults to on when running several workers
+    stateless_http: Optional[bool] = None
+    
+    # Prometheus-text call metrics on /metrics
+    metrics_enabled: bool = True
+    
+    # Admission control per HTTP worker: calls running at once, calls waiting for a slot and the longest wait before
+    # a call is shed with an "overloaded" error; a limit of 0 disables it
+    max_concurrent_calls: int = 64
+    call_queue_size: int = 128
+    call_queue_timeout: float = 1.0
+    
+    # Per-client token buckets (calls per second, burst) shared by the HTTP workers on a host; a rate of 0 disables them
+    rate_limit_per_second: float = 0
+    rate_limit_burst: int = 20
+    # Clients are keyed by their validated access token, then this header, then their stateful MCP session, then their
+    # address. The header is not checked here, so set it only when a trusted proxy sets or strips it for every request.
+    rate_limit_key_header: Optional[str] = None
+    # File holding the shared buckets; defaults to one per port in $XDG_RUNTIME_DIR or a private temporary directory
+    rate_limit_path: Optional[str] = None
+    
+    # Opt-in profiling: share of MCP HTTP requests traced (0 disables), with per-phase timings on /metrics
+    profile_sample_rate: float = 0
+    # Traced requests slower than this are dumped (phase timings, collapsed stacks) to the profile directory
+    profile_slow_ms: float = 250
+    profile_dir: str = "profiles"
+    # Newest dumps kept in the profile directory
+    profile_max_dumps: int = 200
+    # Stack sampling interval while a traced request runs; cProfile adds exact call counts at a higher cost
+    profile_interval_ms: float = 2.0
+    profile_cprofile: bool = False
+    
+    # Where playbooks live: "memory" (built-in playbooks plus PLAYBOOK_DIR) or "sqlite"
+    storage_backend: Literal["memory", "sqlite"] = "memory"
+    # SQLite database (seeded with the built-in playbooks when empty) and its read-connection pool size
+    sqlite_path: str = "playbooks.db"
+    sqlite_pool_size: int = 8
+    
+    # Optional directory of JSON/YAML playbook files layered over the built-in playbooks
+    playbook_dir: Optional[str] = None
+    catalog_poll_interval: float = 2.0
+    
+    # Precompiled built-in registry (python -m src.snapshot build <path>); ignored when stale or with PLAYBOOK_DIR
+    snapshot_path: Optional[str] = None
+    
+    # gzip/zstd HTTP response compression negotiated with Accept-Encoding; smaller bodies are sent as is
+    compression_enabled: bool = True
+    compression_min_size: int = 1024
+    
+    # Optional directory of per-tenant overlay files, selected by the tenant header or the tools' tenant parameter
+    tenant_dir: Optional[str] = None
+    tenant_header: str = "X-Playbook-Tenant"
+    # Tenants whose merged views and response caches are kept in memory
+    tenant_cache_size: int = 64
+
+    @property
+    def worker_count(self) -> int:
+        if self.workers > 0:
+            return self.workers
+        if self.environment == "production":
+            return available_cpus()
+        return 1
+
+    @property
+    def use_stateless_http(self) -> bool:
+        if self.stateless_http is not None:
+            return self.stateless_http
+        return self.worker_count > 1
 
 settings = Settings()
\ No newline at end of file
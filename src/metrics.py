@@ -0,0 +1,339 @@
+"""Per-tool call metrics exposed in the Prometheus text format.
+
+Each thread records into its own counter store, so the hot path is a few
+list updates with no lock; stores are only merged when /metrics is scraped.
+Series are labelled with the worker's process ID. Several HTTP workers share
+one port, so a scrape reaches any one of them: each worker writes a snapshot
+of its metrics to a shared directory every second, and the worker answering
+a scrape renders its own live metrics together with every other worker's
+latest snapshot. Snapshots of workers that exited are kept, so totals summed
+over workers never go down.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+from fastmcp.server.middleware import Middleware, MiddlewareContext
+
+from . import registry
+from .profiling import PHASES
+from .resources import URI_TEMPLATE, playbook_id_from_uri
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# Slots of a per-(kind, name) counter list
+CALLS, ERRORS, LATENCY_SUM, SIZE_SUM, BUCKETS_START = range(5)
+SIZE_BUCKETS_START = BUCKETS_START + len(LATENCY_BUCKETS) + 1
+
+# Seconds between snapshots written to the shared metrics directory
+SNAPSHOT_INTERVAL = 1.0
+# Environment variable through which the server process hands the shared directory to its workers
+SHARED_DIR_ENV = "PLAYBOOK_MCP_METRICS_DIR"
+
+# Label for calls to tools, prompts and resources the server doesn't have
+UNKNOWN = "unknown"
+
+Key = Tuple[str, str]
+
+class _ThreadStore:
+    __slots__ = ("calls", "playbooks", "phases")
+
+    def __init__(self):
+        self.calls: Dict[Key, List[float]] = {}
+        self.playbooks: Dict[str, int] = {}
+        self.phases: Dict[str, List[float]] = {}
+
+class Metrics:
+    """Call counts, errors, latency and response-size histograms per tool/prompt/resource"""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._stores: List[_ThreadStore] = []
+        self._stores_lock = threading.Lock()
+        self.started = time.time()
+        self.shared_dir: Optional[str] = None
+
+    def share(self, directory: str, interval: float = SNAPSHOT_INTERVAL) -> None:
+        """Publish this worker's metrics to a directory shared with the other workers, and render theirs"""
+        self.shared_dir = directory
+        threading.Thread(target=self._publish, args=(interval,), name="playbook-metrics-snapshot", daemon=True).start()
+
+    def _publish(self, interval: float) -> None:
+        while True:
+            try:
+                self.write_snapshot()
+            except OSError as e:
+                logger.warning("Could not write metrics snapshot: %s", e)
+            time.sleep(interval)
+
+    def write_snapshot(self) -> None:
+        path = os.path.join(self.shared_dir, f"{os.getpid()}.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.snapshot(), f, separators=(",", ":"))
+        # Readers see the previous snapshot or this one, never a partial file
+        os.replace(path + ".tmp", path)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """This worker's metrics as plain JSON data"""
+        calls, playbooks, phases = self._merged()
+        return {
+            "pid": os.getpid(),
+            "started": self.started,
+            "registry_playbooks": len(registry.current()),
+            "calls": [[kind, name, counters] for (kind, name), counters in calls.items()],
+            "playbooks": playbooks,
+            "phases": phases
+        }
+
+    def _snapshots(self) -> List[Dict[str, Any]]:
+        """This worker's live metrics followed by the latest snapshot of every other worker"""
+        snapshots = [self.snapshot()]
+        if self.shared_dir is None:
+            return snapshots
+        own = f"{os.getpid()}.json"
+        try:
+            names = sorted(name for name in os.listdir(self.shared_dir) if name.endswith(".json") and name != own)
+        except OSError:
+            return snapshots
+        for name in names:
+            try:
+                with open(os.path.join(self.shared_dir, name)) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    def _store(self) -> _ThreadStore:
+        store = getattr(self._local, "store", None)
+        if store is None:
+            store = _ThreadStore()
+            self._local.store = store
+            with self._stores_lock:
+                self._stores.append(store)
+        return store
+
+    def record(self, kind: str, name: str, seconds: float, size: int, error: bool) -> None:
+        calls = self._store().calls
+        counters = calls.get((kind, name))
+        if counters is None:
+            counters = [0.0] * (SIZE_BUCKETS_START + len(SIZE_BUCKETS) + 1)
+            calls[(kind, name)] = counters
+        counters[CALLS] += 1
+        if error:
+            counters[ERRORS] += 1
+        counters[LATENCY_SUM] += seconds
+        counters[SIZE_SUM] += size
+        counters[BUCKETS_START + bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        counters[SIZE_BUCKETS_START + bisect_left(SIZE_BUCKETS, size)] += 1
+
+    def record_playbooks(self, playbook_ids: Iterable[str]) -> None:
+        playbooks = self._store().playbooks
+        for playbook_id in playbook_ids:
+            playbooks[playbook_id] = playbooks.get(playbook_id, 0) + 1
+
+    def record_phase(self, phase: str, seconds: float) -> None:
+        """Time spent in one phase of a profiled request (see src/profiling.py)"""
+        phases = self._store().phases
+        counters = phases.get(phase)
+        if counters is None:
+            counters = [0.0] * (BUCKETS_START + len(LATENCY_BUCKETS) + 1)
+            phases[phase] = counters
+        counters[CALLS] += 1
+        counters[LATENCY_SUM] += seconds
+        counters[BUCKETS_START + bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    def _merged(self) -> Tuple[Dict[Key, List[float]], Dict[str, int], Dict[str, List[float]]]:
+        with self._stores_lock:
+            stores = list(self._stores)
+        calls: Dict[Key, List[float]] = {}
+        playbooks: Dict[str, int] = {}
+        phases: Dict[str, List[float]] = {}
+        for store in stores:
+            for merged_counters, counters_by_key in ((calls, store.calls), (phases, store.phases)):
+                for key, counters in list(counters_by_key.items()):
+                    merged = merged_counters.setdefault(key, [0.0] * len(counters))
+                    for position, value in enumerate(list(counters)):
+                        merged[position] += value
+            for playbook_id, count in list(store.playbooks.items()):
+                playbooks[playbook_id] = playbooks.get(playbook_id, 0) + count
+        return calls, playbooks, phases
+
+    def render(self) -> str:
+        """Current metrics in the Prometheus text exposition format"""
+        workers = []
+        for snapshot in self._snapshots():
+            calls = {(kind, name): counters for kind, name, counters in snapshot["calls"]}
+            workers.append((f'worker="{snapshot["pid"]}"', snapshot, calls))
+        # Gauges only describe running workers; counters of exited ones still count towards the totals
+        running = [(worker, snapshot) for worker, snapshot, _ in workers if _running(snapshot["pid"])]
+        now = time.time()
+        lines = [
+            "# HELP playbook_mcp_uptime_seconds Seconds since this worker started",
+            "# TYPE playbook_mcp_uptime_seconds gauge"
+        ]
+        lines.extend(f"playbook_mcp_uptime_seconds{{{worker}}} {now - snapshot['started']:.3f}" for worker, snapshot in running)
+        lines.append("# HELP playbook_mcp_registry_playbooks Playbooks in the active registry")
+        lines.append("# TYPE playbook_mcp_registry_playbooks gauge")
+        lines.extend(f"playbook_mcp_registry_playbooks{{{worker}}} {snapshot['registry_playbooks']}" for worker, snapshot in running)
+
+        def labels(worker: str, key: Key) -> str:
+            return f'{worker},kind="{key[0]}",name="{_escape(key[1])}"'
+
+        for metric, slot, help_text in (
+            ("playbook_mcp_calls_total", CALLS, "MCP tool/prompt/resource calls"),
+            ("playbook_mcp_errors_total", ERRORS, "Calls that raised or returned an error result")
+        ):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for worker, _, calls in workers:
+                lines.extend(f"{metric}{{{labels(worker, key)}}} {int(counters[slot])}" for key, counters in sorted(calls.items()))
+
+        for metric, buckets, start, sum_slot, help_text in (
+            ("playbook_mcp_latency_seconds", LATENCY_BUCKETS, BUCKETS_START, LATENCY_SUM, "Call latency inside the MCP server"),
+            ("playbook_mcp_response_bytes", SIZE_BUCKETS, SIZE_BUCKETS_START, SIZE_SUM, "Encoded response size")
+        ):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} histogram")
+            for worker, _, calls in workers:
+                for key, counters in sorted(calls.items()):
+                    key_labels = labels(worker, key)
+                    lines.extend(_histogram(metric, key_labels, buckets, counters[start:start + len(buckets) + 1]))
+                    lines.append(f"{metric}_sum{{{key_labels}}} {counters[sum_slot]:.6f}")
+                    lines.append(f"{metric}_count{{{key_labels}}} {int(counters[CALLS])}")
+
+        lines.append("# HELP playbook_mcp_playbook_requests_total Requests per playbook ID (get_playbook, get_playbooks, playbook:// reads)")
+        lines.append("# TYPE playbook_mcp_playbook_requests_total counter")
+        for worker, snapshot, _ in workers:
+            lines.extend(
+                f'playbook_mcp_playbook_requests_total{{{worker},playbook_id="{_escape(playbook_id)}"}} {count}'
+                for playbook_id, count in sorted(snapshot["playbooks"].items(), key=lambda item: -item[1])
+            )
+
+        if any(snapshot["phases"] for _, snapshot, _ in workers):
+            metric = "playbook_mcp_phase_seconds"
+            lines.append(f"# HELP {metric} Time per request phase of profiled requests (PROFILE_SAMPLE_RATE)")
+            lines.append(f"# TYPE {metric} histogram")
+            for worker, snapshot, _ in workers:
+                for phase, counters in sorted(snapshot["phases"].items(), key=lambda item: PHASES.index(item[0])):
+                    phase_labels = f'{worker},phase="{phase}"'
+                    lines.extend(_histogram(metric, phase_labels, LATENCY_BUCKETS, counters[BUCKETS_START:]))
+                    lines.append(f"{metric}_sum{{{phase_labels}}} {counters[LATENCY_SUM]:.6f}")
+                    lines.append(f"{metric}_count{{{phase_labels}}} {int(counters[CALLS])}")
+        return "\n".join(lines) + "\n"
+
+def _running(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _histogram(metric: str, labels: str, buckets: Sequence[float], counts: Sequence[float]) -> List[str]:
+    lines = []
+    cumulative = 0
+    for bound, count in zip(list(buckets) + ["+Inf"], counts):
+        cumulative += int(count)
+        lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+    return lines
+
+def _result_size(result: Any) -> int:
+    if isinstance(result, list):
+        blocks = result
+    elif hasattr(result, "messages"):
+        blocks = [message.content for message in result.messages]
+    else:
+        blocks = getattr(result, "content", None) or []
+    size = 0
+    for block in blocks:
+        value = getattr(block, "text", None)
+        if value is None:
+            value = getattr(block, "content", None)
+        if isinstance(value, str):
+            size += len(value.encode())
+        elif isinstance(value, bytes):
+            size += len(value)
+    return size
+
+def _is_error_result(result: Any) -> bool:
+    # Tools report lookup failures such as get_playbook's not-found path as {"error": ...}
+    structured = getattr(result, "structured_content", None)
+    return isinstance(structured, dict) and "error" in structured
+
+def _requested_playbooks(name: str, arguments: Optional[Dict[str, Any]]) -> List[str]:
+    if not arguments:
+        return []
+    if name == "get_playbook":
+        requested = [arguments.get("playbook_id")]
+    elif name == "get_playbooks":
+        requested = list(arguments.get("ids") or [])
+    else:
+        return []
+    # Only known IDs become label values, so clients can't blow up label cardinality
+    playbooks = registry.current()
+    return [playbook_id for playbook_id in requested if isinstance(playbook_id, str) and playbook_id in playbooks]
+
+class MetricsMiddleware(Middleware):
+    """Time every tool call, prompt render and resource read"""
+
+    def __init__(self, metrics: Metrics, server: Any = None):
+        self.metrics = metrics
+        self.server = server
+        self._names: Optional[Dict[str, FrozenSet[str]]] = None
+
+    async def _label(self, kind: str, name: str) -> str:
+        """The name itself if the server registered it, else UNKNOWN, so clients can't blow up label cardinality"""
+        if self.server is None:
+            return name
+        if self._names is None:
+            # Tools, prompts and resources are all registered when the server module is imported
+            self._names = {
+                "tool": frozenset(await self.server.get_tools()),
+                "prompt": frozenset(await self.server.get_prompts()),
+                "resource": frozenset(await self.server.get_resources())
+            }
+        return name if name in self._names[kind] else UNKNOWN
+
+    async def _measure(self, kind: str, name: str, context: MiddlewareContext, call_next) -> Any:
+        start = time.perf_counter()
+        try:
+            result = await call_next(context)
+        except Exception:
+            self.metrics.record(kind, name, time.perf_counter() - start, 0, True)
+            raise
+        self.metrics.record(kind, name, time.perf_counter() - start, _result_size(result), _is_error_result(result))
+        return result
+
+    async def on_call_tool(self, context, call_next):
+        name = context.message.name
+        self.metrics.record_playbooks(_requested_playbooks(name, context.message.arguments))
+        return await self._measure("tool", await self._label("tool", name), context, call_next)
+
+    async def on_get_prompt(self, context, call_next):
+        return await self._measure("prompt", await self._label("prompt", context.message.name), context, call_next)
+
+    async def on_read_resource(self, context, call_next):
+        name = str(context.message.uri)
+        playbook_id = playbook_id_from_uri(name)
+        if playbook_id is not None:
+            # One series for all playbook reads; the ID goes to the per-playbook counter
+            name = URI_TEMPLATE
+            if playbook_id in registry.current():
+                self.metrics.record_playbooks([playbook_id])
+        else:
+            name = await self._label("resource", name)
+        return await self._measure("resource", name, context, call_next)
@@ -0,0 +1,52 @@
+"""Opaque cursors for paging through the playbook registry."""
+
+import base64
+import binascii
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from .registry import Registry
+
+class InvalidCursor(ValueError):
+    """The cursor is malformed, belongs to another listing, or its position no longer exists"""
+
+def encode_cursor(category: Optional[str], after: str) -> str:
+    raw = json.dumps({"c": category, "a": after}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[Optional[str], str]:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return data["c"], data["a"]
+    except (binascii.Error, ValueError, TypeError, KeyError) as e:
+        raise InvalidCursor("Malformed cursor") from e
+
+def page(
+    playbooks: Registry,
+    category: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None
+) -> Tuple[List[str], Optional[str]]:
+    """Return one page of playbook IDs and the cursor for the next page (None on the last page).
+
+    The cursor records the last ID served rather than an offset, and is
+    resolved through the registry's position index, so the cost is the page
+    size regardless of catalog size.
+    """
+    playbook_ids = playbooks.ids(category)
+    start = 0
+    if cursor:
+        cursor_category, after = decode_cursor(cursor)
+        if cursor_category != category:
+            raise InvalidCursor("Cursor was issued for a different category")
+        position = playbooks.position(after, category)
+        if position is None:
+            raise InvalidCursor("Cursor position no longer exists, restart the listing")
+        start = position + 1
+    end = len(playbook_ids) if limit is None else min(start + limit, len(playbook_ids))
+    selected = playbook_ids[start:end]
+    next_cursor = encode_cursor(category, selected[-1]) if selected and end < len(playbook_ids) else None
+    return selected, next_cursor
+
+def category_counts(playbooks: Registry) -> List[Dict[str, Any]]:
+    return [{"name": category, "count": len(ids)} for category, ids in playbooks.categories.items()]
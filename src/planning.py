@@ -0,0 +1,180 @@
+"""Implementation plans for plan_feature, assembled from a phase/task library.
+
+Each phase lists its tasks in the order they are done. A task carries the
+lowest complexity it applies to and, for project-specific work, the project
+types it belongs to, so filtering a phase keeps its order; a phase with no
+tasks at the requested complexity is left out. Plan skeletons depend only
+on the normalized (project type, complexity) pair, so they are built once,
+frozen and served from an LRU cache; a request only adds its feature
+description, and the values it asked for when they were normalized.
+"""
+
+import functools
+from typing import Any, Dict, Mapping
+
+from .records import freeze
+
+SIMPLE, MEDIUM, COMPLEX = range(3)
+COMPLEXITIES = ("simple", "medium", "complex")
+COMPLEXITY_ALIASES = {
+    "low": "simple", "small": "simple", "easy": "simple",
+    "moderate": "medium", "normal": "medium",
+    "high": "complex", "large": "complex", "hard": "complex"
+}
+DEFAULT_COMPLEXITY = "medium"
+
+PROJECT_TYPES = ("web", "api", "mobile", "data", "cli", "library", "other")
+PROJECT_ALIASES = {
+    "frontend": "web", "webapp": "web", "website": "web",
+    "backend": "api", "service": "api", "rest": "api", "graphql": "api",
+    "ios": "mobile", "android": "mobile",
+    "etl": "data", "pipeline": "data", "ml": "data",
+    "sdk": "library", "package": "library"
+}
+# Project types without a task library of their own get the shared phases only
+FALLBACK_PROJECT_TYPE = "other"
+
+# Project types of a task; shared tasks apply to every project type
+ALL = ()
+
+# (phase, ((task, min complexity, project types), ...), ((playbook_id, min complexity), ...)), in order
+PHASES = (
+    ("Requirements Analysis", (
+        ("Define functional requirements", SIMPLE, ALL),
+        ("Identify non-functional requirements", MEDIUM, ALL),
+        ("Map dependencies", MEDIUM, ALL),
+        ("Write acceptance criteria", SIMPLE, ALL),
+        ("Break the feature into an epic and stories", COMPLEX, ALL),
+        ("Review scope and risks with stakeholders", COMPLEX, ALL)
+    ), (("product_owner_story", SIMPLE), ("epic_story_review", MEDIUM), ("product_owner_epic", COMPLEX))),
+    ("Technical Design", (
+        ("Architecture planning", MEDIUM, ALL),
+        ("Data model, sources and lineage", SIMPLE, ("data",)),
+        ("Database schema (if needed)", MEDIUM, ALL),
+        ("API contract (OpenAPI) and versioning", SIMPLE, ("api",)),
+        ("Commands, flags and exit codes", SIMPLE, ("cli",)),
+        ("Public API and semantic-versioning impact", SIMPLE, ("library",)),
+        ("Wireframes and UI states", MEDIUM, ("web",)),
+        ("Offline and sync behaviour", MEDIUM, ("mobile",)),
+        ("Record design decisions", COMPLEX, ALL),
+        ("Security and threat review", COMPLEX, ALL)
+    ), (("documentation", COMPLEX),)),
+    ("Development", (
+        ("Set up development environment", MEDIUM, ALL),
+        ("Put the feature behind a flag for incremental rollout", COMPLEX, ALL),
+        ("Implement core functionality", SIMPLE, ALL),
+        ("Build UI components", SIMPLE, ("web",)),
+        ("Wire up client-side state and API calls", SIMPLE, ("web",)),
+        ("Implement endpoints and input validation", SIMPLE, ("api",)),
+        ("Authentication and rate limiting", MEDIUM, ("api",)),
+        ("Build screens for each platform", SIMPLE, ("mobile",)),
+        ("Handle permissions and device capabilities", MEDIUM, ("mobile",)),
+        ("Build pipeline steps and transformations", SIMPLE, ("data",)),
+        ("Make runs idempotent and restartable", MEDIUM, ("data",)),
+        ("Add error handling", SIMPLE, ALL)
+    ), (("code_review", SIMPLE),)),
+    ("Testing", (
+        ("Unit tests", SIMPLE, ALL),
+        ("Data quality checks", SIMPLE, ("data",)),
+        ("Integration tests", MEDIUM, ALL),
+        ("Contract tests against the API specification", MEDIUM, ("api",)),
+        ("Cross-browser and accessibility checks", MEDIUM, ("web",)),
+        ("End-to-end browser tests", COMPLEX, ("web",)),
+        ("Test on the supported device matrix", MEDIUM, ("mobile",)),
+        ("Test on supported platforms and shells", MEDIUM, ("cli",)),
+        ("Test against supported runtime versions", MEDIUM, ("library",)),
+        ("Performance and load testing", COMPLEX, ALL),
+        ("User acceptance testing", MEDIUM, ALL)
+    ), ()),
+    ("Deployment", (
+        ("Rollback plan", COMPLEX, ALL),
+        ("Staging deployment", MEDIUM, ALL),
+        ("Production deployment", SIMPLE, ALL),
+        ("Backward-compatible rollout for existing clients", COMPLEX, ("api",)),
+        ("App store submission and review", SIMPLE, ("mobile",)),
+        ("Staged rollout and minimum-version policy", COMPLEX, ("mobile",)),
+        ("Publish release packages", SIMPLE, ("cli",)),
+        ("Publish the release with a changelog entry", SIMPLE, ("library",)),
+        ("Invalidate CDN caches for static assets", COMPLEX, ("web",)),
+        ("Backfill historical data", MEDIUM, ("data",)),
+        ("Monitoring setup", MEDIUM, ALL)
+    ), ()),
+    ("Documentation", (
+        ("Update user-facing documentation", SIMPLE, ALL),
+        ("Update architecture and operations docs", COMPLEX, ALL)
+    ), (("documentation", SIMPLE), ("comprehensive_wiki", COMPLEX)))
+)
+
+NEXT_ACTIONS = (
+    ("Create Jira ticket with this plan", SIMPLE),
+    ("Estimate effort and timeline", SIMPLE),
+    ("Assign team members", MEDIUM),
+    ("Break the plan into an epic with stories", COMPLEX),
+    ("Begin requirements gathering", SIMPLE),
+    ("Schedule a design review", COMPLEX)
+)
+
+def normalize_project_type(project_type: str) -> str:
+    key = project_type.strip().lower()
+    key = PROJECT_ALIASES.get(key, key)
+    return key if key in PROJECT_TYPES else FALLBACK_PROJECT_TYPE
+
+def normalize_complexity(complexity: str) -> str:
+    key = complexity.strip().lower()
+    key = COMPLEXITY_ALIASES.get(key, key)
+    return key if key in COMPLEXITIES else DEFAULT_COMPLEXITY
+
+class PlanEngine:
+    """Builds and memoizes plan skeletons; playbook references are limited to the given playbooks"""
+
+    def __init__(self, playbooks: Mapping[str, Mapping[str, Any]]):
+        self.playbooks = playbooks
+        self.skeleton = functools.lru_cache(maxsize=len(PROJECT_TYPES) * len(COMPLEXITIES))(self._build)
+
+    def _build(self, project_type: str, complexity: str) -> Dict[str, Any]:
+        level = COMPLEXITIES.index(complexity)
+        steps = []
+        for phase, tasks, references in PHASES:
+            phase_tasks = [
+                task for task, minimum, project_types in tasks
+                if minimum <= level and (not project_types or project_type in project_types)
+            ]
+            if not phase_tasks:
+                continue
+            step: Dict[str, Any] = {"phase": phase, "tasks": phase_tasks}
+            playbooks = [
+                {"id": playbook_id, "name": self.playbooks[playbook_id]["name"]}
+                for playbook_id, minimum in references
+                if minimum <= level and playbook_id in self.playbooks
+            ]
+            if playbooks:
+                step["playbooks"] = playbooks
+            steps.append(step)
+        return freeze({
+            "project_type": project_type,
+            "complexity": complexity,
+            "implementation_steps": steps,
+            "next_actions": [action for action, minimum in NEXT_ACTIONS if minimum <= level]
+        })
+
+    def warm(self) -> None:
+        """Precompute the skeleton for every project type and complexity"""
+        for project_type in PROJECT_TYPES:
+            for complexity in COMPLEXITIES:
+                self.skeleton(project_type, complexity)
+
+    def plan(self, feature_description: str, project_type: str, complexity: str) -> Dict[str, Any]:
+        normalized_type, normalized_complexity = normalize_project_type(project_type), normalize_complexity(complexity)
+        plan = {"feature": feature_description, **self.skeleton(normalized_type, normalized_complexity)}
+        # Values the plan was not built for are reported rather than replaced silently
+        requested = {
+            field: value
+            for field, value, normalized in (
+                ("project_type", project_type, normalized_type),
+                ("complexity", complexity, normalized_complexity)
+            )
+            if value.strip().lower() != normalized
+        }
+        if requested:
+            plan["requested"] = requested
+        return plan
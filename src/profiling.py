@@ -0,0 +1,297 @@
+"""Opt-in request profiling: per-phase timings and stack dumps for slow MCP calls.
+
+A configurable share of MCP HTTP requests is traced. A trace timestamps each
+request on its way through the server and splits its latency into phases:
+
+- ``parse``: reading the body, JSON-RPC decoding and dispatch to the MCP server,
+  including any wait for admission
+- ``validate``: tool lookup and pydantic validation of the arguments
+- ``handler``: the tool function itself (for resources and prompts, everything
+  inside the MCP server)
+- ``serialize``: building the MCP result, encoding it and handing it back to
+  the HTTP request
+- ``write``: sending the response body, including compression
+
+Phase timings of every traced request go to the metrics. While a traced
+request is running, a sampler thread records the event loop thread's stack
+every few milliseconds. A traced request slower than the threshold is dumped
+to the profile directory: its phases (``.json``), its stack samples in
+collapsed-stack format for flame graph tools (``.folded``) and, if enabled,
+a cProfile of the event loop thread (``.prof``). Only the newest dumps are kept.
+
+Untraced requests pay one random draw. cProfile records everything on the
+event loop thread, so while requests overlap a profile includes some of
+their work too; only one traced request at a time runs under cProfile.
+"""
+
+import asyncio
+import cProfile
+import functools
+import inspect
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Set
+
+from fastmcp.server.middleware import Middleware
+from mcp.server.lowlevel.server import request_ctx
+
+logger = logging.getLogger(__name__)
+
+PHASES = ("parse", "validate", "handler", "serialize", "write")
+# ASGI scope key carrying a request's trace to the MCP handlers
+SCOPE_KEY = "playbook_mcp.trace"
+# Stack depth kept per sample, counted from the innermost frame
+MAX_DEPTH = 128
+UNSAFE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+class Trace:
+    """Timestamps of one traced request, plus the stack samples and cProfile taken while it ran"""
+
+    __slots__ = ("start", "marks", "method", "name", "stacks", "profile")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.marks: Dict[str, float] = {}
+        self.method = self.name = None
+        self.stacks: Counter = Counter()
+        self.profile: Optional[cProfile.Profile] = None
+
+    def mark(self, event: str) -> None:
+        self.marks.setdefault(event, time.perf_counter())
+
+    def phases(self) -> Optional[Dict[str, float]]:
+        """Seconds per phase, or None for a request that never reached an MCP handler"""
+        marks = self.marks
+        if "dispatched" not in marks or "returned" not in marks:
+            return None
+        end = marks.get("end", marks["returned"])
+        handler_start = marks.get("handler_start", marks["dispatched"])
+        handler_end = marks.get("handler_end", marks["returned"])
+        first_byte = marks.get("first_byte", end)
+        return {
+            "parse": marks["dispatched"] - self.start,
+            "validate": handler_start - marks["dispatched"],
+            "handler": handler_end - handler_start,
+            "serialize": first_byte - handler_end,
+            "write": end - first_byte
+        }
+
+def current_trace() -> Optional[Trace]:
+    """Trace of the HTTP request behind the current MCP call, if it is traced"""
+    request = getattr(request_ctx.get(None), "request", None)
+    return None if request is None else request.scope.get(SCOPE_KEY)
+
+class StackSampler(threading.Thread):
+    """Record the event loop thread's stack into every running trace while any trace is running"""
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(name="playbook-stack-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.traces: Set[Trace] = set()
+        self._condition = threading.Condition()
+        self._names: Dict[Any, str] = {}
+
+    def add(self, trace: Trace) -> None:
+        with self._condition:
+            self.traces.add(trace)
+            self._condition.notify()
+
+    def discard(self, trace: Trace) -> None:
+        with self._condition:
+            self.traces.discard(trace)
+
+    def run(self) -> None:
+        while True:
+            with self._condition:
+                while not self.traces:
+                    self._condition.wait()
+                traces = list(self.traces)
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                stack = self._collapse(frame)
+                with self._condition:
+                    for trace in traces:
+                        if trace in self.traces:
+                            trace.stacks[stack] += 1
+            time.sleep(self.interval)
+
+    def _collapse(self, frame: Any) -> str:
+        names = []
+        while frame is not None and len(names) < MAX_DEPTH:
+            code = frame.f_code
+            name = self._names.get(code)
+            if name is None:
+                name = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                self._names[code] = name
+            names.append(name)
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+class Profiler:
+    """Samples requests into traces, records their phases and dumps the slow ones"""
+
+    def __init__(
+        self,
+        directory: str,
+        sample_rate: float,
+        slow_ms: float,
+        max_dumps: int = 200,
+        interval_ms: float = 2.0,
+        use_cprofile: bool = False,
+        metrics: Any = None
+    ):
+        self.directory = Path(directory)
+        self.sample_rate = sample_rate
+        self.slow = slow_ms / 1000
+        self.max_dumps = max_dumps
+        self.interval = interval_ms / 1000
+        self.use_cprofile = use_cprofile
+        self.metrics = metrics
+        self._sampler: Optional[StackSampler] = None
+        self._profiling = False
+        self._sequence = 0
+
+    def begin(self) -> Optional[Trace]:
+        if random.random() >= self.sample_rate:
+            return None
+        trace = Trace()
+        if self._sampler is None:
+            # The first traced request runs on the event loop thread the sampler watches
+            self._sampler = StackSampler(threading.get_ident(), self.interval)
+            self._sampler.start()
+        self._sampler.add(trace)
+        if self.use_cprofile and not self._profiling:
+            self._profiling = True
+            trace.profile = cProfile.Profile()
+            trace.profile.enable()
+        return trace
+
+    def finish(self, trace: Trace) -> None:
+        trace.mark("end")
+        if trace.profile is not None:
+            trace.profile.disable()
+            self._profiling = False
+        self._sampler.discard(trace)
+        phases = trace.phases()
+        if phases is None:
+            return
+        if self.metrics is not None:
+            for phase, seconds in phases.items():
+                self.metrics.record_phase(phase, seconds)
+        total = trace.marks["end"] - trace.start
+        if total >= self.slow:
+            self._sequence += 1
+            call = trace.method if trace.name is None else f"{trace.method}-{trace.name}"
+            name = f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{self._sequence:06d}-{UNSAFE.sub('_', call)}"
+            # Dumps are written off the event loop
+            asyncio.get_running_loop().run_in_executor(None, self._dump, name, trace, phases, total)
+
+    def _dump(self, name: str, trace: Trace, phases: Dict[str, float], total: float) -> None:
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            summary = {
+                "method": trace.method,
+                "name": trace.name,
+                "total_ms": round(total * 1000, 3),
+                "phases_ms": {phase: round(seconds * 1000, 3) for phase, seconds in phases.items()},
+                "stack_samples": sum(trace.stacks.values()),
+                "sample_interval_ms": self.interval * 1000
+            }
+            (self.directory / f"{name}.json").write_text(json.dumps(summary, indent=2))
+            if trace.stacks:
+                folded = "".join(f"{stack} {count}\n" for stack, count in trace.stacks.most_common())
+                (self.directory / f"{name}.folded").write_text(folded)
+            if trace.profile is not None:
+                trace.profile.dump_stats(str(self.directory / f"{name}.prof"))
+            self._rotate()
+        except OSError as e:
+            logger.warning("Could not write profile dump '%s': %s", name, e)
+
+    def _rotate(self) -> None:
+        # Dump names start with their time, so sorting them puts the oldest first
+        dumps = sorted({path.stem for path in self.directory.glob("*.json")})
+        for stale in dumps[:max(len(dumps) - self.max_dumps, 0)]:
+            for suffix in (".json", ".folded", ".prof"):
+                try:
+                    (self.directory / f"{stale}{suffix}").unlink()
+                except FileNotFoundError:
+                    pass
+
+    def instrument(self, function: Callable[..., Any]) -> Callable[..., Any]:
+        """Wrap a tool function so traced calls mark where argument validation ends and the handler returns"""
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def traced(*args: Any, **kwargs: Any) -> Any:
+                trace = current_trace()
+                if trace is None:
+                    return await function(*args, **kwargs)
+                trace.mark("handler_start")
+                try:
+                    return await function(*args, **kwargs)
+                finally:
+                    trace.mark("handler_end")
+        else:
+            @functools.wraps(function)
+            def traced(*args: Any, **kwargs: Any) -> Any:
+                trace = current_trace()
+                if trace is None:
+                    return function(*args, **kwargs)
+                trace.mark("handler_start")
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    trace.mark("handler_end")
+        return traced
+
+class TraceMiddleware:
+    """ASGI middleware that traces a sample of MCP POST requests; install it outermost"""
+
+    def __init__(self, app: Any, profiler: Profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+        trace = self.profiler.begin()
+        if trace is None:
+            await self.app(scope, receive, send)
+            return
+        scope[SCOPE_KEY] = trace
+
+        async def traced_send(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.body":
+                trace.mark("first_byte")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, traced_send)
+        finally:
+            self.profiler.finish(trace)
+
+class CallTraceMiddleware(Middleware):
+    """Mark when a traced request reaches the MCP server and when its result is ready"""
+
+    async def on_request(self, context, call_next):
+        trace = current_trace()
+        if trace is None:
+            return await call_next(context)
+        trace.mark("dispatched")
+        trace.method = context.method
+        message = context.message
+        name = getattr(message, "name", None) or getattr(message, "uri", None)
+        trace.name = None if name is None else str(name)
+        try:
+            return await call_next(context)
+        finally:
+            trace.mark("returned")
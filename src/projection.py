@@ -0,0 +1,162 @@
+"""Partial get_playbook responses resolved against a per-playbook section index."""
+
+import hashlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pydantic_core
+
+SUMMARY_FIELDS = ("id", "hash", "name", "description", "category")
+
+def _escape(token: str) -> str:
+    return token.replace("~", "~0").replace("/", "~1")
+
+def _digest(value: Any) -> str:
+    return hashlib.sha1(pydantic_core.to_json(value)).hexdigest()[:12]
+
+def normalize_pointer(path: str) -> str:
+    """Accept a JSON pointer ('/template/sections/0') or dotted path ('template.sections.0')"""
+    path = path.strip()
+    if not path or path.startswith("/"):
+        return path
+    return "/" + "/".join(_escape(token) for token in path.split("."))
+
+class PlaybookIndex:
+    """Lookup tables over one finished get_playbook payload.
+
+    Every container and leaf is addressable by JSON pointer, and template
+    sections by (case-insensitive) name, so a projection is a handful of
+    dict lookups that hand back references into the payload.
+    """
+
+    __slots__ = ("payload", "pointers", "sections", "section_names", "template_blocks", "_block_digests")
+
+    def __init__(self, payload: Dict[str, Any]):
+        self.payload = payload
+        self.pointers: Dict[str, Any] = {}
+        self._walk(payload, "")
+        template = payload.get("template", {})
+        sections = template.get("sections", []) if isinstance(template, dict) else []
+        self.sections = {
+            section["name"].lower(): section
+            for section in sections
+            if isinstance(section, dict) and isinstance(section.get("name"), str)
+        }
+        self.section_names = [section["name"] for section in self.sections.values()]
+        self.template_blocks = [key for key in template if key != "sections"] if isinstance(template, dict) else []
+        self._block_digests: Optional[Dict[str, str]] = None
+
+    def _walk(self, value: Any, pointer: str) -> None:
+        self.pointers[pointer] = value
+        if isinstance(value, dict):
+            for key, item in value.items():
+                self._walk(item, f"{pointer}/{_escape(str(key))}")
+        elif isinstance(value, (list, tuple)):
+            for position, item in enumerate(value):
+                self._walk(item, f"{pointer}/{position}")
+
+    def block_digests(self) -> Dict[str, str]:
+        """Content digests of the shareable blocks, keyed by JSON pointer.
+
+        Shareable blocks are the structured template blocks, individual
+        sections and the usage instructions: the parts playbooks commonly
+        have in common.
+        """
+        if self._block_digests is None:
+            digests = {}
+            template = self.payload.get("template")
+            if isinstance(template, dict):
+                for key, value in template.items():
+                    if key == "sections" and isinstance(value, (list, tuple)):
+                        for position, section in enumerate(value):
+                            digests[f"/template/sections/{position}"] = _digest(section)
+                    elif isinstance(value, (dict, list, tuple)):
+                        digests[f"/template/{_escape(key)}"] = _digest(value)
+            if "usage_instructions" in self.payload:
+                digests["/usage_instructions"] = _digest(self.payload["usage_instructions"])
+            self._block_digests = digests
+        return self._block_digests
+
+    def summary(self) -> Dict[str, Any]:
+        result = {field: self.payload[field] for field in SUMMARY_FIELDS}
+        result["section_names"] = self.section_names
+        result["template_blocks"] = self.template_blocks
+        return result
+
+    def project(
+        self,
+        sections: Optional[Sequence[str]] = None,
+        fields: Optional[Sequence[str]] = None,
+        summary_only: bool = False
+    ) -> Dict[str, Any]:
+        result = self.summary() if summary_only else {field: self.payload[field] for field in SUMMARY_FIELDS}
+        missing: List[str] = []
+
+        if sections:
+            selected = []
+            for name in sections:
+                section = self.sections.get(name.lower())
+                if section is None:
+                    missing.append(name)
+                else:
+                    selected.append(section)
+            result["sections"] = selected
+
+        if fields:
+            selected_fields = {}
+            for path in fields:
+                pointer = normalize_pointer(path)
+                if pointer in self.pointers:
+                    selected_fields[pointer] = self.pointers[pointer]
+                else:
+                    missing.append(path)
+            result["fields"] = selected_fields
+
+        if missing:
+            result["missing"] = missing
+            if sections:
+                result["available_sections"] = self.section_names
+        return result
+
+def projection_key(
+    sections: Optional[Sequence[str]],
+    fields: Optional[Sequence[str]],
+    summary_only: bool
+) -> Tuple[Tuple[str, ...], Tuple[str, ...], bool]:
+    return (tuple(sections or ()), tuple(fields or ()), summary_only)
+
+def _replace(payload: Dict[str, Any], pointer: str, value: Any) -> Dict[str, Any]:
+    """Return a copy of payload with one value swapped, copying only containers on the path"""
+    tokens = [token.replace("~1", "/").replace("~0", "~") for token in pointer.split("/")[1:]]
+    root = dict(payload)
+    node: Any = root
+    for token in tokens[:-1]:
+        key: Any = int(token) if isinstance(node, list) else token
+        child = node[key]
+        child = list(child) if isinstance(child, (list, tuple)) else dict(child)
+        node[key] = child
+        node = child
+    last: Any = int(tokens[-1]) if isinstance(node, list) else tokens[-1]
+    node[last] = value
+    return root
+
+def dedupe_shared_blocks(indexes: Sequence[PlaybookIndex]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Hoist blocks that appear in more than one payload into a shared table.
+
+    Each repeated block is replaced by ``{"$shared": "<digest>"}`` and its
+    content is returned once, keyed by digest.
+    """
+    counts: Dict[str, int] = {}
+    for index in indexes:
+        for digest in set(index.block_digests().values()):
+            counts[digest] = counts.get(digest, 0) + 1
+
+    shared: Dict[str, Any] = {}
+    payloads = []
+    for index in indexes:
+        payload = index.payload
+        for pointer, digest in index.block_digests().items():
+            if counts[digest] > 1:
+                shared.setdefault(digest, index.pointers[pointer])
+                payload = _replace(payload, pointer, {"$shared": digest})
+        payloads.append(payload)
+    return payloads, shared
@@ -0,0 +1,105 @@
+"""Immutable, interned in-memory representation of playbooks.
+
+Registry bodies are frozen once when they enter a registry: dicts become
+read-only ``FrozenDict`` (still a ``dict`` subclass, so JSON encoders and
+``isinstance(value, dict)`` checks keep working), lists become tuples and
+every string and key is interned, so section names, instruction lines and
+other text repeated across playbooks are stored once. Frozen values can be
+handed to any number of responses without defensive copies.
+"""
+
+import sys
+from typing import Any, Iterator, Mapping, Tuple
+
+METADATA_FIELDS = ("name", "description", "category")
+
+def _readonly(self, *args: Any, **kwargs: Any) -> Any:
+    raise TypeError("FrozenDict is immutable")
+
+class FrozenDict(dict):
+    """A dict that can't be modified after construction"""
+
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __copy__(self) -> "FrozenDict":
+        return self
+
+    def __deepcopy__(self, memo: Any) -> "FrozenDict":
+        return self
+
+    def __reduce__(self) -> Any:
+        return (FrozenDict, (dict(self),))
+
+def freeze(value: Any) -> Any:
+    """Return a frozen, interned equivalent of a JSON-like value; frozen input is returned as is"""
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, FrozenDict):
+        return value
+    if isinstance(value, dict):
+        return FrozenDict((sys.intern(str(key)), freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+def thaw(value: Any) -> Any:
+    """Plain dict/tuple equivalent of a frozen value, for serializers that reject dict subclasses"""
+    if isinstance(value, dict):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return tuple(thaw(item) for item in value)
+    return value
+
+class PlaybookMetadata:
+    """Listing fields of one playbook: a frozen record with interned strings.
+
+    Supports ``record["name"]``, ``keys()`` and ``**record`` so it can stand
+    in for the metadata dict it replaces.
+    """
+
+    __slots__ = METADATA_FIELDS
+
+    def __init__(self, name: str, description: str, category: str):
+        object.__setattr__(self, "name", sys.intern(name))
+        object.__setattr__(self, "description", sys.intern(description))
+        object.__setattr__(self, "category", sys.intern(category))
+
+    @classmethod
+    def from_mapping(cls, playbook: Mapping[str, Any]) -> "PlaybookMetadata":
+        if isinstance(playbook, cls):
+            return playbook
+        return cls(*(playbook[field] for field in METADATA_FIELDS))
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("PlaybookMetadata is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("PlaybookMetadata is immutable")
+
+    def __getitem__(self, field: str) -> str:
+        if field not in METADATA_FIELDS:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def keys(self) -> Tuple[str, ...]:
+        return METADATA_FIELDS
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(METADATA_FIELDS)
+
+    def astuple(self) -> Tuple[str, str, str]:
+        return (self.name, self.description, self.category)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PlaybookMetadata):
+            return NotImplemented
+        return self.astuple() == other.astuple()
+
+    def __hash__(self) -> int:
+        return hash(self.astuple())
+
+    def __repr__(self) -> str:
+        return f"PlaybookMetadata(name={self.name!r}, description={self.description!r}, category={self.category!r})"
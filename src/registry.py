@@ -0,0 +1,140 @@
+import itertools
+import threading
+from functools import cached_property
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Mapping, Optional
+
+from .records import PlaybookMetadata, freeze
+from .versioning import playbook_hash
+
+Loader = Callable[[str], Dict[str, Any]]
+
+# Registries are numbered as they are built, so caches can tell a newer one from an older one
+_generations = itertools.count(1)
+
+def playbook_metadata(playbook: Mapping[str, Any]) -> PlaybookMetadata:
+    """Extract the lightweight listing fields from a full playbook"""
+    return PlaybookMetadata.from_mapping(playbook)
+
+class Registry(Mapping[str, Dict[str, Any]]):
+    """Immutable snapshot of the playbook catalog.
+
+    Listing metadata for every playbook is held eagerly in ``index``; full
+    playbook bodies come from ``loader`` and are parsed on first access.
+    Bodies are frozen (see records.py) as they enter the registry, so they
+    can be shared by every response without copying. A reload never mutates
+    a registry in place, it builds a new one and swaps it in with install().
+    """
+
+    def __init__(
+        self,
+        index: Dict[str, PlaybookMetadata],
+        loader: Optional[Loader] = None,
+        loaded: Optional[Dict[str, Dict[str, Any]]] = None,
+        revisions: Optional[Dict[str, Hashable]] = None,
+        hashes: Optional[Dict[str, str]] = None
+    ):
+        self.index = index
+        self.generation = next(_generations)
+        self._loader = loader
+        self._loaded = {playbook_id: freeze(playbook) for playbook_id, playbook in (loaded or {}).items()}
+        self._revisions = revisions or {}
+        self._hashes = hashes or {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_playbooks(cls, playbooks: Mapping[str, Dict[str, Any]]) -> "Registry":
+        """Build a fully loaded registry from an in-memory playbook mapping"""
+        index = {playbook_id: playbook_metadata(playbook) for playbook_id, playbook in playbooks.items()}
+        hashes = {playbook_id: playbook_hash(playbook) for playbook_id, playbook in playbooks.items()}
+        return cls(index, loaded=playbooks, hashes=hashes)
+
+    def __getitem__(self, playbook_id: str) -> Dict[str, Any]:
+        playbook = self._loaded.get(playbook_id)
+        if playbook is not None:
+            return playbook
+        if playbook_id not in self.index or self._loader is None:
+            raise KeyError(playbook_id)
+        with self._lock:
+            playbook = self._loaded.get(playbook_id)
+            if playbook is None:
+                playbook = freeze(self._loader(playbook_id))
+                self._loaded[playbook_id] = playbook
+        return playbook
+
+    def fetch(self, playbook_id: str) -> Dict[str, Any]:
+        """A playbook's body without keeping it loaded, e.g. for indexing a lazy catalog"""
+        playbook = self._loaded.get(playbook_id)
+        if playbook is not None:
+            return playbook
+        if playbook_id not in self.index or self._loader is None:
+            raise KeyError(playbook_id)
+        return self._loader(playbook_id)
+
+    def __contains__(self, playbook_id: object) -> bool:
+        return playbook_id in self.index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.index)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def is_loaded(self, playbook_id: str) -> bool:
+        return playbook_id in self._loaded
+
+    def loaded_ids(self) -> List[str]:
+        return [playbook_id for playbook_id in self.index if playbook_id in self._loaded]
+
+    @cached_property
+    def categories(self) -> Dict[str, List[str]]:
+        """Category -> playbook IDs, in registry order"""
+        categories: Dict[str, List[str]] = {}
+        for playbook_id, metadata in self.index.items():
+            categories.setdefault(metadata["category"], []).append(playbook_id)
+        return categories
+
+    @cached_property
+    def _all_ids(self) -> List[str]:
+        return list(self.index)
+
+    @cached_property
+    def _positions(self) -> Dict[Optional[str], Dict[str, int]]:
+        positions: Dict[Optional[str], Dict[str, int]] = {None: {pid: i for i, pid in enumerate(self._all_ids)}}
+        for category, playbook_ids in self.categories.items():
+            positions[category] = {pid: i for i, pid in enumerate(playbook_ids)}
+        return positions
+
+    def ids(self, category: Optional[str] = None) -> List[str]:
+        """Playbook IDs in registry order, optionally limited to one category"""
+        if category is None:
+            return self._all_ids
+        return self.categories.get(category, [])
+
+    def position(self, playbook_id: str, category: Optional[str] = None) -> Optional[int]:
+        """Index of a playbook within ids(category), or None if it isn't there"""
+        return self._positions.get(category, {}).get(playbook_id)
+
+    def content_hash(self, playbook_id: str) -> Optional[str]:
+        """Stable content hash of a playbook, computed when the registry was built"""
+        return self._hashes.get(playbook_id)
+
+    def revision(self, playbook_id: str) -> Optional[Hashable]:
+        """Source revision token for a playbook (e.g. file mtime/size), if known"""
+        return self._revisions.get(playbook_id)
+
+_current = Registry({})
+_installed = False
+
+def current() -> Registry:
+    """The registry serving requests right now"""
+    return _current
+
+def is_installed() -> bool:
+    """Whether a registry has been loaded and installed yet"""
+    return _installed
+
+def install(registry: Registry) -> None:
+    """Atomically replace the active registry"""
+    global _current, _installed
+    _current = registry
+    _installed = True
@@ -0,0 +1,157 @@
+"""Playbooks published as MCP resources, with change notifications.
+
+Every playbook in the active registry is listed as ``playbook://<id>`` and
+read through the same response cache as get_playbook. Sessions that list
+resources or subscribe to one are remembered, and when a new registry is
+installed they are sent ``notifications/resources/list_changed`` and
+``notifications/resources/updated`` for what actually changed (by content
+hash), so clients can cache playbooks instead of re-listing every turn.
+
+Notifications need a live session: stdio or stateful HTTP. Stateless HTTP
+sessions end with their request, so those clients keep polling.
+"""
+
+import asyncio
+import logging
+import threading
+import weakref
+from typing import Any, Awaitable, Callable, List, Optional, Set, Tuple
+
+from fastmcp.resources import Resource
+from fastmcp.server.middleware import Middleware
+from pydantic import Field
+
+from . import registry
+from .registry import Registry
+
+logger = logging.getLogger(__name__)
+
+URI_SCHEME = "playbook://"
+URI_TEMPLATE = URI_SCHEME + "{playbook_id}"
+MIME_TYPE = "application/json"
+
+def playbook_uri(playbook_id: str) -> str:
+    return URI_SCHEME + playbook_id
+
+def playbook_id_from_uri(uri: Any) -> Optional[str]:
+    uri = str(uri)
+    return uri[len(URI_SCHEME):] if uri.startswith(URI_SCHEME) else None
+
+# Reads a playbook's resource text by ID, as the playbook:// template does
+PlaybookReader = Callable[[str], Awaitable[str]]
+
+class _ListedPlaybook(Resource):
+    """resources/list entry for one playbook, read through the same path as the URI template"""
+
+    reader: PlaybookReader = Field(exclude=True)
+
+    async def read(self) -> str:
+        return await self.reader(playbook_id_from_uri(self.uri))
+
+def changed_playbooks(old: Registry, new: Registry) -> Tuple[bool, List[str]]:
+    """Whether the resource list changed, and the IDs whose content changed"""
+    list_changed = old.index != new.index
+    updated = [
+        playbook_id for playbook_id in new
+        if playbook_id in old and old.content_hash(playbook_id) != new.content_hash(playbook_id)
+    ]
+    return list_changed, updated
+
+class PlaybookResources(Middleware):
+    """Adds the active registry's playbooks to resources/list and tracks subscribers"""
+
+    def __init__(self, reader: PlaybookReader):
+        self.reader = reader
+        self._listing: Tuple[Optional[Registry], List[Resource]] = (None, [])
+        # session -> (event loop it runs on, subscribed URIs); sessions drop out when they are closed
+        self._sessions: "weakref.WeakKeyDictionary[Any, Tuple[asyncio.AbstractEventLoop, Set[str]]]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def install(self, mcp: Any) -> None:
+        """Register the middleware and the resources/subscribe handlers on a FastMCP server"""
+        mcp.add_middleware(self)
+        server = mcp._mcp_server
+
+        @server.subscribe_resource()
+        async def subscribe(uri: Any) -> None:
+            self._track(server.request_context.session, str(uri))
+
+        @server.unsubscribe_resource()
+        async def unsubscribe(uri: Any) -> None:
+            self._untrack(server.request_context.session, str(uri))
+
+        # The low-level server always advertises subscribe=False
+        get_capabilities = server.get_capabilities
+
+        def capabilities(*args: Any, **kwargs: Any) -> Any:
+            result = get_capabilities(*args, **kwargs)
+            if result.resources is not None:
+                result.resources.subscribe = True
+            return result
+
+        server.get_capabilities = capabilities
+
+    def listing(self, playbooks: Registry) -> List[Resource]:
+        source, resources = self._listing
+        if source is not playbooks:
+            resources = [
+                _ListedPlaybook(
+                    uri=playbook_uri(playbook_id),
+                    name=playbook_id,
+                    title=metadata["name"],
+                    description=metadata["description"],
+                    mime_type=MIME_TYPE,
+                    reader=self.reader
+                )
+                for playbook_id, metadata in playbooks.index.items()
+            ]
+            self._listing = (playbooks, resources)
+        return resources
+
+    def _track(self, session: Any, uri: Optional[str] = None) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._sessions.get(session)
+            if entry is None:
+                entry = (loop, set())
+                self._sessions[session] = entry
+            if uri is not None:
+                entry[1].add(uri)
+
+    def _untrack(self, session: Any, uri: str) -> None:
+        with self._lock:
+            entry = self._sessions.get(session)
+            if entry is not None:
+                entry[1].discard(uri)
+
+    async def on_list_resources(self, context, call_next):
+        resources = await call_next(context)
+        try:
+            self._track(context.fastmcp_context.session)
+        except (AttributeError, LookupError, RuntimeError, ValueError):
+            pass
+        return resources + self.listing(registry.current())
+
+    def notify(self, old: Registry, new: Registry) -> None:
+        """Tell sessions about a registry swap; safe to call from any thread"""
+        list_changed, updated = changed_playbooks(old, new)
+        if not list_changed and not updated:
+            return
+        updated_uris = {playbook_uri(playbook_id) for playbook_id in updated}
+        with self._lock:
+            sessions = [(session, loop, uris & updated_uris) for session, (loop, uris) in self._sessions.items()]
+        for session, loop, uris in sessions:
+            if loop.is_closed() or not (list_changed or uris):
+                continue
+            asyncio.run_coroutine_threadsafe(self._send(session, list_changed, sorted(uris)), loop)
+
+    async def _send(self, session: Any, list_changed: bool, uris: List[str]) -> None:
+        try:
+            if list_changed:
+                await session.send_resource_list_changed()
+            for uri in uris:
+                await session.send_resource_updated(uri)
+        except Exception as e:
+            logger.debug("Dropping session after failed resource notification: %s", e)
+            with self._lock:
+                self._sessions.pop(session, None)
@@ -0,0 +1,345 @@
+"""Inverted-index full-text search over playbook templates, ranked with BM25."""
+
+import heapq
+import itertools
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Any, Callable, Dict, FrozenSet, Hashable, Iterator, List, Mapping, Optional, Tuple
+
+from .registry import Registry
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from if in into is it of on or so that the then this to use with".split()
+)
+
+# Field weights: a hit in the playbook name counts three times a hit in section body text
+NAME_WEIGHT = 3
+DESCRIPTION_WEIGHT = 2
+LABEL_WEIGHT = 2
+TEXT_WEIGHT = 1
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+SNIPPET_CHARS = 160
+MAX_SNIPPETS = 2
+# Passages are only kept for recently returned playbooks, not the whole catalog
+PASSAGE_CACHE_SIZE = 256
+# Terms whose scored, sorted postings are kept per index state
+RANKED_TERMS = 4096
+# Postings walked best first per term before a query falls back to summing them all
+THRESHOLD_DEPTH = 256
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+def iter_passages(playbook: Mapping[str, Any]) -> Iterator[Tuple[str, str]]:
+    """Yield (label, text) pairs for every searchable piece of a playbook.
+
+    Sections and other named blocks are labelled by their ``name``; nested
+    blocks such as ``atlassian_integration`` are labelled by their key path.
+    """
+    def walk(value: Any, label: str) -> Iterator[Tuple[str, str]]:
+        if isinstance(value, str):
+            yield label, value
+        elif isinstance(value, dict):
+            name = value.get("name")
+            if isinstance(name, str):
+                texts = [text for key, item in value.items() if key != "name" for _, text in walk(item, name)]
+                yield name, "\n".join(texts)
+            else:
+                for key, item in value.items():
+                    yield from walk(item, f"{label}.{key}" if label else key)
+        elif isinstance(value, (list, tuple)):
+            if all(isinstance(item, str) for item in value):
+                yield label, "\n".join(value)
+            else:
+                for item in value:
+                    yield from walk(item, label)
+
+    yield "name", playbook.get("name", "")
+    yield "description", playbook.get("description", "")
+    yield from walk(playbook.get("template", {}), "")
+
+def _document_terms(playbook: Mapping[str, Any]) -> Counter:
+    terms: Counter = Counter()
+    for label, text in iter_passages(playbook):
+        if label == "name":
+            weight = NAME_WEIGHT
+        elif label == "description":
+            weight = DESCRIPTION_WEIGHT
+        else:
+            weight = TEXT_WEIGHT
+            for token in tokenize(label):
+                terms[token] += LABEL_WEIGHT
+        for token in tokenize(text):
+            terms[token] += weight
+    return terms
+
+# (label, text, tokens in label and text) for one passage of a playbook
+Passage = Tuple[str, str, FrozenSet[str]]
+
+def _passages(playbook: Mapping[str, Any]) -> Tuple[Passage, ...]:
+    return tuple(
+        (label, text, frozenset(tokenize(label)) | frozenset(tokenize(text)))
+        for label, text in iter_passages(playbook)
+    )
+
+def _snippet(text: str, pattern: "re.Pattern[str]") -> str:
+    match = pattern.search(text)
+    start = max(0, match.start() - SNIPPET_CHARS // 4) if match else 0
+    end = start + SNIPPET_CHARS
+    snippet = " ".join(text[start:end].split())
+    return ("..." if start > 0 else "") + snippet + ("..." if end < len(text) else "")
+
+class _IndexState:
+    """One published version of the index; never modified once searches can see it"""
+
+    __slots__ = ("source", "postings", "lengths", "terms", "revisions", "total_length", "norms", "ranked")
+
+    def __init__(
+        self,
+        source: Optional[Registry],
+        postings: Dict[str, Dict[str, int]],
+        lengths: Dict[str, int],
+        terms: Dict[str, Tuple[str, ...]],
+        revisions: Dict[str, Hashable],
+        total_length: int
+    ):
+        self.source = source
+        self.postings = postings
+        self.lengths = lengths
+        self.terms = terms
+        self.revisions = revisions
+        self.total_length = total_length
+        # BM25 length normalisation per playbook, fixed for the lifetime of this state
+        average = total_length / len(lengths) if lengths else 0.0
+        self.norms = {
+            playbook_id: BM25_K1 * (1 - BM25_B + BM25_B * length / average)
+            for playbook_id, length in lengths.items()
+        }
+        # term -> (playbook ID -> score contribution, the same pairs best first), built on first use
+        self.ranked: Dict[str, Tuple[Dict[str, float], List[Tuple[str, float]]]] = {}
+
+    def ranked_postings(self, term: str) -> Optional[Tuple[Dict[str, float], List[Tuple[str, float]]]]:
+        ranked = self.ranked.get(term)
+        if ranked is None:
+            postings = self.postings.get(term)
+            if not postings:
+                return None
+            count = len(self.lengths)
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            norms = self.norms
+            impacts = {
+                playbook_id: idf * frequency * (BM25_K1 + 1) / (frequency + norms[playbook_id])
+                for playbook_id, frequency in postings.items()
+            }
+            ranked = (impacts, sorted(impacts.items(), key=lambda item: -item[1]))
+            if len(self.ranked) >= RANKED_TERMS:
+                self.ranked.clear()
+            self.ranked[term] = ranked
+        return ranked
+
+class SearchIndex:
+    """BM25 inverted index kept in sync with the active registry.
+
+    sync() only re-indexes playbooks whose revision changed since the last
+    registry it saw, so a catalog reload costs work proportional to the
+    files that changed. It builds a new state next to the published one and
+    swaps it in, so searches never wait for indexing; bodies are read for
+    indexing without being kept loaded in the registry.
+
+    Each term's postings are scored and sorted once per state, and queries
+    walk them best first (Fagin's threshold algorithm), stopping as soon as
+    no unseen playbook can enter the top results.
+    """
+
+    def __init__(self):
+        self._state = _IndexState(None, {}, {}, {}, {}, 0)
+        self._passages: "OrderedDict[Tuple[str, Hashable], Tuple[Passage, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._state.lengths)
+
+    def is_current(self, playbooks: Registry) -> bool:
+        """Whether the index already reflects this registry"""
+        return self._state.source is playbooks
+
+    def _revision(self, playbooks: Registry, playbook_id: str) -> Hashable:
+        revision = playbooks.revision(playbook_id)
+        if revision is None:
+            # In-memory playbooks have no file revision; their content hash identifies the version
+            revision = playbooks.content_hash(playbook_id)
+        return revision if revision is not None else id(playbooks[playbook_id])
+
+    def sync(self, playbooks: Registry) -> None:
+        """Bring the index up to date with a registry, re-indexing only what changed"""
+        with self._write_lock:
+            state = self._state
+            if playbooks is state.source:
+                return
+            if state.source is not None and getattr(playbooks, "generation", 0) < getattr(state.source, "generation", 0):
+                # A newer registry has been indexed already
+                return
+            removed = [playbook_id for playbook_id in state.revisions if playbook_id not in playbooks]
+            changed = []
+            for playbook_id in playbooks:
+                revision = self._revision(playbooks, playbook_id)
+                if state.revisions.get(playbook_id) != revision:
+                    changed.append((playbook_id, revision))
+            if not removed and not changed:
+                self._state = _IndexState(
+                    playbooks, state.postings, state.lengths, state.terms, state.revisions, state.total_length
+                )
+                return
+
+            # Copy on write: only posting lists of touched terms are copied
+            postings = dict(state.postings)
+            copied = set()
+            lengths = dict(state.lengths)
+            terms = dict(state.terms)
+            revisions = dict(state.revisions)
+            total_length = state.total_length
+
+            def postings_for(term: str) -> Dict[str, int]:
+                if term not in copied:
+                    copied.add(term)
+                    postings[term] = dict(postings.get(term, ()))
+                return postings[term]
+
+            for playbook_id in removed + [playbook_id for playbook_id, _ in changed]:
+                for term in terms.pop(playbook_id, ()):
+                    term_postings = postings_for(term)
+                    del term_postings[playbook_id]
+                    if not term_postings:
+                        del postings[term]
+                        copied.discard(term)
+                total_length -= lengths.pop(playbook_id, 0)
+                revisions.pop(playbook_id, None)
+            for playbook_id, revision in changed:
+                document = _document_terms(playbooks.fetch(playbook_id))
+                for term, frequency in document.items():
+                    postings_for(term)[playbook_id] = frequency
+                length = sum(document.values())
+                lengths[playbook_id] = length
+                terms[playbook_id] = tuple(document)
+                revisions[playbook_id] = revision
+                total_length += length
+            self._state = _IndexState(playbooks, postings, lengths, terms, revisions, total_length)
+
+    def export(self) -> Tuple[Any, ...]:
+        """Index state as plain containers, for registry snapshots"""
+        state = self._state
+        return (state.postings, state.lengths, state.terms, state.revisions, state.total_length)
+
+    def restore(self, playbooks: Registry, state: Tuple[Any, ...]) -> None:
+        """Adopt index state exported for ``playbooks`` instead of re-indexing it"""
+        with self._write_lock:
+            self._state = _IndexState(playbooks, *state)
+            with self._lock:
+                self._passages.clear()
+
+    def _cached_passages(self, playbooks: Registry, playbook_id: str) -> Tuple[Passage, ...]:
+        key = (playbook_id, self._revision(playbooks, playbook_id))
+        with self._lock:
+            passages = self._passages.get(key)
+            if passages is not None:
+                self._passages.move_to_end(key)
+                return passages
+        passages = _passages(playbooks.fetch(playbook_id))
+        with self._lock:
+            self._passages[key] = passages
+            if len(self._passages) > PASSAGE_CACHE_SIZE:
+                self._passages.popitem(last=False)
+        return passages
+
+    def _top(self, state: _IndexState, terms: List[str], category: Optional[str], limit: int) -> List[Tuple[str, float]]:
+        lists = [ranked for ranked in map(state.ranked_postings, terms) if ranked is not None]
+        if not lists:
+            return []
+        index = state.source.index
+
+        def wanted(playbook_id: str) -> bool:
+            return category is None or index[playbook_id]["category"] == category
+
+        if len(lists) == 1:
+            # A single term's postings are already in score order
+            return list(itertools.islice((item for item in lists[0][1] if wanted(item[0])), limit))
+
+        top: List[Tuple[float, int, str]] = []
+        seen = set()
+        for depth in range(max(len(ordered) for _, ordered in lists)):
+            if depth == THRESHOLD_DEPTH:
+                # Near-equal scores deep into the lists: summing every posting is cheaper from here
+                return self._accumulate(lists, wanted, limit)
+            threshold = 0.0
+            for _, ordered in lists:
+                if depth >= len(ordered):
+                    continue
+                playbook_id, impact = ordered[depth]
+                threshold += impact
+                if playbook_id in seen:
+                    continue
+                seen.add(playbook_id)
+                if not wanted(playbook_id):
+                    continue
+                score = sum(impacts.get(playbook_id, 0.0) for impacts, _ in lists)
+                # The sequence number keeps earlier-seen playbooks ahead on equal scores
+                entry = (score, -len(seen), playbook_id)
+                if len(top) < limit:
+                    heapq.heappush(top, entry)
+                elif entry > top[0]:
+                    heapq.heapreplace(top, entry)
+            # No playbook not seen yet can score more than the threshold
+            if len(top) == limit and top[0][0] >= threshold:
+                break
+        return [(playbook_id, score) for score, _, playbook_id in sorted(top, reverse=True)]
+
+    @staticmethod
+    def _accumulate(lists: List[Tuple[Dict[str, float], Any]], wanted: Callable[[str], bool], limit: int) -> List[Tuple[str, float]]:
+        scores = dict(lists[0][0])
+        for impacts, _ in lists[1:]:
+            get = scores.get
+            for playbook_id, impact in impacts.items():
+                scores[playbook_id] = get(playbook_id, 0.0) + impact
+        return heapq.nlargest(limit, (item for item in scores.items() if wanted(item[0])), key=lambda item: item[1])
+
+    def search(self, query: str, category: Optional[str] = None, limit: int = 5) -> List[Dict[str, Any]]:
+        """Rank playbooks for a query; results carry the matching section snippets"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        state = self._state
+        playbooks = state.source
+        if not terms or playbooks is None:
+            return []
+        top = self._top(state, terms, category, limit)
+
+        term_set = frozenset(terms)
+        pattern = re.compile(r"\b(?:" + "|".join(map(re.escape, terms)) + ")", re.IGNORECASE)
+        results = []
+        for playbook_id, score in top:
+            metadata = playbooks.index[playbook_id]
+            # Prefer passages covering the most query terms, in document order on ties
+            ranked = sorted(
+                ((len(term_set & tokens), position, label, text)
+                 for position, (label, text, tokens) in enumerate(self._cached_passages(playbooks, playbook_id))
+                 if not term_set.isdisjoint(tokens)),
+                key=lambda item: (-item[0], item[1])
+            )
+            matches = [
+                {"section": label, "snippet": _snippet(text, pattern)}
+                for _, _, label, text in ranked[:MAX_SNIPPETS]
+            ]
+            results.append({
+                "id": playbook_id,
+                "name": metadata["name"],
+                "category": metadata["category"],
+                "score": round(score, 4),
+                "matches": matches
+            })
+        return results
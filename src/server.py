@@ -1,10 +1,40 @@
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
 from fastmcp import FastMCP
-from typing import Dict, Any
+from fastmcp.exceptions import ResourceError
+from mcp.server.lowlevel.server import request_ctx
+from typing import Callable, Dict, Any, Iterable, List, Optional, Tuple
 from pydantic import Field
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response
 from .config import settings
+from .metrics import SHARED_DIR_ENV, Metrics, MetricsMiddleware
+from .cache import ResponseCache
+from . import pagination, registry
+from .registry import Registry
+from .projection import dedupe_shared_blocks
+from .search import SearchIndex
+from .planning import PlanEngine
+from .tenants import OverlayWatcher, TenantViews, load_overlays
+from .resources import MIME_TYPE, URI_TEMPLATE, PlaybookResources
+
+logger = logging.getLogger(__name__)
 
 mcp = FastMCP(settings.server_name)
 
+metrics = Metrics()
+if settings.metrics_enabled:
+    mcp.add_middleware(MetricsMiddleware(metrics, mcp))
+
+    @mcp.custom_route("/metrics", methods=["GET"], include_in_schema=False)
+    async def metrics_endpoint(request: Request) -> Response:
+        return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 mcp.server_info = {
     "name": settings.server_name,
     "version": "2.1.2",
@@ -333,74 +363,23 @@ PLAYBOOKS = {
     }
 }
 
+plan_engine = PlanEngine(PLAYBOOKS)
+
 @mcp.tool()
 def plan_feature(
     feature_description: str = Field(description="Description of the feature to implement"),
-    project_type: str = Field(default="web", description="Type of project (web, api, mobile, etc.)"),
+    project_type: str = Field(default="web", description="Type of project (web, api, mobile, data, cli, library)"),
     complexity: str = Field(default="medium", description="Complexity level (simple, medium, complex)")
 ) -> Dict[str, Any]:
-    """Generate a structured implementation plan with phases, tasks, and next actions for any feature. Returns a breakdown covering requirements, design, development, testing, and deployment."""
-    return {
-        "feature": feature_description,
-        "project_type": project_type,
-        "complexity": complexity,
-        "implementation_steps": [
-            {
-                "phase": "Requirements Analysis",
-                "tasks": [
-                    "Define functional requirements",
-                    "Identify non-functional requirements",
-                    "Map dependencies"
-                ]
-            },
-            {
-                "phase": "Technical Design",
-                "tasks": [
-                    "Architecture planning",
-                    "Database schema (if needed)",
-                    "API design (if applicable)"
-                ]
-            },
-            {
-                "phase": "Development",
-                "tasks": [
-                    "Set up development environment",
-                    "Implement core functionality",
-                    "Add error handling"
-                ]
-            },
-            {
-                "phase": "Testing",
-                "tasks": [
-                    "Unit tests",
-                    "Integration tests",
-                    "User acceptance testing"
-                ]
-            },
-            {
-                "phase": "Deployment",
-                "tasks": [
-                    "Staging deployment",
-                    "Production deployment",
-                    "Monitoring setup"
-                ]
-            }
-        ],
-        "next_actions": [
-            "Create Jira ticket with this plan",
-            "Estimate effort and timeline",
-            "Assign team members",
-            "Begin requirements gathering"
-        ]
-    }
+    """Generate a structured implementation plan with phases, tasks, and next actions for any feature. Phases and tasks are tailored to the project type and complexity, and each phase lists the playbooks that help with it."""
+    return plan_engine.plan(feature_description, project_type, complexity)
 
-@mcp.tool()
-def list_playbooks() -> Dict[str, Any]:
-    """Retrieve all available playbooks with metadata. Returns playbook IDs, names, descriptions, and categories. Use this to discover which playbooks are available before retrieving specific ones."""
+def _listing_payload(playbooks: Registry) -> Dict[str, Any]:
     playbook_list = []
-    for key, playbook in PLAYBOOKS.items():
+    for key, playbook in playbooks.index.items():
         playbook_list.append({
             "id": key,
+            "hash": playbooks.content_hash(key),
             "name": playbook["name"],
             "description": playbook["description"],
             "category": playbook["category"]
@@ -409,23 +388,13 @@ def list_playbooks() -> Dict[str, Any]:
     return {
         "total_playbooks": len(playbook_list),
         "playbooks": playbook_list,
-        "categories": list(set(p["category"] for p in PLAYBOOKS.values()))
+        "categories": list(playbooks.categories)
     }
 
-@mcp.tool()
-def get_playbook(
-    playbook_id: str = Field(description="ID of the playbook to retrieve (e.g., 'product_owner_epic', 'comprehensive_wiki', 'code_review')")
-) -> Dict[str, Any]:
-    """Retrieve complete playbook details including templates, instructions, and integration guidelines. Use this after identifying the needed playbook from list_playbooks. Returns structured content with sections, checklists, and usage instructions."""
-    if playbook_id not in PLAYBOOKS:
-        return {
-            "error": f"Playbook '{playbook_id}' not found",
-            "available_playbooks": list(PLAYBOOKS.keys())
-        }
-    
-    playbook = PLAYBOOKS[playbook_id]
+def _playbook_payload(playbooks: Registry, playbook_id: str, playbook: Dict[str, Any]) -> Dict[str, Any]:
     result = {
         "id": playbook_id,
+        "hash": playbooks.content_hash(playbook_id),
         "name": playbook["name"],
         "description": playbook["description"],
         "category": playbook["category"],
@@ -461,6 +430,176 @@ def get_playbook(
     
     return result
 
+# Responses are static between registry changes, so they are built and JSON-encoded once
+response_cache = ResponseCache(_listing_payload, _playbook_payload)
+tenant_views = TenantViews(response_cache, lambda: ResponseCache(_listing_payload, _playbook_payload), settings.tenant_cache_size)
+
+TENANT_FIELD = Field(default=None, description="Tenant whose playbook overlays apply (defaults to the tenant request header)")
+# Most IDs one get_playbooks call may ask for, so a single call can't make the server build an unbounded response
+MAX_BATCH_IDS = 50
+
+def _tenant_view(tenant: Optional[str], playbook_id: Optional[str] = None) -> Tuple[Registry, ResponseCache]:
+    """Registry and response cache serving a tenant, or the base ones without a tenant"""
+    if not tenant_views.overlays:
+        return registry.current(), response_cache
+    if tenant is None:
+        # The HTTP request behind the current MCP call, if any (None over stdio)
+        request = getattr(request_ctx.get(None), "request", None)
+        if request is not None:
+            tenant = request.headers.get(settings.tenant_header)
+    return tenant_views.resolve(tenant, registry.current(), playbook_id)
+
+async def _load_bodies(requested: Iterable[Tuple[Registry, str]]) -> None:
+    """Read playbook bodies a registry doesn't hold yet on a worker thread, so storage I/O never blocks the event loop"""
+    missing = [(playbooks, playbook_id) for playbooks, playbook_id in requested if playbook_id in playbooks and not playbooks.is_loaded(playbook_id)]
+    if missing:
+        await asyncio.to_thread(lambda: [playbooks[playbook_id] for playbooks, playbook_id in missing])
+
+@mcp.tool()
+async def list_playbooks(
+    category: Optional[str] = Field(default=None, description="Only list playbooks in this category"),
+    limit: Optional[int] = Field(default=None, ge=1, le=500, description="Maximum number of playbooks per page (default: all)"),
+    cursor: Optional[str] = Field(default=None, description="Opaque next_cursor value from a previous page"),
+    tenant: Optional[str] = TENANT_FIELD
+) -> Dict[str, Any]:
+    """Retrieve all available playbooks with metadata. Returns playbook IDs, names, descriptions, and categories. Use this to discover which playbooks are available before retrieving specific ones. Filter by category and page with limit/cursor for large catalogs."""
+    playbooks, cache = _tenant_view(tenant)
+    if category is None and limit is None and cursor is None:
+        return cache.listing(playbooks)
+
+    try:
+        playbook_ids, next_cursor = pagination.page(playbooks, category, limit, cursor)
+    except pagination.InvalidCursor as e:
+        return {"error": str(e)}
+    return {
+        "total_playbooks": len(playbooks.ids(category)),
+        "playbooks": [
+            {"id": playbook_id, "hash": playbooks.content_hash(playbook_id), **playbooks.index[playbook_id]}
+            for playbook_id in playbook_ids
+        ],
+        "categories": list(playbooks.categories),
+        "next_cursor": next_cursor
+    }
+
+@mcp.tool()
+def list_categories(tenant: Optional[str] = TENANT_FIELD) -> Dict[str, Any]:
+    """List playbook categories with the number of playbooks in each. A cheap way to explore a large catalog before listing one category."""
+    playbooks, _ = _tenant_view(tenant)
+    categories = pagination.category_counts(playbooks)
+    return {
+        "total_categories": len(categories),
+        "categories": categories
+    }
+
+@mcp.tool()
+async def get_playbook(
+    playbook_id: str = Field(description="ID of the playbook to retrieve (e.g., 'product_owner_epic', 'comprehensive_wiki', 'code_review')"),
+    sections: Optional[List[str]] = Field(default=None, description="Only return these template sections, by name (e.g., ['Acceptance Criteria'])"),
+    fields: Optional[List[str]] = Field(default=None, description="Only return these parts, as JSON pointers or dotted paths (e.g., '/template/atlassian_integration/instructions')"),
+    summary_only: bool = Field(default=False, description="Return only metadata plus the names of the template's sections and blocks"),
+    if_none_match: Optional[str] = Field(default=None, description="Hash of the copy you already have (from list_playbooks or an earlier get_playbook); returns a not_modified marker if it is still current"),
+    diff: bool = Field(default=False, description="With if_none_match naming an older version, return a JSON Patch from that version instead of the full playbook when the server still knows it"),
+    tenant: Optional[str] = TENANT_FIELD
+) -> Dict[str, Any]:
+    """Retrieve complete playbook details including templates, instructions, and integration guidelines. Use this after identifying the needed playbook from list_playbooks. Returns structured content with sections, checklists, and usage instructions. Pass sections, fields or summary_only to get just the parts you need. Pass if_none_match with a cached copy's hash to skip re-sending an unchanged playbook. Pass tenant to get a team's customized version."""
+    playbooks, cache = _tenant_view(tenant, playbook_id)
+    await _load_bodies([(playbooks, playbook_id)])
+    if if_none_match and playbook_id in playbooks:
+        if if_none_match == playbooks.content_hash(playbook_id):
+            return cache.not_modified(playbooks, playbook_id)
+        if diff and not (sections or fields or summary_only):
+            patch = cache.diff(playbooks, playbook_id, if_none_match)
+            if patch is not None:
+                return patch
+
+    if sections or fields or summary_only:
+        result = cache.projection(playbooks, playbook_id, sections, fields, summary_only)
+    else:
+        result = cache.playbook(playbooks, playbook_id)
+    if result is None:
+        return {
+            "error": f"Playbook '{playbook_id}' not found",
+            "available_playbooks": list(playbooks.keys())
+        }
+    
+    return result
+
+@mcp.tool()
+async def get_playbooks(
+    ids: List[str] = Field(max_length=MAX_BATCH_IDS, description=f"IDs of the playbooks to retrieve, at most {MAX_BATCH_IDS} (e.g., ['epic_story_review', 'product_owner_epic', 'product_owner_story'])"),
+    dedupe: bool = Field(default=True, description="Return blocks shared by several playbooks once, under shared_blocks, referenced as {'$shared': key}"),
+    tenant: Optional[str] = TENANT_FIELD
+) -> Dict[str, Any]:
+    """Retrieve several complete playbooks in one call. Use this instead of repeated get_playbook calls when a workflow needs multiple playbooks. Unknown IDs are reported under errors without failing the rest of the batch. Ask for at most 50 IDs per call."""
+    views = {playbook_id: _tenant_view(tenant, playbook_id) for playbook_id in dict.fromkeys(ids)}
+    await _load_bodies((playbooks, playbook_id) for playbook_id, (playbooks, _) in views.items())
+    indexes = []
+    errors = {}
+    for playbook_id, (playbooks, cache) in views.items():
+        index = cache.index(playbooks, playbook_id)
+        if index is None:
+            errors[playbook_id] = f"Playbook '{playbook_id}' not found"
+        else:
+            indexes.append(index)
+
+    if dedupe and len(indexes) > 1:
+        payloads, shared = dedupe_shared_blocks(indexes)
+    else:
+        payloads, shared = [index.payload for index in indexes], {}
+
+    result: Dict[str, Any] = {
+        "total_playbooks": len(payloads),
+        "playbooks": payloads
+    }
+    if shared:
+        result["shared_blocks"] = shared
+    if errors:
+        result["errors"] = errors
+    return result
+
+async def _playbook_text(playbook_id: str) -> str:
+    playbooks = registry.current()
+    await _load_bodies([(playbooks, playbook_id)])
+    result = response_cache.playbook(playbooks, playbook_id)
+    if result is None:
+        raise ResourceError(f"Playbook '{playbook_id}' not found")
+    return result.content[0].text
+
+playbook_resources = PlaybookResources(_playbook_text)
+playbook_resources.install(mcp)
+
+@mcp.resource(URI_TEMPLATE, name="playbook", mime_type=MIME_TYPE)
+async def read_playbook(playbook_id: str) -> str:
+    """A complete playbook, identical to the get_playbook response. Listed per playbook under resources/list; subscribe to be notified when it changes."""
+    return await _playbook_text(playbook_id)
+
+search_index = SearchIndex()
+
+@mcp.tool()
+async def search_playbooks(
+    query: str = Field(description="Words to search for in playbook names, descriptions, sections and instructions (e.g., 'acceptance criteria')"),
+    category: Optional[str] = Field(default=None, description="Only return playbooks in this category"),
+    limit: int = Field(default=5, ge=1, le=50, description="Maximum number of results")
+) -> Dict[str, Any]:
+    """Full-text search across all playbook templates. Returns the best-matching playbooks ranked by relevance, with snippets of the matching sections. Use this to find the right playbook without retrieving every template."""
+    if playbook_store is not None:
+        results = await asyncio.to_thread(playbook_store.search, query, category, limit)
+    else:
+        playbooks = registry.current()
+        if not search_index.is_current(playbooks):
+            # Only until the startup build finishes; reloads are indexed before they go live
+            await asyncio.to_thread(search_index.sync, playbooks)
+        if settings.playbook_dir:
+            # Snippets may have to read catalog files
+            results = await asyncio.to_thread(search_index.search, query, category, limit)
+        else:
+            results = search_index.search(query, category, limit)
+    return {
+        "query": query,
+        "total_results": len(results),
+        "results": results
+    }
+
 @mcp.prompt()
 def playbook_guide() -> str:
     """Comprehensive guide for using playbook tools to write epics, stories, documentation, and code reviews."""
@@ -469,7 +608,9 @@ def playbook_guide() -> str:
 ## Core Workflow
 
 ### 1. Initialization
-On any playbook request, execute list_playbooks() to load available playbooks.
+Load the available playbooks once per session, not on every request:
+- If your client supports MCP resources, list the playbook:// resources and subscribe to the ones you use; re-list only after a resources list_changed notification
+- Otherwise call list_playbooks() once and reuse the result
 
 ### 2. Intent-Driven Retrieval
 - Interpret user intent (e.g., "writing an epic")
@@ -501,5 +642,187 @@ On any playbook request, execute list_playbooks() to load available playbooks.
 - **Documentation**: For official docs, prioritize 'ref tools' or 'context7' MCPs, fallback to 'fetch' if needed
 - **Code Issues**: Use displayFindings tool for code review results"""
 
+# Playbook storage backend; without one, playbooks come from PLAYBOOKS and PLAYBOOK_DIR in memory
+playbook_store = None
+if settings.storage_backend == "sqlite":
+    from .storage import SQLiteStore
+    playbook_store = SQLiteStore(settings.sqlite_path, settings.sqlite_pool_size)
+    if settings.playbook_dir:
+        logger.warning(
+            "PLAYBOOK_DIR is ignored with STORAGE_BACKEND=sqlite; import the catalog with "
+            "'python -m src.storage import %s %s'", settings.sqlite_path, settings.playbook_dir
+        )
+
+def load_registry() -> Registry:
+    """Build the registry from the storage backend, the configured catalog directory, or the built-in playbooks"""
+    if playbook_store is not None:
+        # An empty database starts out with the built-in playbooks
+        playbook_store.seed(PLAYBOOKS)
+        return playbook_store.load_registry()
+    if settings.playbook_dir:
+        from .catalog import load_registry as load_catalog
+        return load_catalog(settings.playbook_dir, PLAYBOOKS)
+    if settings.snapshot_path:
+        from .snapshot import load_snapshot
+        snapshot = load_snapshot(settings.snapshot_path)
+        if snapshot is not None:
+            playbooks, search_state = snapshot
+            search_index.restore(playbooks, search_state)
+            return playbooks
+    return Registry.from_playbooks(PLAYBOOKS)
+
+def activate_registry(playbooks: Registry) -> None:
+    """Install a registry, warming its listing first and notifying resource subscribers after"""
+    previous = registry.current()
+    # Catalog bodies stay lazy: only the listing and already-parsed playbooks are warmed
+    response_cache.warm(playbooks, playbooks.loaded_ids())
+    if playbook_store is None and registry.is_installed():
+        # Reloads run on a watcher thread, so the changed playbooks are re-indexed before the registry goes live
+        search_index.sync(playbooks)
+    registry.install(playbooks)
+    tenant_views.prune(playbooks)
+    playbook_resources.notify(previous, playbooks)
+
+def start_catalog_watcher() -> None:
+    """Hot-reload the playbook store or catalog and the tenant overlays in the background, if configured"""
+    if playbook_store is not None and settings.catalog_poll_interval > 0:
+        from .storage import StoreWatcher
+        StoreWatcher(playbook_store, settings.catalog_poll_interval, on_reload=activate_registry).start()
+    elif settings.playbook_dir and settings.catalog_poll_interval > 0:
+        from .catalog import CatalogWatcher
+        CatalogWatcher(settings.playbook_dir, PLAYBOOKS, settings.catalog_poll_interval, on_reload=activate_registry).start()
+    if settings.tenant_dir and settings.catalog_poll_interval > 0:
+        OverlayWatcher(settings.tenant_dir, tenant_views, settings.catalog_poll_interval).start()
+
+# Milliseconds spent in each startup phase of this process, reported by benchmarks/startup.py
+startup_timings: Dict[str, float] = {}
+
+def _timed(phase: str, function: Callable[..., Any], *args: Any) -> Any:
+    start = time.perf_counter()
+    result = function(*args)
+    startup_timings[phase] = round((time.perf_counter() - start) * 1000, 3)
+    return result
+
+_timed("activate_registry", activate_registry, _timed("load_registry", load_registry))
+_timed("plan_skeletons", plan_engine.warm)
+if settings.tenant_dir:
+    _timed("tenant_overlays", lambda: tenant_views.load(load_overlays(settings.tenant_dir)))
+if settings.playbook_dir and playbook_store is None:
+    # Indexing a catalog reads every file; build it in the background instead of delaying startup
+    threading.Thread(target=search_index.sync, args=(registry.current(),), name="playbook-search-index", daemon=True).start()
+elif playbook_store is None:
+    # A no-op when the index was restored from a snapshot
+    _timed("search_index", search_index.sync, registry.current())
+
+_HEALTHY = b'{"status":"ok"}'
+
+@mcp.custom_route("/healthz", methods=["GET", "HEAD"], include_in_schema=False)
+async def healthz(request: Request) -> Response:
+    """Liveness: the worker's event loop is answering"""
+    return Response(_HEALTHY, media_type="application/json")
+
+@mcp.custom_route("/readyz", methods=["GET", "HEAD"], include_in_schema=False)
+async def readyz(request: Request) -> Response:
+    """Readiness: a registry is installed; its listing is cached on the way if it isn't yet"""
+    if not registry.is_installed():
+        return JSONResponse({"status": "starting"}, status_code=503)
+    playbooks = registry.current()
+    response_cache.listing(playbooks)
+    return JSONResponse({"status": "ready", "playbooks": len(playbooks)})
+
+def _admission():
+    from .admission import Admission, AdmissionController, RateLimiter, default_bucket_path
+
+    controller = limiter = None
+    if settings.max_concurrent_calls > 0:
+        controller = AdmissionController(settings.max_concurrent_calls, settings.call_queue_size, settings.call_queue_timeout)
+    if settings.rate_limit_per_second > 0:
+        path = settings.rate_limit_path or default_bucket_path(settings.port)
+        limiter = RateLimiter(settings.rate_limit_per_second, settings.rate_limit_burst, path)
+    # Stateless servers accept any session ID, so only stateful session IDs identify a client
+    return Admission(controller, limiter, settings.rate_limit_key_header, sessions=not settings.use_stateless_http)
+
+def _profiler():
+    from fastmcp.tools import FunctionTool
+    from .profiling import CallTraceMiddleware, Profiler
+
+    profiler = Profiler(
+        settings.profile_dir,
+        settings.profile_sample_rate,
+        settings.profile_slow_ms,
+        settings.profile_max_dumps,
+        settings.profile_interval_ms,
+        settings.profile_cprofile,
+        metrics if settings.metrics_enabled else None
+    )
+    # Tool functions mark where argument validation ends and the handler returns
+    for tool in [value for value in globals().values() if isinstance(value, FunctionTool)]:
+        tool.fn = profiler.instrument(tool.fn)
+    # Admission wraps the request handlers outside all middleware, so its wait counts as parse
+    mcp.add_middleware(CallTraceMiddleware())
+    return profiler
+
+# Whether this process has hooked the HTTP features into the MCP server, and its profiler if profiling
+_http_ready = False
+_http_profiler: Any = None
+_http_setup_lock = threading.Lock()
+
+def _setup_http() -> Any:
+    """Start the watchers and hook admission and profiling into the MCP server, once per process"""
+    global _http_ready, _http_profiler
+    with _http_setup_lock:
+        if not _http_ready:
+            start_catalog_watcher()
+            if settings.max_concurrent_calls > 0 or settings.rate_limit_per_second > 0:
+                _admission().install(mcp)
+            if settings.profile_sample_rate > 0:
+                _http_profiler = _profiler()
+            if settings.metrics_enabled and os.environ.get(SHARED_DIR_ENV):
+                metrics.share(os.environ[SHARED_DIR_ENV])
+            _http_ready = True
+        return _http_profiler
+
+def create_app():
+    """ASGI application for one HTTP worker; the registry is built when this module is imported"""
+    from starlette.middleware import Middleware
+
+    profiler = _setup_http()
+    middleware = []
+    if profiler is not None:
+        from .profiling import TraceMiddleware
+
+        # Outermost, so the write phase includes compression
+        middleware.append(Middleware(TraceMiddleware, profiler=profiler))
+    if settings.compression_enabled:
+        from .compression import CompressionMiddleware
+
+        middleware.append(Middleware(CompressionMiddleware, minimum_size=settings.compression_min_size))
+    return mcp.http_app(transport="http", stateless_http=settings.use_stateless_http, middleware=middleware)
+
+def main() -> None:
+    import uvicorn
+
+    workers = settings.worker_count
+    # Several workers need an import string so each process builds its own app
+    app = "src.server:create_app" if workers > 1 else create_app
+    shared_dir = None
+    if workers > 1 and settings.metrics_enabled:
+        # Private to this user; workers inherit it through the environment
+        shared_dir = tempfile.mkdtemp(prefix="playbook-mcp-metrics-")
+        os.environ[SHARED_DIR_ENV] = shared_dir
+    try:
+        uvicorn.run(
+            app,
+            factory=True,
+            host=settings.host,
+            port=settings.port,
+            workers=workers,
+            lifespan="on",
+            timeout_graceful_shutdown=0
+        )
+    finally:
+        if shared_dir is not None:
+            shutil.rmtree(shared_dir, ignore_errors=True)
+
 if __name__ == "__main__":
-    mcp.run(transport="http", host="0.0.0.0", port=settings.port)
\ No newline at end of file
+    main()
\ No newline at end of file
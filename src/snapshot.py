@@ -0,0 +1,76 @@
+"""Precompiled snapshot of the built-in registry for fast cold starts.
+
+The snapshot holds the listing index, content hashes, playbook bodies and the
+search index in a single ``marshal`` blob, so startup is one file read and one
+``marshal.loads`` instead of hashing and tokenizing every playbook. Build it
+at image build time:
+
+    python -m src.snapshot build registry.snapshot
+
+and point ``SNAPSHOT_PATH`` at it. A snapshot records the size and mtime of
+the source files it was built from and is ignored when any of them changed.
+"""
+
+import hashlib
+import logging
+import marshal
+import sys
+from pathlib import Path
+from typing import Any, Optional, Tuple
+
+from .records import PlaybookMetadata, thaw
+from .registry import Registry
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+# Modules whose code determines the snapshot contents
+SOURCES = ("server.py", "registry.py", "records.py", "search.py", "versioning.py", "snapshot.py")
+
+def fingerprint() -> str:
+    """Identifies the source files a snapshot depends on, from their stat() alone"""
+    package = Path(__file__).resolve().parent
+    parts = [f"{FORMAT_VERSION}:{sys.version_info[:2]}"]
+    for name in SOURCES:
+        stat = (package / name).stat()
+        parts.append(f"{name}:{stat.st_size}:{stat.st_mtime_ns}")
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+def build_snapshot(playbooks: Registry, search_state: Tuple[Any, ...], path: Path) -> int:
+    """Write a snapshot of a fully loaded registry; returns its size in bytes"""
+    # marshal only handles plain containers: records become tuples, frozen dicts plain dicts
+    index = {playbook_id: metadata.astuple() for playbook_id, metadata in playbooks.index.items()}
+    bodies = {playbook_id: thaw(playbooks[playbook_id]) for playbook_id in playbooks}
+    hashes = {playbook_id: playbooks.content_hash(playbook_id) for playbook_id in playbooks}
+    data = marshal.dumps((FORMAT_VERSION, fingerprint(), index, hashes, bodies, search_state))
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_bytes(data)
+    tmp.replace(path)
+    return len(data)
+
+def load_snapshot(path: Path) -> Optional[Tuple[Registry, Tuple[Any, ...]]]:
+    """Load (registry, search index state) from a snapshot, or None if it is missing or stale"""
+    try:
+        version, source, index, hashes, bodies, search_state = marshal.loads(Path(path).read_bytes())
+    except (OSError, EOFError, ValueError, TypeError) as e:
+        logger.warning("Ignoring registry snapshot '%s': %s", path, e)
+        return None
+    if version != FORMAT_VERSION or source != fingerprint():
+        logger.warning("Ignoring registry snapshot '%s': built from different sources, rebuild it", path)
+        return None
+    index = {playbook_id: PlaybookMetadata(*fields) for playbook_id, fields in index.items()}
+    return Registry(index, loaded=bodies, hashes=hashes), search_state
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != "build":
+        sys.exit("usage: python -m src.snapshot build <snapshot_file>")
+
+    from .search import SearchIndex
+    from .server import PLAYBOOKS
+
+    registry = Registry.from_playbooks(PLAYBOOKS)
+    search_index = SearchIndex()
+    search_index.sync(registry)
+    size = build_snapshot(registry, search_index.export(), Path(sys.argv[2]))
+    print(f"Wrote {len(registry)} playbooks to {sys.argv[2]} ({size} bytes)")
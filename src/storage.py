@@ -0,0 +1,304 @@
+"""SQLite playbook store: playbooks, their revision history and full-text indexes.
+
+The store produces an ordinary lazy Registry, so caching, paging, tenants
+and resources work unchanged: listing metadata and content hashes are read
+up front, and a body is fetched by (ID, hash) from the revision table on
+first access. Since revisions are never overwritten, a body fetched after a
+concurrent write still matches the hash the registry was built with.
+
+The database runs in WAL mode with one writer connection and a pool of
+read-only connections, one per concurrently reading thread, so readers
+don't queue behind each other or behind a writer. Search ranks playbooks
+with an FTS5 table weighted like search.py (name, description, body text)
+and takes snippets from a second FTS5 table of sections.
+
+    python -m src.storage import playbooks.db [catalog_dir]
+"""
+
+import json
+import logging
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional
+
+from .records import PlaybookMetadata, thaw
+from .registry import Registry
+from .search import DESCRIPTION_WEIGHT, MAX_SNIPPETS, NAME_WEIGHT, TEXT_WEIGHT, iter_passages, tokenize
+from .versioning import playbook_hash
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS playbooks (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT NOT NULL,
+    category TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS playbooks_position ON playbooks (position);
+CREATE TABLE IF NOT EXISTS playbook_revisions (
+    id TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    body TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (id, hash)
+) WITHOUT ROWID;
+CREATE VIRTUAL TABLE IF NOT EXISTS playbooks_fts USING fts5(
+    category UNINDEXED, name, description, body, tokenize = 'porter unicode61'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS passages_fts USING fts5(
+    section, text, tokenize = 'porter unicode61'
+);
+"""
+
+# passages_fts rowids are the playbook's rowid shifted left, plus the passage number
+PASSAGE_BITS = 12
+SNIPPET_TOKENS = 24
+
+class ConnectionPool:
+    """Read-only connections, each used by one thread at a time; at most ``size`` exist"""
+
+    def __init__(self, path: str, size: int):
+        self.path = path
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        connection.execute("PRAGMA query_only = ON")
+        connection.execute("PRAGMA busy_timeout = 5000")
+        return connection
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        with self._slots:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                connection = self._connect()
+            try:
+                yield connection
+            finally:
+                self._idle.put(connection)
+
+class SQLiteStore:
+    """Playbooks in a local SQLite database"""
+
+    def __init__(self, path: str, pool_size: int = 8):
+        self.path = str(path)
+        self._writer = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._writer.execute("PRAGMA journal_mode = WAL")
+        self._writer.execute("PRAGMA synchronous = NORMAL")
+        self._writer.execute("PRAGMA busy_timeout = 5000")
+        self._writer.executescript(SCHEMA)
+        self._write_lock = threading.Lock()
+        self.pool = ConnectionPool(self.path, pool_size)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._write_lock:
+            self._writer.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._writer
+            except BaseException:
+                self._writer.execute("ROLLBACK")
+                raise
+            self._writer.execute("COMMIT")
+
+    def _put(self, connection: sqlite3.Connection, playbook_id: str, playbook: Mapping[str, Any], now: float) -> bool:
+        digest = playbook_hash(playbook)
+        row = connection.execute("SELECT rowid, hash FROM playbooks WHERE id = ?", (playbook_id,)).fetchone()
+        if row is not None and row[1] == digest:
+            return False
+        metadata = (playbook["name"], playbook["description"], playbook["category"])
+        connection.execute(
+            "INSERT OR IGNORE INTO playbook_revisions (id, hash, body, created_at) VALUES (?, ?, ?, ?)",
+            (playbook_id, digest, json.dumps(thaw(playbook), separators=(",", ":")), now)
+        )
+        if row is None:
+            rowid = connection.execute(
+                "INSERT INTO playbooks (id, name, description, category, hash, position, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, (SELECT coalesce(max(position), -1) + 1 FROM playbooks), ?)",
+                (playbook_id, *metadata, digest, now)
+            ).lastrowid
+        else:
+            rowid = row[0]
+            connection.execute(
+                "UPDATE playbooks SET name = ?, description = ?, category = ?, hash = ?, updated_at = ? WHERE rowid = ?",
+                (*metadata, digest, now, rowid)
+            )
+            self._unindex(connection, rowid)
+        self._index(connection, rowid, playbook)
+        return True
+
+    def _index(self, connection: sqlite3.Connection, rowid: int, playbook: Mapping[str, Any]) -> None:
+        passages = list(iter_passages(playbook))[2:][:(1 << PASSAGE_BITS)]
+        body = "\n".join(f"{label}\n{text}" for label, text in passages)
+        connection.execute(
+            "INSERT INTO playbooks_fts (rowid, category, name, description, body) VALUES (?, ?, ?, ?, ?)",
+            (rowid, playbook["category"], playbook["name"], playbook["description"], body)
+        )
+        connection.executemany(
+            "INSERT INTO passages_fts (rowid, section, text) VALUES (?, ?, ?)",
+            [((rowid << PASSAGE_BITS) + number, label, text) for number, (label, text) in enumerate(passages)]
+        )
+
+    def _unindex(self, connection: sqlite3.Connection, rowid: int) -> None:
+        connection.execute("DELETE FROM playbooks_fts WHERE rowid = ?", (rowid,))
+        connection.execute(
+            "DELETE FROM passages_fts WHERE rowid BETWEEN ? AND ?",
+            (rowid << PASSAGE_BITS, ((rowid + 1) << PASSAGE_BITS) - 1)
+        )
+
+    def put(self, playbook_id: str, playbook: Mapping[str, Any]) -> bool:
+        """Insert or update a playbook; returns False if its content was unchanged"""
+        with self._transaction() as connection:
+            return self._put(connection, playbook_id, playbook, time.time())
+
+    def put_many(self, playbooks: Mapping[str, Mapping[str, Any]]) -> int:
+        """Insert or update several playbooks in one transaction; returns how many changed"""
+        now = time.time()
+        with self._transaction() as connection:
+            return sum(self._put(connection, playbook_id, playbook, now) for playbook_id, playbook in playbooks.items())
+
+    def seed(self, playbooks: Mapping[str, Mapping[str, Any]]) -> int:
+        """Load playbooks into an empty database; a no-op once any playbook exists"""
+        now = time.time()
+        with self._transaction() as connection:
+            if connection.execute("SELECT 1 FROM playbooks LIMIT 1").fetchone():
+                return 0
+            return sum(self._put(connection, playbook_id, playbook, now) for playbook_id, playbook in playbooks.items())
+
+    def delete(self, playbook_id: str) -> bool:
+        """Remove a playbook from the catalog; its revisions are kept"""
+        with self._transaction() as connection:
+            row = connection.execute("SELECT rowid FROM playbooks WHERE id = ?", (playbook_id,)).fetchone()
+            if row is None:
+                return False
+            connection.execute("DELETE FROM playbooks WHERE rowid = ?", (row[0],))
+            self._unindex(connection, row[0])
+            return True
+
+    def version(self, playbook_id: str, digest: str) -> Dict[str, Any]:
+        """One revision of a playbook by content hash"""
+        with self.pool.connection() as connection:
+            row = connection.execute(
+                "SELECT body FROM playbook_revisions WHERE id = ? AND hash = ?", (playbook_id, digest)
+            ).fetchone()
+        if row is None:
+            raise KeyError(playbook_id)
+        return json.loads(row[0])
+
+    def load_registry(self, previous: Optional[Registry] = None) -> Registry:
+        """Registry of the current playbooks; bodies unchanged since ``previous`` are reused"""
+        with self.pool.connection() as connection:
+            rows = connection.execute(
+                "SELECT id, name, description, category, hash FROM playbooks ORDER BY position"
+            ).fetchall()
+        index = {playbook_id: PlaybookMetadata(name, description, category) for playbook_id, name, description, category, _ in rows}
+        hashes = {row[0]: row[4] for row in rows}
+        loaded = {}
+        if previous is not None:
+            loaded = {
+                playbook_id: previous[playbook_id] for playbook_id, digest in hashes.items()
+                if playbook_id in previous and previous.is_loaded(playbook_id) and previous.content_hash(playbook_id) == digest
+            }
+
+        def loader(playbook_id: str) -> Dict[str, Any]:
+            return self.version(playbook_id, hashes[playbook_id])
+
+        return Registry(index, loader=loader, loaded=loaded, hashes=hashes)
+
+    def search(self, query: str, category: Optional[str] = None, limit: int = 5) -> List[Dict[str, Any]]:
+        """Rank playbooks for a query with FTS5 BM25; same result shape as SearchIndex.search"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        # Tokens are [a-z0-9]+, so quoting them is enough to keep FTS5 syntax out of the query
+        match = " OR ".join(f'"{term}"' for term in terms)
+        rank = f"bm25(playbooks_fts, 0, {NAME_WEIGHT}, {DESCRIPTION_WEIGHT}, {TEXT_WEIGHT})"
+        sql = (
+            f"SELECT p.rowid, p.id, p.name, p.category, -{rank} FROM playbooks_fts "
+            "JOIN playbooks p ON p.rowid = playbooks_fts.rowid WHERE playbooks_fts MATCH ?"
+        )
+        parameters: List[Any] = [match]
+        if category is not None:
+            sql += " AND playbooks_fts.category = ?"
+            parameters.append(category)
+        sql += f" ORDER BY {rank} LIMIT ?"
+        parameters.append(limit)
+
+        results = []
+        with self.pool.connection() as connection:
+            for rowid, playbook_id, name, playbook_category, score in connection.execute(sql, parameters).fetchall():
+                snippets = connection.execute(
+                    f"SELECT section, snippet(passages_fts, 1, '', '', '...', {SNIPPET_TOKENS}) FROM passages_fts "
+                    "WHERE passages_fts MATCH ? AND rowid BETWEEN ? AND ? ORDER BY rank LIMIT ?",
+                    (match, rowid << PASSAGE_BITS, ((rowid + 1) << PASSAGE_BITS) - 1, MAX_SNIPPETS)
+                ).fetchall()
+                results.append({
+                    "id": playbook_id,
+                    "name": name,
+                    "category": playbook_category,
+                    # BM25 scores are tiny for terms most playbooks contain; keep significant digits, not decimals
+                    "score": float(f"{score:.4g}"),
+                    "matches": [{"section": section, "snippet": " ".join(snippet.split())} for section, snippet in snippets]
+                })
+        return results
+
+    def data_version(self, connection: sqlite3.Connection) -> int:
+        return connection.execute("PRAGMA data_version").fetchone()[0]
+
+class StoreWatcher(threading.Thread):
+    """Poll the database for commits by other connections and swap in a rebuilt registry"""
+
+    def __init__(self, store: SQLiteStore, interval: float = 2.0, on_reload: Optional[Callable[[Registry], None]] = None):
+        super().__init__(name="playbook-store-watcher", daemon=True)
+        self.store = store
+        self.interval = interval
+        self.on_reload = on_reload
+        self._stop_event = threading.Event()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def run(self) -> None:
+        from .registry import current, install
+
+        # PRAGMA data_version is per connection, so the watcher keeps its own
+        connection = sqlite3.connect(self.store.path, check_same_thread=False, isolation_level=None)
+        last = self.store.data_version(connection)
+        while not self._stop_event.wait(self.interval):
+            try:
+                version = self.store.data_version(connection)
+                if version == last:
+                    continue
+                registry = self.store.load_registry(previous=current())
+            except sqlite3.Error as e:
+                logger.error("Playbook store reload failed: %s", e)
+                continue
+            last = version
+            (self.on_reload or install)(registry)
+            logger.info("Reloaded playbook store %s (%d playbooks)", self.store.path, len(registry))
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (3, 4) or sys.argv[1] != "import":
+        sys.exit("usage: python -m src.storage import <database> [catalog_dir]")
+
+    if len(sys.argv) == 4:
+        from .catalog import load_registry as load_catalog
+
+        source: Mapping[str, Any] = load_catalog(Path(sys.argv[3]))
+    else:
+        from .server import PLAYBOOKS as source
+
+    changed = SQLiteStore(sys.argv[2]).put_many({playbook_id: source[playbook_id] for playbook_id in source})
+    print(f"Imported {len(source)} playbooks into {sys.argv[2]} ({changed} new or changed)")
@@ -0,0 +1,228 @@
+"""Per-tenant playbook overlays served as cached, copy-on-write views.
+
+A tenant directory holds one overlay file per tenant (``<tenant>.json``,
+``.yaml`` or ``.yml``) mapping playbook IDs to the changes that tenant wants:
+
+    {"code_review": {"template": {"atlassian_integration": {"instructions": {"$append": ["Link the PR"]}}}}}
+
+Changes use JSON Merge Patch semantics (RFC 7386: objects merge, ``null``
+deletes a key, anything else replaces), extended with ``{"$append": [...]}``
+to add items to a list instead of replacing it. Only the differences are
+stored; a tenant's view of the registry shares every untouched playbook, and
+every untouched subtree of a changed one, with the base registry.
+
+Views are rebuilt when the base registry or the tenant's overlay changes.
+Merged playbooks are carried over from the previous view when neither their
+base version nor their overlay changed, and each tenant keeps its own
+response cache; the least recently used tenants are evicted past a limit.
+"""
+
+import logging
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from .catalog import CatalogError, read_document, scan_files
+from .records import METADATA_FIELDS, PlaybookMetadata, freeze
+from .registry import Registry
+from .versioning import content_hash, playbook_hash
+
+logger = logging.getLogger(__name__)
+
+APPEND = "$append"
+TENANT_NAME = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+def apply_overlay(base: Any, patch: Any) -> Any:
+    """Merge an overlay into a frozen value, sharing every subtree the overlay doesn't touch"""
+    if isinstance(patch, Mapping):
+        if set(patch) == {APPEND}:
+            items = patch[APPEND] if isinstance(patch[APPEND], (list, tuple)) else (patch[APPEND],)
+            return (base if isinstance(base, tuple) else ()) + freeze(tuple(items))
+        merged = dict(base) if isinstance(base, Mapping) else {}
+        for key, value in patch.items():
+            if value is None:
+                merged.pop(key, None)
+            else:
+                merged[key] = apply_overlay(merged.get(key), value)
+        return freeze(merged)
+    return freeze(patch)
+
+class TenantOverlay:
+    """One tenant's overlays, with a hash per overlaid playbook"""
+
+    def __init__(self, tenant: str, patches: Mapping[str, Mapping[str, Any]]):
+        self.tenant = tenant
+        self.patches = freeze(dict(patches))
+        self.hashes = {playbook_id: playbook_hash(patch) for playbook_id, patch in self.patches.items()}
+
+def _validate(path: Path, document: Any) -> Dict[str, Mapping[str, Any]]:
+    if document is None:
+        return {}
+    if not isinstance(document, dict) or not all(isinstance(patch, dict) for patch in document.values()):
+        raise CatalogError(f"Overlay file '{path}' must map playbook IDs to objects")
+    for playbook_id, patch in document.items():
+        # Listing metadata can be replaced but not removed or turned into another type
+        invalid = [field for field in METADATA_FIELDS if field in patch and not isinstance(patch[field], str)]
+        if invalid:
+            raise CatalogError(f"Overlay file '{path}': '{playbook_id}' must set {', '.join(invalid)} to a string")
+    return document
+
+def load_overlays(directory: Path) -> Dict[str, TenantOverlay]:
+    """Read every tenant overlay file in a directory; invalid files are skipped with a warning"""
+    overlays = {}
+    for tenant, (path, _, _) in scan_files(Path(directory)).items():
+        if not TENANT_NAME.match(tenant):
+            logger.warning("Skipping overlay file '%s': invalid tenant name", path)
+            continue
+        try:
+            document, _ = read_document(Path(path))
+            overlays[tenant] = TenantOverlay(tenant, _validate(Path(path), document))
+        except CatalogError as e:
+            logger.warning("Skipping overlay for tenant '%s': %s", tenant, e)
+    return overlays
+
+class TenantView(Registry):
+    """A tenant's registry: the base registry with that tenant's overlays applied on access"""
+
+    def __init__(self, base: Registry, overlay: TenantOverlay, previous: Optional["TenantView"] = None):
+        self.base = base
+        self.overlay = overlay
+        self.overlaid = frozenset(playbook_id for playbook_id in overlay.patches if playbook_id in base)
+        # A merged playbook's hash covers its base version and its overlay
+        hashes = {
+            playbook_id: content_hash(f"{base.content_hash(playbook_id)}:{overlay.hashes[playbook_id]}".encode())
+            for playbook_id in self.overlaid
+        }
+        index = base.index
+        renamed = [playbook_id for playbook_id in self.overlaid if not overlay.patches[playbook_id].keys().isdisjoint(METADATA_FIELDS)]
+        if renamed:
+            index = dict(index)
+            for playbook_id in renamed:
+                fields = {**index[playbook_id], **overlay.patches[playbook_id]}
+                index[playbook_id] = PlaybookMetadata.from_mapping(fields)
+        # Merged bodies whose inputs are unchanged carry over from the previous view
+        loaded = {}
+        if previous is not None:
+            loaded = {
+                playbook_id: previous[playbook_id] for playbook_id, digest in hashes.items()
+                if previous.is_loaded(playbook_id) and previous.content_hash(playbook_id) == digest
+            }
+        super().__init__(index, loader=self._merge, loaded=loaded, hashes=hashes)
+        if index is base.index:
+            # Same listing as the base: share its category and position indexes
+            for name in ("categories", "_all_ids", "_positions"):
+                self.__dict__[name] = getattr(base, name)
+
+    def _merge(self, playbook_id: str) -> Dict[str, Any]:
+        return apply_overlay(self.base[playbook_id], self.overlay.patches[playbook_id])
+
+    def __getitem__(self, playbook_id: str) -> Dict[str, Any]:
+        if playbook_id in self.overlaid:
+            return super().__getitem__(playbook_id)
+        return self.base[playbook_id]
+
+    def fetch(self, playbook_id: str) -> Dict[str, Any]:
+        if playbook_id in self.overlaid:
+            return super().fetch(playbook_id)
+        return self.base.fetch(playbook_id)
+
+    def is_loaded(self, playbook_id: str) -> bool:
+        if playbook_id in self.overlaid:
+            return super().is_loaded(playbook_id)
+        return self.base.is_loaded(playbook_id)
+
+    def loaded_ids(self) -> List[str]:
+        return [playbook_id for playbook_id in self.index if self.is_loaded(playbook_id)]
+
+    def content_hash(self, playbook_id: str) -> Optional[str]:
+        if playbook_id in self.overlaid:
+            return super().content_hash(playbook_id)
+        return self.base.content_hash(playbook_id)
+
+    def revision(self, playbook_id: str) -> Optional[Any]:
+        return self.base.revision(playbook_id)
+
+class TenantViews:
+    """Resolves a tenant to the registry and response cache that serve it.
+
+    Requests without a tenant, for a tenant without overlays, or for a
+    playbook the tenant doesn't change are served from the base registry and
+    cache. Views and their caches are kept for the ``maxsize`` most recently
+    used tenants.
+    """
+
+    def __init__(self, base_cache: Any, make_cache: Callable[[], Any], maxsize: int = 64):
+        self.base_cache = base_cache
+        self.make_cache = make_cache
+        self.maxsize = maxsize
+        self.overlays: Dict[str, TenantOverlay] = {}
+        self._views: "OrderedDict[str, Tuple[TenantView, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, overlays: Dict[str, TenantOverlay]) -> None:
+        """Swap in a new set of overlays; views of removed tenants are dropped, changed ones rebuilt on next use"""
+        with self._lock:
+            for tenant, overlay in overlays.items():
+                # Unchanged overlays keep their identity, and so their current view
+                previous = self.overlays.get(tenant)
+                if previous is not None and previous.hashes == overlay.hashes:
+                    overlays[tenant] = previous
+            for tenant in list(self._views):
+                if tenant not in overlays:
+                    del self._views[tenant]
+            self.overlays = overlays
+
+    def prune(self, base: Registry) -> None:
+        """Free the cached responses of views built on an older base registry; the views are rebuilt on next use"""
+        with self._lock:
+            for tenant, (view, cache) in list(self._views.items()):
+                if view.base is not base:
+                    cache.invalidate()
+
+    def resolve(self, tenant: Optional[str], base: Registry, playbook_id: Optional[str] = None) -> Tuple[Registry, Any]:
+        overlay = self.overlays.get(tenant) if tenant else None
+        if overlay is None or (playbook_id is not None and playbook_id not in overlay.patches):
+            return base, self.base_cache
+        with self._lock:
+            entry = self._views.get(tenant)
+            if entry is not None and entry[0].base is base and entry[0].overlay is overlay:
+                self._views.move_to_end(tenant)
+                return entry
+            previous, cache = entry if entry is not None else (None, self.make_cache())
+            entry = (TenantView(base, overlay, previous), cache)
+            self._views[tenant] = entry
+            self._views.move_to_end(tenant)
+            if len(self._views) > self.maxsize:
+                self._views.popitem(last=False)
+        return entry
+
+class OverlayWatcher(threading.Thread):
+    """Poll the tenant directory and reload overlays when files change"""
+
+    def __init__(self, directory: Path, views: TenantViews, interval: float = 2.0):
+        super().__init__(name="playbook-overlay-watcher", daemon=True)
+        self.directory = Path(directory)
+        self.views = views
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def run(self) -> None:
+        last = self._snapshot()
+        while not self._stop_event.wait(self.interval):
+            snapshot = self._snapshot()
+            if snapshot == last or snapshot is None:
+                continue
+            last = snapshot
+            self.views.load(load_overlays(self.directory))
+            logger.info("Reloaded tenant overlays from %s (%d tenants)", self.directory, len(self.views.overlays))
+
+    def _snapshot(self) -> Optional[Dict[str, Any]]:
+        try:
+            return scan_files(self.directory)
+        except OSError:
+            return None
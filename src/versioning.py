@@ -0,0 +1,62 @@
+"""Content hashes and structural diffs between playbook versions."""
+
+import hashlib
+import json
+from typing import Any, Dict, List
+
+HASH_LENGTH = 16
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+def playbook_hash(playbook: Any) -> str:
+    """Stable hash of an in-memory playbook, independent of key order"""
+    canonical = json.dumps(playbook, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return content_hash(canonical.encode())
+
+def _pointer_token(key: Any) -> str:
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+def _kind(value: Any) -> Any:
+    # Frozen playbooks use dict subclasses and tuples; compare by JSON kind, not Python type
+    if isinstance(value, dict):
+        return dict
+    if isinstance(value, (list, tuple)):
+        return list
+    return type(value)
+
+def json_diff(old: Any, new: Any, path: str = "") -> List[Dict[str, Any]]:
+    """JSON Patch (RFC 6902) operations turning ``old`` into ``new``.
+
+    Dicts are compared key by key and lists position by position, which
+    keeps patches small for the usual edits to playbooks: changed text,
+    appended instructions, added or removed blocks.
+    """
+    if _kind(old) is not _kind(new):
+        return [{"op": "replace", "path": path, "value": new}]
+    if isinstance(old, dict):
+        ops = []
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": f"{path}/{_pointer_token(key)}"})
+        for key, value in new.items():
+            child = f"{path}/{_pointer_token(key)}"
+            if key not in old:
+                ops.append({"op": "add", "path": child, "value": value})
+            else:
+                ops.extend(json_diff(old[key], value, child))
+        return ops
+    if isinstance(old, (list, tuple)):
+        ops = []
+        common = min(len(old), len(new))
+        for position in range(common):
+            ops.extend(json_diff(old[position], new[position], f"{path}/{position}"))
+        for position in range(common, len(new)):
+            ops.append({"op": "add", "path": f"{path}/-", "value": new[position]})
+        # Remove from the end so earlier indexes stay valid
+        for position in range(len(old) - 1, common - 1, -1):
+            ops.append({"op": "remove", "path": f"{path}/{position}"})
+        return ops
+    if old != new:
+        return [{"op": "replace", "path": path, "value": new}]
+    return []
@@ -0,0 +1,278 @@
+"""Admission control queue limits and the shared token-bucket rate limiter"""
+
+import asyncio
+import os
+from types import SimpleNamespace
+
+import pytest
+from fastmcp.server.auth import AccessToken
+from mcp.server.auth.middleware.auth_context import auth_context_var
+from mcp.server.auth.middleware.bearer_auth import AuthenticatedUser
+from mcp.server.lowlevel.server import request_ctx
+from mcp.shared.exceptions import McpError
+from starlette.requests import Request
+
+from src import admission
+from src.admission import OVERLOADED, RATE_LIMITED, Admission, AdmissionController, RateLimiter, client_key, default_bucket_path
+
+class TestAdmissionController:
+    """Concurrency limit with a bounded FIFO wait queue"""
+
+    def test_admits_up_to_the_limit_without_waiting(self):
+        async def scenario():
+            controller = AdmissionController(2, 0, 0.01)
+            await controller.acquire()
+            await controller.acquire()
+            assert controller.active == 2
+            with pytest.raises(McpError) as error:
+                await controller.acquire()
+            assert error.value.error.code == OVERLOADED
+            assert error.value.error.data == {"retry_after": 0.01}
+
+        asyncio.run(scenario())
+
+    def test_full_queue_sheds_immediately(self):
+        async def scenario():
+            controller = AdmissionController(1, 1, 5.0)
+            await controller.acquire()
+            queued = asyncio.create_task(controller.acquire())
+            await asyncio.sleep(0)
+            with pytest.raises(McpError) as error:
+                await controller.acquire()
+            assert "too many calls" in error.value.error.message
+            controller.release()
+            await queued
+            assert controller.active == 1
+
+        asyncio.run(scenario())
+
+    def test_waiters_are_admitted_in_arrival_order(self):
+        async def scenario():
+            controller = AdmissionController(1, 3, 5.0)
+            await controller.acquire()
+            admitted = []
+
+            async def call(name):
+                await controller.acquire()
+                admitted.append(name)
+
+            tasks = [asyncio.create_task(call(name)) for name in "abc"]
+            await asyncio.sleep(0)
+            for _ in tasks:
+                controller.release()
+                await asyncio.sleep(0)
+            await asyncio.gather(*tasks)
+            assert admitted == ["a", "b", "c"]
+            assert controller.active == 1
+
+        asyncio.run(scenario())
+
+    def test_wait_times_out(self):
+        async def scenario():
+            controller = AdmissionController(1, 4, 0.01)
+            await controller.acquire()
+            with pytest.raises(McpError) as error:
+                await controller.acquire()
+            assert "no capacity within" in error.value.error.message
+            # The timed-out call left the queue and holds no slot
+            controller.release()
+            assert controller.active == 0
+            assert not controller._waiters
+
+        asyncio.run(scenario())
+
+    def test_cancelled_waiter_frees_its_queue_place(self):
+        async def scenario():
+            controller = AdmissionController(1, 1, 5.0)
+            await controller.acquire()
+            queued = asyncio.create_task(controller.acquire())
+            await asyncio.sleep(0)
+            queued.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await queued
+            assert not controller._waiters
+            second = asyncio.create_task(controller.acquire())
+            await asyncio.sleep(0)
+            controller.release()
+            await second
+            assert controller.active == 1
+
+        asyncio.run(scenario())
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(admission.time, "monotonic", clock)
+    return clock
+
+class TestRateLimiter:
+    """Token buckets per client, refilled at the configured rate"""
+
+    def test_burst_then_wait(self, tmp_path, clock):
+        limiter = RateLimiter(2.0, 3, str(tmp_path / "buckets"), slots=64)
+        assert [limiter.take("a") for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert limiter.take("a") == pytest.approx(0.5)
+
+    def test_refills_over_time_up_to_the_burst(self, tmp_path, clock):
+        limiter = RateLimiter(2.0, 3, str(tmp_path / "buckets"), slots=64)
+        for _ in range(3):
+            limiter.take("a")
+        clock.now += 0.5
+        assert limiter.take("a") == 0.0
+        assert limiter.take("a") > 0
+        clock.now += 60
+        assert [limiter.take("a") for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert limiter.take("a") > 0
+
+    def test_a_rejected_call_does_not_spend_a_token(self, tmp_path, clock):
+        limiter = RateLimiter(1.0, 1, str(tmp_path / "buckets"), slots=64)
+        limiter.take("a")
+        assert limiter.take("a") == pytest.approx(1.0)
+        clock.now += 0.5
+        assert limiter.take("a") == pytest.approx(0.5)
+        clock.now += 0.5
+        assert limiter.take("a") == 0.0
+
+    def test_clients_have_separate_buckets(self, tmp_path, clock):
+        limiter = RateLimiter(1.0, 1, str(tmp_path / "buckets"), slots=64)
+        assert limiter.take("a") == 0.0
+        assert limiter.take("b") == 0.0
+        assert limiter.take("a") > 0
+
+    def test_clock_going_backwards_refills(self, tmp_path, clock):
+        limiter = RateLimiter(1.0, 1, str(tmp_path / "buckets"), slots=64)
+        limiter.take("a")
+        clock.now -= 100
+        assert limiter.take("a") == 0.0
+
+    def test_buckets_are_shared_through_the_file(self, tmp_path, clock):
+        path = str(tmp_path / "buckets")
+        first = RateLimiter(1.0, 2, path, slots=64)
+        second = RateLimiter(1.0, 2, path, slots=64)
+        assert first.take("a") == 0.0
+        assert second.take("a") == 0.0
+        assert first.take("a") > 0
+
+    def test_more_clients_than_probed_slots(self, tmp_path, clock):
+        limiter = RateLimiter(1.0, 1, str(tmp_path / "buckets"), slots=4)
+        assert all(limiter.take(f"client-{number}") == 0.0 for number in range(20))
+
+    def test_symlinked_bucket_file_is_refused(self, tmp_path):
+        target = tmp_path / "target"
+        target.write_text("keep")
+        link = tmp_path / "buckets"
+        link.symlink_to(target)
+        with pytest.raises(OSError):
+            RateLimiter(1.0, 1, str(link))
+        assert target.read_text() == "keep"
+
+class TestDefaultBucketPath:
+    """The default bucket file lives in a directory only the server's user can access"""
+
+    def test_uses_the_runtime_directory(self, tmp_path, monkeypatch):
+        runtime = tmp_path / "runtime"
+        runtime.mkdir(mode=0o700)
+        monkeypatch.setenv("XDG_RUNTIME_DIR", str(runtime))
+        assert default_bucket_path(8000) == str(runtime / "playbook-mcp-8000.buckets")
+
+    def test_falls_back_to_a_private_temporary_directory(self, tmp_path, monkeypatch):
+        monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+        monkeypatch.setattr(admission.tempfile, "gettempdir", lambda: str(tmp_path))
+        path = default_bucket_path(8000)
+        directory = os.path.dirname(path)
+        assert directory == str(tmp_path / f"playbook-mcp-{os.getuid()}")
+        assert os.stat(directory).st_mode & 0o777 == 0o700
+
+    def test_shared_directory_is_refused(self, tmp_path, monkeypatch):
+        runtime = tmp_path / "runtime"
+        runtime.mkdir()
+        runtime.chmod(0o777)
+        monkeypatch.setenv("XDG_RUNTIME_DIR", str(runtime))
+        with pytest.raises(PermissionError):
+            default_bucket_path(8000)
+
+class TestClientKey:
+    """Rate-limit keys only trust what the server or a trusted proxy vouches for"""
+
+    @staticmethod
+    def key(headers, key_header=None, sessions=True, client_id=None):
+        scope = {
+            "type": "http",
+            "headers": [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+            "client": ("10.0.0.7", 51234)
+        }
+        request = request_ctx.set(SimpleNamespace(request=Request(scope)))
+        user = None
+        if client_id is not None:
+            user = auth_context_var.set(AuthenticatedUser(AccessToken(token="secret", client_id=client_id, scopes=[])))
+        try:
+            return client_key(key_header, sessions)
+        finally:
+            if user is not None:
+                auth_context_var.reset(user)
+            request_ctx.reset(request)
+
+    def test_unchecked_headers_are_ignored_by_default(self):
+        headers = {"X-API-Key": "rotated-1", "Authorization": "Bearer rotated-2"}
+        assert self.key(headers) == "address:10.0.0.7"
+
+    def test_validated_token_wins(self):
+        headers = {"X-API-Key": "proxy-key", "Mcp-Session-Id": "abc"}
+        assert self.key(headers, "X-API-Key", client_id="agent-1") == "client:agent-1"
+
+    def test_configured_header_is_used(self):
+        assert self.key({"X-API-Key": "proxy-key", "Mcp-Session-Id": "abc"}, "X-API-Key") == "key:proxy-key"
+
+    def test_session_only_when_stateful(self):
+        assert self.key({"Mcp-Session-Id": "abc"}) == "session:abc"
+        assert self.key({"Mcp-Session-Id": "abc"}, sessions=False) == "address:10.0.0.7"
+
+    def test_outside_http(self):
+        assert client_key("X-API-Key") == "local"
+
+class TestAdmission:
+    """Wrapped MCP request handlers raise JSON-RPC errors before dispatch"""
+
+    def test_rate_limited_call_is_not_dispatched(self, tmp_path, clock):
+        calls = []
+
+        async def handler(request):
+            calls.append(request)
+            return "result"
+
+        limiter = RateLimiter(1.0, 1, str(tmp_path / "buckets"), slots=64)
+        admitted = Admission(AdmissionController(4, 4, 1.0), limiter, None).wrap(handler)
+
+        async def scenario():
+            assert await admitted("first") == "result"
+            with pytest.raises(McpError) as error:
+                await admitted("second")
+            return error.value.error
+
+        error = asyncio.run(scenario())
+        assert error.code == RATE_LIMITED
+        assert error.data == {"retry_after": 1.0}
+        assert calls == ["first"]
+
+    def test_slot_is_released_when_the_handler_fails(self):
+        controller = AdmissionController(1, 0, 0.01)
+
+        async def handler(request):
+            raise ValueError(request)
+
+        admitted = Admission(controller, None, None).wrap(handler)
+
+        async def scenario():
+            for _ in range(2):
+                with pytest.raises(ValueError):
+                    await admitted("call")
+
+        asyncio.run(scenario())
+        assert controller.active == 0
@@ -0,0 +1,62 @@
+"""Pre-encoded tool results: encode_result and cached responses served through real tool calls"""
+
+import asyncio
+import json
+
+import pydantic_core
+import pytest
+from fastmcp import Client
+from fastmcp.tools.tool import ToolResult
+
+from src.cache import encode_result
+from src.records import FrozenDict
+
+PAYLOAD = {"id": "code_review", "hash": "abc", "template": {"sections": [{"name": "Summary"}]}}
+
+class TestEncodeResult:
+    def test_matches_the_public_constructor(self):
+        # encode_result skips ToolResult.__init__; it must still build what the constructor builds
+        encoded = encode_result(PAYLOAD)
+        expected = ToolResult(content=json.dumps(PAYLOAD, separators=(",", ":")), structured_content=PAYLOAD)
+        assert vars(encoded).keys() == vars(expected).keys()
+        assert encoded.content == expected.content
+        # Frozen tuples serialize exactly like the constructor's lists
+        assert pydantic_core.to_jsonable_python(encoded.structured_content) == expected.structured_content
+
+    def test_payload_is_frozen(self):
+        encoded = encode_result(PAYLOAD)
+        assert isinstance(encoded.structured_content, FrozenDict)
+        assert json.loads(encoded.content[0].text) == PAYLOAD
+
+@pytest.fixture(scope="module")
+def server():
+    from src import server
+    return server
+
+def call(server, name, arguments):
+    async def scenario():
+        async with Client(server.mcp) as client:
+            return await client.call_tool(name, arguments)
+
+    return asyncio.run(scenario())
+
+class TestToolRoundTrip:
+    """Cached results reach clients as ordinary tool results"""
+
+    def test_get_playbook(self, server):
+        result = call(server, "get_playbook", {"playbook_id": "code_review"})
+        assert not result.is_error
+        assert result.structured_content == json.loads(result.content[0].text)
+        cached = server.response_cache.playbook(server.registry.current(), "code_review")
+        assert result.structured_content == json.loads(cached.content[0].text)
+        assert result.structured_content["id"] == "code_review"
+
+    def test_list_playbooks(self, server):
+        result = call(server, "list_playbooks", {})
+        assert result.structured_content == json.loads(result.content[0].text)
+        assert result.structured_content["total_playbooks"] == len(server.registry.current())
+
+    def test_not_modified_marker(self, server):
+        current = call(server, "get_playbook", {"playbook_id": "code_review"}).structured_content
+        result = call(server, "get_playbook", {"playbook_id": "code_review", "if_none_match": current["hash"]})
+        assert result.structured_content == {"id": "code_review", "hash": current["hash"], "not_modified": True}
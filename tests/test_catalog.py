@@ -0,0 +1,139 @@
+"""On-disk catalog: the metadata manifest, reuse of a previous registry on reload, and file validation"""
+
+import json
+import os
+
+import pytest
+
+from src import catalog
+from src.catalog import MANIFEST_NAME, load_registry, write_manifest
+from src.records import freeze
+
+def playbook(name, steps="Do the thing", category="ops"):
+    return {"name": name, "description": f"{name} checklist", "category": category, "template": {"steps": [steps]}}
+
+def write(directory, playbook_id, document, suffix=".json"):
+    path = directory / f"{playbook_id}{suffix}"
+    path.write_text(json.dumps(document))
+    return path
+
+@pytest.fixture
+def reads(monkeypatch):
+    """Playbook IDs whose files were parsed"""
+    parsed = []
+    read = catalog.read_playbook_file
+
+    def counting(path):
+        parsed.append(path.stem)
+        return read(path)
+
+    monkeypatch.setattr(catalog, "read_playbook_file", counting)
+    return parsed
+
+@pytest.fixture
+def directory(tmp_path):
+    write(tmp_path, "deploy", playbook("Deploy"))
+    write(tmp_path, "wiki", playbook("Wiki", category="docs"))
+    return tmp_path
+
+class TestManifest:
+    def test_startup_reads_no_files_with_a_current_manifest(self, directory, reads):
+        assert write_manifest(directory) == 2
+        reads.clear()
+        playbooks = load_registry(directory)
+        assert reads == []
+        assert playbooks.index["wiki"]["category"] == "docs"
+        assert not playbooks.is_loaded("deploy")
+        assert playbooks["deploy"] == freeze(playbook("Deploy"))
+        assert reads == ["deploy"]
+
+    def test_hashes_match_a_manifest_free_load(self, directory):
+        without = load_registry(directory)
+        write_manifest(directory)
+        with_manifest = load_registry(directory)
+        assert with_manifest.content_hash("deploy") == without.content_hash("deploy")
+
+    def test_changed_files_are_parsed_again(self, directory, reads):
+        write_manifest(directory)
+        write(directory, "deploy", playbook("Deploy v2"))
+        reads.clear()
+        playbooks = load_registry(directory)
+        assert reads == ["deploy"]
+        assert playbooks.index["deploy"]["name"] == "Deploy v2"
+
+    def test_unreadable_manifest_is_ignored(self, directory, reads):
+        (directory / MANIFEST_NAME).write_text("{not json")
+        playbooks = load_registry(directory)
+        assert sorted(reads) == ["deploy", "wiki"]
+        assert sorted(playbooks) == ["deploy", "wiki"]
+
+    def test_manifest_with_non_string_metadata_is_not_trusted(self, directory, reads):
+        write_manifest(directory)
+        manifest = json.loads((directory / MANIFEST_NAME).read_text())
+        manifest["playbooks"]["wiki"]["name"] = 2024
+        (directory / MANIFEST_NAME).write_text(json.dumps(manifest))
+        reads.clear()
+        playbooks = load_registry(directory)
+        assert reads == ["wiki"]
+        assert playbooks.index["wiki"]["name"] == "Wiki"
+
+class TestReload:
+    def test_unchanged_files_reuse_metadata_and_loaded_bodies(self, directory, reads):
+        previous = load_registry(directory)
+        body = previous["wiki"]
+        reads.clear()
+        playbooks = load_registry(directory, previous=previous)
+        assert reads == []
+        assert playbooks.is_loaded("wiki") and playbooks["wiki"] is body
+        assert not playbooks.is_loaded("deploy")
+        assert playbooks.index["deploy"] is previous.index["deploy"]
+        assert playbooks.content_hash("wiki") == previous.content_hash("wiki")
+
+    def test_changed_added_and_removed_files(self, directory, reads):
+        previous = load_registry(directory)
+        previous["deploy"]
+        path = write(directory, "deploy", playbook("Deploy", steps="Canary first"))
+        # Same size and a new mtime still counts as a change
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        write(directory, "rollback", playbook("Rollback"))
+        (directory / "wiki.json").unlink()
+        reads.clear()
+
+        playbooks = load_registry(directory, previous=previous)
+        assert sorted(reads) == ["deploy", "rollback"]
+        assert sorted(playbooks) == ["deploy", "rollback"]
+        assert not playbooks.is_loaded("deploy")
+        assert playbooks["deploy"]["template"]["steps"] == ("Canary first",)
+        assert playbooks.content_hash("deploy") != previous.content_hash("deploy")
+
+    def test_files_override_built_in_playbooks(self, directory):
+        builtin = {"deploy": playbook("Built-in Deploy"), "review": playbook("Review")}
+        playbooks = load_registry(directory, builtin)
+        assert sorted(playbooks) == ["deploy", "review", "wiki"]
+        assert playbooks.index["deploy"]["name"] == "Deploy"
+        assert playbooks.index["review"]["name"] == "Review"
+
+class TestValidation:
+    @pytest.mark.parametrize("document", [
+        ["not", "a", "mapping"],
+        {"name": "No Template", "description": "x", "category": "ops"},
+        {"name": 2024, "description": "x", "category": "ops", "template": {}}
+    ])
+    def test_invalid_files_are_skipped(self, directory, document):
+        write(directory, "broken", document)
+        assert sorted(load_registry(directory)) == ["deploy", "wiki"]
+
+    def test_yaml_files(self, directory):
+        (directory / "release.yaml").write_text(
+            "name: Release\ndescription: Ship it\ncategory: ops\ntemplate:\n  steps: [Tag, Publish]\n"
+        )
+        (directory / "numbers.yml").write_text("name: 2024\ndescription: x\ncategory: ops\ntemplate: {}\n")
+        playbooks = load_registry(directory)
+        assert playbooks["release"]["template"]["steps"] == ("Tag", "Publish")
+        assert "numbers" not in playbooks
+
+    def test_manifest_and_other_files_are_not_playbooks(self, directory):
+        write_manifest(directory)
+        (directory / "notes.txt").write_text("ignored")
+        assert sorted(load_registry(directory)) == ["deploy", "wiki"]
@@ -0,0 +1,141 @@
+"""Accept-Encoding negotiation and the framing of compressed response streams"""
+
+import asyncio
+import gzip
+import io
+
+import pytest
+
+from src.compression import ENCODERS, CompressionMiddleware, SegmentCache, negotiate, zstandard
+
+needs_zstd = pytest.mark.skipif(zstandard is None, reason="zstandard is not installed")
+
+def event(request_id, result):
+    return f'event: message\r\ndata: {{"jsonrpc":"2.0","id":{request_id},"result":{result}}}\r\n\r\n'.encode()
+
+RESULT = '{"content":[{"type":"text","text":"' + "playbook text " * 200 + '"}]}'
+
+def make_app(chunks, headers=None):
+    async def app(scope, receive, send):
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": headers if headers is not None else [(b"content-type", b"text/event-stream")]
+        })
+        for position, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": position < len(chunks) - 1})
+    return app
+
+def respond(middleware, accept_encoding):
+    """Run one request through the middleware; returns the response headers and body"""
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": "/mcp", "headers": [(b"accept-encoding", accept_encoding.encode())]}
+    asyncio.run(middleware(scope, receive, send))
+    headers = {key.decode(): value.decode() for key, value in messages[0]["headers"]}
+    body = b"".join(message.get("body", b"") for message in messages[1:])
+    return headers, body, messages[1:]
+
+def zstd_decompress(body):
+    return zstandard.ZstdDecompressor().stream_reader(io.BytesIO(body), read_across_frames=True).read()
+
+class TestNegotiate:
+    """Choosing the response encoding from Accept-Encoding"""
+
+    def test_highest_q_value_wins(self):
+        assert negotiate("zstd;q=0.1, gzip;q=1") == "gzip"
+        assert negotiate("gzip;q=0.4, zstd;q=0.9") == ("zstd" if zstandard else "gzip")
+
+    @needs_zstd
+    def test_server_preference_breaks_ties(self):
+        assert negotiate("gzip, zstd") == "zstd"
+        assert negotiate("gzip;q=0.5, zstd;q=0.5") == "zstd"
+
+    def test_q_zero_refuses_an_encoding(self):
+        assert negotiate("gzip;q=0") is None
+        assert negotiate("gzip;q=0, zstd;q=0") is None
+        assert negotiate("*, gzip;q=0") == ("zstd" if zstandard else None)
+
+    def test_wildcard_applies_to_unlisted_encodings(self):
+        assert negotiate("*;q=0.3, gzip;q=0.2") == ("zstd" if zstandard else "gzip")
+
+    def test_identity_and_unknown_encodings(self):
+        assert negotiate("") is None
+        assert negotiate("identity") is None
+        assert negotiate("br") is None
+
+    def test_case_spaces_and_bad_q_values(self):
+        assert negotiate(" GZIP ; Q=0.8 ") == "gzip"
+        assert negotiate("gzip;q=abc") is None
+
+class TestStreamFraming:
+    """Independently compressed chunks still form one valid stream"""
+
+    def chunks(self):
+        return [event(1, RESULT), event(2, '{"content":[]}'), event(3, RESULT)]
+
+    def test_gzip_stream_of_segments(self):
+        chunks = self.chunks()
+        headers, body, messages = respond(CompressionMiddleware(make_app(chunks)), "gzip")
+        assert headers["content-encoding"] == "gzip"
+        assert "content-length" not in headers
+        assert "Accept-Encoding" in headers["vary"]
+        # One compressed message per chunk, so SSE events are not held back
+        assert len(messages) == len(chunks)
+        assert gzip.decompress(body) == b"".join(chunks)
+
+    @needs_zstd
+    def test_zstd_stream_of_frames(self):
+        chunks = self.chunks()
+        headers, body, _ = respond(CompressionMiddleware(make_app(chunks)), "zstd")
+        assert headers["content-encoding"] == "zstd"
+        assert zstd_decompress(body) == b"".join(chunks)
+
+    def test_every_encoding_round_trips_a_single_chunk(self):
+        chunk = event(7, RESULT)
+        for encoding in ENCODERS:
+            _, body, _ = respond(CompressionMiddleware(make_app([chunk])), encoding)
+            decoded = gzip.decompress(body) if encoding == "gzip" else zstd_decompress(body)
+            assert decoded == chunk
+
+    def test_small_and_encoded_bodies_pass_through(self):
+        small = [b'{"ok":true}']
+        headers, body, _ = respond(CompressionMiddleware(make_app(small, [(b"content-type", b"application/json")])), "gzip")
+        assert "content-encoding" not in headers
+        assert body == small[0]
+        encoded = [gzip.compress(RESULT.encode())]
+        app = make_app(encoded, [(b"content-type", b"application/json"), (b"content-encoding", b"gzip")])
+        headers, body, _ = respond(CompressionMiddleware(app), "gzip")
+        assert headers["content-encoding"] == "gzip"
+        assert body == encoded[0]
+
+class TestSegmentCache:
+    """Results are cached apart from the per-request JSON-RPC envelope"""
+
+    def test_same_result_under_different_ids_hits(self):
+        cache = SegmentCache()
+        middleware = CompressionMiddleware(make_app([event(1, RESULT)]), cache=cache)
+        respond(middleware, "gzip")
+        _, body, _ = respond(CompressionMiddleware(make_app([event(2, RESULT)]), cache=cache), "gzip")
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert gzip.decompress(body) == event(2, RESULT)
+
+    def test_chunks_without_a_result_are_not_cached(self):
+        cache = SegmentCache()
+        chunk = b'event: message\r\ndata: {"jsonrpc":"2.0","id":1,"error":{"code":-32000}}\r\n\r\n'
+        cache.segment("gzip", chunk)
+        cache.segment("gzip", chunk)
+        assert (cache.hits, cache.misses) == (0, 0)
+
+    def test_least_recently_used_results_are_evicted(self):
+        cache = SegmentCache(maxsize=2)
+        for request_id, result in enumerate(['{"a":1}', '{"b":2}', '{"c":3}']):
+            cache.segment("gzip", event(request_id, result))
+        cache.segment("gzip", event(9, '{"a":1}'))
+        assert (cache.hits, cache.misses) == (0, 4)
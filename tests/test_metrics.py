@@ -0,0 +1,167 @@
+"""Call metrics: counters, histograms, the label cardinality guard and metrics shared between workers"""
+
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastmcp import Client, FastMCP
+
+from src.metrics import LATENCY_BUCKETS, SIZE_BUCKETS, UNKNOWN, Metrics, MetricsMiddleware
+
+def series(text, metric):
+    """{labels: value} for one metric in rendered Prometheus text"""
+    found = {}
+    for line in text.splitlines():
+        if line.startswith(metric + "{"):
+            labels, value = line[len(metric) + 1:].rsplit("} ", 1)
+            found[labels] = float(value)
+    return found
+
+@pytest.fixture
+def server():
+    mcp = FastMCP("metrics-test")
+
+    @mcp.tool
+    def lookup(key: str) -> dict:
+        if key != "known":
+            return {"error": f"{key} not found"}
+        return {"key": key, "text": "x" * 2000}
+
+    @mcp.tool
+    def fail() -> str:
+        raise ValueError("broken")
+
+    @mcp.prompt
+    def greet() -> str:
+        return "hello"
+
+    @mcp.resource("info://server")
+    def info() -> str:
+        return "info"
+
+    metrics = Metrics()
+    mcp.add_middleware(MetricsMiddleware(metrics, mcp))
+    return mcp, metrics
+
+def run(mcp, scenario):
+    async def main():
+        async with Client(mcp) as client:
+            await scenario(client)
+
+    asyncio.run(main())
+
+class TestCounters:
+    def test_counts_calls_and_not_found_errors(self, server):
+        mcp, metrics = server
+
+        async def scenario(client):
+            await client.call_tool("lookup", {"key": "known"})
+            await client.call_tool("lookup", {"key": "missing"})
+            await client.call_tool("lookup", {"key": "other"})
+
+        run(mcp, scenario)
+        text = metrics.render()
+        worker = f'worker="{os.getpid()}"'
+        labels = f'{worker},kind="tool",name="lookup"'
+        assert series(text, "playbook_mcp_calls_total") == {labels: 3}
+        assert series(text, "playbook_mcp_errors_total") == {labels: 2}
+
+    def test_raised_exceptions_count_as_errors(self, server):
+        mcp, metrics = server
+
+        async def scenario(client):
+            await client.call_tool("fail", {}, raise_on_error=False)
+
+        run(mcp, scenario)
+        errors = series(metrics.render(), "playbook_mcp_errors_total")
+        assert list(errors.values()) == [1]
+
+    def test_histogram_buckets_are_cumulative(self):
+        metrics = Metrics()
+        for seconds, size in ((0.0001, 100), (0.003, 5000), (0.003, 5000), (10.0, 2_000_000)):
+            metrics.record("tool", "lookup", seconds, size, False)
+        text = metrics.render()
+        worker = f'worker="{os.getpid()}"'
+
+        latency = series(text, "playbook_mcp_latency_seconds_bucket")
+        assert len(latency) == len(LATENCY_BUCKETS) + 1
+        prefix = f'{worker},kind="tool",name="lookup",le='
+        assert latency[prefix + '"0.0005"'] == 1
+        assert latency[prefix + '"0.0025"'] == 1
+        assert latency[prefix + '"0.005"'] == 3
+        assert latency[prefix + '"2.5"'] == 3
+        assert latency[prefix + '"+Inf"'] == 4
+
+        sizes = series(text, "playbook_mcp_response_bytes_bucket")
+        assert len(sizes) == len(SIZE_BUCKETS) + 1
+        assert sizes[prefix + '"256"'] == 1
+        assert sizes[prefix + '"16384"'] == 3
+        assert sizes[prefix + '"1048576"'] == 3
+        assert sizes[prefix + '"+Inf"'] == 4
+
+        labels = f'{worker},kind="tool",name="lookup"'
+        assert series(text, "playbook_mcp_latency_seconds_count") == {labels: 4}
+        assert series(text, "playbook_mcp_latency_seconds_sum")[labels] == pytest.approx(10.0061)
+        assert series(text, "playbook_mcp_response_bytes_sum")[labels] == 2_010_100
+
+    def test_threads_are_merged(self):
+        metrics = Metrics()
+        with ThreadPoolExecutor(4) as pool:
+            list(pool.map(lambda _: metrics.record("tool", "lookup", 0.001, 10, False), range(100)))
+        assert list(series(metrics.render(), "playbook_mcp_calls_total").values()) == [100]
+
+class TestCardinalityGuard:
+    def test_unregistered_names_share_one_series(self, server):
+        mcp, metrics = server
+
+        async def scenario(client):
+            await client.call_tool("lookup", {"key": "known"})
+            for index in range(5):
+                with pytest.raises(Exception):
+                    await client.call_tool(f"bogus-{index}", {})
+            await client.get_prompt("greet")
+            with pytest.raises(Exception):
+                await client.get_prompt("no-such-prompt")
+            await client.read_resource("info://server")
+            for index in range(3):
+                with pytest.raises(Exception):
+                    await client.read_resource(f"file:///etc/{index}")
+
+        run(mcp, scenario)
+        calls = series(metrics.render(), "playbook_mcp_calls_total")
+        worker = f'worker="{os.getpid()}"'
+        assert calls == {
+            f'{worker},kind="prompt",name="greet"': 1,
+            f'{worker},kind="prompt",name="{UNKNOWN}"': 1,
+            f'{worker},kind="resource",name="info://server"': 1,
+            f'{worker},kind="resource",name="{UNKNOWN}"': 3,
+            f'{worker},kind="tool",name="lookup"': 1,
+            f'{worker},kind="tool",name="{UNKNOWN}"': 5
+        }
+
+class TestSharedMetrics:
+    def test_render_includes_other_workers_snapshots(self, tmp_path):
+        other = Metrics()
+        other.record("tool", "lookup", 0.001, 10, True)
+        snapshot = other.snapshot()
+        # A worker that has exited: its counters stay, its gauges go
+        snapshot["pid"] = 2 ** 22 + 1
+        (tmp_path / f"{snapshot['pid']}.json").write_text(json.dumps(snapshot))
+        (tmp_path / "12345.json").write_text('{"pid": 123')
+
+        metrics = Metrics()
+        metrics.shared_dir = str(tmp_path)
+        metrics.record("tool", "lookup", 0.001, 10, False)
+        metrics.write_snapshot()
+        assert sorted(os.listdir(tmp_path)) == sorted([f"{snapshot['pid']}.json", "12345.json", f"{os.getpid()}.json"])
+
+        text = metrics.render()
+        calls = series(text, "playbook_mcp_calls_total")
+        assert calls == {
+            f'worker="{os.getpid()}",kind="tool",name="lookup"': 1,
+            f'worker="{snapshot["pid"]}",kind="tool",name="lookup"': 1
+        }
+        assert list(series(text, "playbook_mcp_errors_total").values()) == [0, 1]
+        assert list(series(text, "playbook_mcp_uptime_seconds")) == [f'worker="{os.getpid()}"']
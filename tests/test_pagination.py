@@ -0,0 +1,85 @@
+"""Cursor paging through the playbook registry, including across registry swaps"""
+
+import pytest
+
+from src.pagination import InvalidCursor, decode_cursor, encode_cursor, page
+from src.registry import Registry
+
+def make_registry(*entries):
+    """Registry of minimal playbooks from (ID, category) pairs, in order"""
+    return Registry.from_playbooks({
+        playbook_id: {"name": playbook_id.title(), "description": f"About {playbook_id}", "category": category}
+        for playbook_id, category in entries
+    })
+
+def page_all(playbooks, category=None, limit=2):
+    ids, cursor = page(playbooks, category, limit)
+    while cursor:
+        more, cursor = page(playbooks, category, limit, cursor)
+        ids += more
+    return ids
+
+class TestPage:
+    """Paging through one registry"""
+
+    @pytest.fixture
+    def playbooks(self):
+        return make_registry(("a", "dev"), ("b", "docs"), ("c", "dev"), ("d", "dev"), ("e", "docs"))
+
+    def test_pages_cover_the_listing_once(self, playbooks):
+        assert page_all(playbooks) == ["a", "b", "c", "d", "e"]
+
+    def test_last_page_has_no_cursor(self, playbooks):
+        ids, cursor = page(playbooks, limit=5)
+        assert ids == ["a", "b", "c", "d", "e"]
+        assert cursor is None
+
+    def test_category_pages(self, playbooks):
+        assert page_all(playbooks, "dev") == ["a", "c", "d"]
+
+    def test_cursor_for_another_category_is_rejected(self, playbooks):
+        _, cursor = page(playbooks, "dev", 1)
+        with pytest.raises(InvalidCursor):
+            page(playbooks, "docs", 1, cursor)
+
+    def test_malformed_cursor_is_rejected(self, playbooks):
+        with pytest.raises(InvalidCursor):
+            page(playbooks, limit=1, cursor="not a cursor")
+
+    def test_cursor_round_trip(self):
+        assert decode_cursor(encode_cursor("dev", "a")) == ("dev", "a")
+        assert decode_cursor(encode_cursor(None, "b")) == (None, "b")
+
+class TestPageAcrossSwaps:
+    """A cursor issued by one registry, resumed after a reload installed another"""
+
+    def test_resumes_after_the_last_served_id(self):
+        old = make_registry(("a", "dev"), ("b", "dev"), ("c", "dev"), ("d", "dev"))
+        ids, cursor = page(old, limit=2)
+        assert ids == ["a", "b"]
+        # Playbooks added before and after the cursor position, one removed after it
+        new = make_registry(("new1", "dev"), ("a", "dev"), ("b", "dev"), ("d", "dev"), ("new2", "dev"))
+        rest, cursor = page(new, limit=10, cursor=cursor)
+        assert rest == ["d", "new2"]
+        assert cursor is None
+
+    def test_no_duplicates_when_playbooks_are_inserted_before_the_cursor(self):
+        old = make_registry(("a", "dev"), ("b", "dev"), ("c", "dev"))
+        first, cursor = page(old, limit=1)
+        new = make_registry(("x", "dev"), ("y", "dev"), ("a", "dev"), ("b", "dev"), ("c", "dev"))
+        second, _ = page(new, limit=2, cursor=cursor)
+        assert first + second == ["a", "b", "c"]
+
+    def test_removed_cursor_position_is_rejected(self):
+        old = make_registry(("a", "dev"), ("b", "dev"), ("c", "dev"))
+        _, cursor = page(old, limit=2)
+        new = make_registry(("a", "dev"), ("c", "dev"))
+        with pytest.raises(InvalidCursor):
+            page(new, limit=2, cursor=cursor)
+
+    def test_playbook_moved_out_of_the_category_invalidates_its_cursor(self):
+        old = make_registry(("a", "dev"), ("b", "dev"), ("c", "dev"))
+        _, cursor = page(old, "dev", 2)
+        new = make_registry(("a", "dev"), ("b", "docs"), ("c", "dev"))
+        with pytest.raises(InvalidCursor):
+            page(new, "dev", 2, cursor)
@@ -0,0 +1,110 @@
+"""plan_feature plans: input normalization, task selection and order, and memoized skeletons"""
+
+import pytest
+
+from src.planning import (
+    COMPLEXITIES, NEXT_ACTIONS, PHASES, PROJECT_TYPES, PlanEngine, normalize_complexity, normalize_project_type
+)
+
+PLAYBOOKS = {
+    playbook_id: {"name": playbook_id.replace("_", " ").title()}
+    for playbook_id in ("product_owner_story", "epic_story_review", "code_review", "documentation")
+}
+
+@pytest.fixture
+def engine():
+    return PlanEngine(PLAYBOOKS)
+
+def library_order(phase):
+    return [task for name, tasks, _ in PHASES if name == phase for task, _, _ in tasks]
+
+class TestNormalization:
+    @pytest.mark.parametrize("value, expected", [
+        ("web", "web"), (" API ", "api"), ("Frontend", "web"), ("backend", "api"), ("ios", "mobile"),
+        ("ETL", "data"), ("sdk", "library"), ("cli", "cli"), ("spaceship", "other"), ("", "other")
+    ])
+    def test_project_type(self, value, expected):
+        assert normalize_project_type(value) == expected
+
+    @pytest.mark.parametrize("value, expected", [
+        ("simple", "simple"), (" Complex", "complex"), ("low", "simple"), ("HARD", "complex"),
+        ("moderate", "medium"), ("extreme", "medium"), ("", "medium")
+    ])
+    def test_complexity(self, value, expected):
+        assert normalize_complexity(value) == expected
+
+    def test_requested_values_are_reported_only_when_changed(self, engine):
+        assert "requested" not in engine.plan("Login", " Web", "MEDIUM")
+        plan = engine.plan("Login", "frontend", "extreme")
+        assert (plan["project_type"], plan["complexity"]) == ("web", "medium")
+        assert plan["requested"] == {"project_type": "frontend", "complexity": "extreme"}
+        assert engine.plan("Login", "api", "hard")["requested"] == {"complexity": "hard"}
+
+class TestTasks:
+    @pytest.mark.parametrize("project_type", PROJECT_TYPES)
+    @pytest.mark.parametrize("complexity", COMPLEXITIES)
+    def test_phases_and_tasks_keep_library_order(self, engine, project_type, complexity):
+        steps = engine.plan("Feature", project_type, complexity)["implementation_steps"]
+        phases = [step["phase"] for step in steps]
+        assert phases == [name for name, _, _ in PHASES if name in phases]
+        for step in steps:
+            assert step["tasks"]
+            order = library_order(step["phase"])
+            assert list(step["tasks"]) == sorted(step["tasks"], key=order.index)
+
+    @pytest.mark.parametrize("project_type", PROJECT_TYPES)
+    def test_higher_complexity_only_adds_tasks(self, engine, project_type):
+        def tasks(complexity):
+            steps = engine.plan("Feature", project_type, complexity)["implementation_steps"]
+            return {(step["phase"], task) for step in steps for task in step["tasks"]}
+
+        assert tasks("simple") < tasks("medium") < tasks("complex")
+
+    def test_project_specific_tasks(self, engine):
+        def tasks(project_type):
+            steps = engine.plan("Feature", project_type, "complex")["implementation_steps"]
+            return [task for step in steps for task in step["tasks"]]
+
+        assert "API contract (OpenAPI) and versioning" in tasks("api")
+        assert "API contract (OpenAPI) and versioning" not in tasks("web")
+        assert "Build UI components" in tasks("frontend")
+        shared = [task for _, phase_tasks, _ in PHASES for task, _, project_types in phase_tasks if not project_types]
+        assert tasks("other") == shared
+
+    def test_phase_without_tasks_is_dropped(self, engine):
+        phases = [step["phase"] for step in engine.plan("Feature", "other", "simple")["implementation_steps"]]
+        assert "Technical Design" not in phases
+        assert "Technical Design" in [step["phase"] for step in engine.plan("Feature", "api", "simple")["implementation_steps"]]
+
+    def test_next_actions_follow_complexity(self, engine):
+        assert engine.plan("Feature", "web", "simple")["next_actions"] == tuple(
+            action for action, minimum in NEXT_ACTIONS if minimum == 0
+        )
+        assert engine.plan("Feature", "web", "complex")["next_actions"] == tuple(action for action, _ in NEXT_ACTIONS)
+
+class TestPlaybookReferences:
+    def test_only_known_playbooks_are_referenced(self, engine):
+        steps = engine.plan("Feature", "web", "complex")["implementation_steps"]
+        referenced = {playbook["id"] for step in steps for playbook in step.get("playbooks", ())}
+        assert referenced == set(PLAYBOOKS)
+        requirements = steps[0]
+        assert requirements["playbooks"] == (
+            {"id": "product_owner_story", "name": "Product Owner Story"},
+            {"id": "epic_story_review", "name": "Epic Story Review"}
+        )
+
+    def test_references_follow_complexity(self, engine):
+        steps = engine.plan("Feature", "web", "simple")["implementation_steps"]
+        assert steps[0]["playbooks"] == ({"id": "product_owner_story", "name": "Product Owner Story"},)
+
+class TestSkeletons:
+    def test_skeletons_are_shared_and_frozen(self, engine):
+        engine.warm()
+        assert engine.skeleton.cache_info().currsize == len(PROJECT_TYPES) * len(COMPLEXITIES)
+        first = engine.plan("Login", "web", "medium")
+        second = engine.plan("Search", "frontend", "moderate")
+        assert first["implementation_steps"] is second["implementation_steps"]
+        assert (first["feature"], second["feature"]) == ("Login", "Search")
+        with pytest.raises(TypeError):
+            first["implementation_steps"][0]["tasks"] += ("Extra",)
+        assert engine.skeleton.cache_info().misses == len(PROJECT_TYPES) * len(COMPLEXITIES)
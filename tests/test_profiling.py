@@ -0,0 +1,150 @@
+"""Request profiling: phase accounting of a trace, slow-request dumps and their rotation"""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from src import profiling
+from src.metrics import Metrics
+from src.profiling import PHASES, SCOPE_KEY, Profiler, Trace, TraceMiddleware
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(profiling.time, "perf_counter", clock)
+    return clock
+
+def traced(clock, marks):
+    """A trace started at the clock's time, with events marked at the given offsets"""
+    trace = Trace()
+    start = clock.now
+    for event, offset in marks:
+        clock.now = start + offset
+        trace.mark(event)
+    return trace
+
+class TestTracePhases:
+    def test_phases_split_the_request_latency(self, clock):
+        trace = traced(clock, [
+            ("dispatched", 0.010), ("handler_start", 0.013), ("handler_end", 0.050),
+            ("returned", 0.052), ("first_byte", 0.060), ("end", 0.075)
+        ])
+        phases = trace.phases()
+        assert list(phases) == list(PHASES)
+        assert phases == pytest.approx({
+            "parse": 0.010, "validate": 0.003, "handler": 0.037, "serialize": 0.010, "write": 0.015
+        })
+        assert sum(phases.values()) == pytest.approx(0.075)
+
+    def test_calls_without_handler_marks_count_as_handler_time(self, clock):
+        # Resource reads and prompts are not instrumented: everything inside the MCP server is the handler.
+        # Without a body (e.g. the request failed before one was sent) the rest counts as serialize.
+        trace = traced(clock, [("dispatched", 0.002), ("returned", 0.020), ("end", 0.021)])
+        assert trace.phases() == pytest.approx({
+            "parse": 0.002, "validate": 0.0, "handler": 0.018, "serialize": 0.001, "write": 0.0
+        })
+
+    def test_first_mark_wins(self, clock):
+        trace = traced(clock, [("dispatched", 0.001), ("dispatched", 0.005), ("returned", 0.010)])
+        assert trace.phases()["parse"] == pytest.approx(0.001)
+
+    def test_requests_that_never_reached_a_handler_have_no_phases(self, clock):
+        assert traced(clock, [("end", 0.010)]).phases() is None
+        assert traced(clock, [("dispatched", 0.001), ("end", 0.010)]).phases() is None
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+class TestProfiler:
+    def test_sampling_can_be_disabled(self, tmp_path):
+        assert Profiler(str(tmp_path), 0, 0).begin() is None
+
+    def test_finished_trace_records_phases_and_dumps_when_slow(self, tmp_path):
+        metrics = Metrics()
+        profiler = Profiler(str(tmp_path), 1.0, 0, metrics=metrics)
+
+        async def scenario():
+            trace = profiler.begin()
+            trace.method, trace.name = "tools/call", "get_playbook"
+            for event in ("dispatched", "handler_start", "handler_end", "returned", "first_byte"):
+                trace.mark(event)
+            profiler.finish(trace)
+
+        asyncio.run(scenario())
+        wait_for(lambda: list(tmp_path.glob("*.json")))
+        (dump,) = tmp_path.glob("*.json")
+        assert dump.stem.endswith("-tools_call-get_playbook")
+        summary = json.loads(dump.read_text())
+        assert (summary["method"], summary["name"]) == ("tools/call", "get_playbook")
+        assert list(summary["phases_ms"]) == list(PHASES)
+        assert sum(summary["phases_ms"].values()) == pytest.approx(summary["total_ms"], abs=0.01)
+        assert 'playbook_mcp_phase_seconds_count{worker=' in metrics.render()
+
+    def test_fast_and_undispatched_requests_are_not_dumped(self, tmp_path):
+        metrics = Metrics()
+        profiler = Profiler(str(tmp_path), 1.0, 10_000, metrics=metrics)
+
+        async def scenario():
+            undispatched = profiler.begin()
+            profiler.finish(undispatched)
+            fast = profiler.begin()
+            fast.mark("dispatched")
+            fast.mark("returned")
+            profiler.finish(fast)
+
+        asyncio.run(scenario())
+        assert list(tmp_path.iterdir()) == []
+        assert 'phase="handler"} 1' in metrics.render()
+
+    def test_rotation_keeps_the_newest_dumps(self, tmp_path):
+        profiler = Profiler(str(tmp_path), 1.0, 0, max_dumps=2)
+        names = [f"20260101T0000{second:02d}-1-{second:06d}-tools_call" for second in range(4)]
+        for name in names:
+            for suffix in (".json", ".folded", ".prof"):
+                (tmp_path / f"{name}{suffix}").write_text("{}")
+        (tmp_path / f"{names[0]}.prof").unlink()
+        profiler._rotate()
+        assert sorted(path.name for path in tmp_path.iterdir()) == sorted(
+            f"{name}{suffix}" for name in names[2:] for suffix in (".json", ".folded", ".prof")
+        )
+
+class TestTraceMiddleware:
+    def test_marks_the_first_body_byte_and_finishes_the_trace(self, tmp_path):
+        finished = []
+
+        class Recording(Profiler):
+            def finish(self, trace):
+                finished.append(dict(trace.marks))
+                self._sampler.discard(trace)
+
+        async def app(scope, receive, send):
+            trace = scope.get(SCOPE_KEY)
+            if trace is not None:
+                trace.mark("dispatched")
+                trace.mark("returned")
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"{}"})
+
+        sent = []
+
+        async def send(message):
+            sent.append(message["type"])
+
+        middleware = TraceMiddleware(app, Recording(str(tmp_path), 1.0, 0))
+        asyncio.run(middleware({"type": "http", "method": "POST"}, None, send))
+        asyncio.run(middleware({"type": "http", "method": "GET"}, None, send))
+        assert len(finished) == 1
+        assert set(finished[0]) == {"dispatched", "returned", "first_byte"}
+        assert sent == ["http.response.start", "http.response.body"] * 2
@@ -0,0 +1,181 @@
+"""Partial get_playbook payloads over a PlaybookIndex, and shared-block deduplication and limits for get_playbooks"""
+
+import asyncio
+import copy
+
+import pytest
+from fastmcp import Client
+from fastmcp.exceptions import ToolError
+
+from src.projection import PlaybookIndex, dedupe_shared_blocks, normalize_pointer
+
+def make_payload(playbook_id="code_review", **template):
+    return {
+        "id": playbook_id,
+        "hash": f"{playbook_id}-hash",
+        "name": "Code Review",
+        "description": "Review checklist",
+        "category": "development",
+        "template": template or {
+            "sections": [
+                {"name": "Summary", "content": "What changed"},
+                {"name": "Test Plan", "content": "How it was tested"}
+            ],
+            "atlassian_integration": {"instructions": "Link the ticket", "project/key": "ENG"},
+            "checklist": ["Tests pass", "Docs updated"]
+        },
+        "usage_instructions": "Fill in every section"
+    }
+
+SUMMARY = {
+    "id": "code_review",
+    "hash": "code_review-hash",
+    "name": "Code Review",
+    "description": "Review checklist",
+    "category": "development"
+}
+
+@pytest.fixture
+def index():
+    return PlaybookIndex(make_payload())
+
+class TestNormalizePointer:
+    @pytest.mark.parametrize("path, pointer", [
+        ("/template/checklist/0", "/template/checklist/0"),
+        ("template.checklist.0", "/template/checklist/0"),
+        ("  template.sections ", "/template/sections"),
+        ("template.atlassian_integration.project/key", "/template/atlassian_integration/project~1key"),
+        ("", "")
+    ])
+    def test_pointer_and_dotted_forms(self, path, pointer):
+        assert normalize_pointer(path) == pointer
+
+class TestProject:
+    def test_no_selection_returns_metadata_only(self, index):
+        assert index.project() == SUMMARY
+
+    def test_sections_by_case_insensitive_name(self, index):
+        result = index.project(sections=["test plan", "SUMMARY"])
+        assert result["sections"] == [
+            {"name": "Test Plan", "content": "How it was tested"},
+            {"name": "Summary", "content": "What changed"}
+        ]
+        assert "missing" not in result
+
+    def test_unknown_section_is_reported_with_the_available_names(self, index):
+        result = index.project(sections=["Summary", "Rollout"])
+        assert [section["name"] for section in result["sections"]] == ["Summary"]
+        assert result["missing"] == ["Rollout"]
+        assert result["available_sections"] == ["Summary", "Test Plan"]
+
+    def test_pointer_and_dotted_fields_resolve_to_the_same_value(self, index):
+        result = index.project(fields=["/template/atlassian_integration/instructions", "template.checklist.1"])
+        assert result["fields"] == {
+            "/template/atlassian_integration/instructions": "Link the ticket",
+            "/template/checklist/1": "Docs updated"
+        }
+        dotted = index.project(fields=["template.atlassian_integration.instructions"])
+        assert dotted["fields"] == {"/template/atlassian_integration/instructions": "Link the ticket"}
+
+    def test_fields_return_references_into_the_payload(self, index):
+        result = index.project(fields=["/template/sections/0", "/usage_instructions"])
+        assert result["fields"]["/template/sections/0"] is index.payload["template"]["sections"][0]
+        assert result["fields"]["/usage_instructions"] == "Fill in every section"
+
+    def test_escaped_keys(self, index):
+        result = index.project(fields=["/template/atlassian_integration/project~1key"])
+        assert result["fields"] == {"/template/atlassian_integration/project~1key": "ENG"}
+
+    def test_unknown_fields_are_reported_as_given(self, index):
+        result = index.project(fields=["template.nope", "/template/checklist/7", "/template/checklist/0"])
+        assert result["fields"] == {"/template/checklist/0": "Tests pass"}
+        assert result["missing"] == ["template.nope", "/template/checklist/7"]
+        assert "available_sections" not in result
+
+    def test_summary_only(self, index):
+        assert index.project(summary_only=True) == {
+            **SUMMARY,
+            "section_names": ["Summary", "Test Plan"],
+            "template_blocks": ["atlassian_integration", "checklist"]
+        }
+
+    def test_summary_only_with_a_section(self, index):
+        result = index.project(sections=["Summary"], summary_only=True)
+        assert result["section_names"] == ["Summary", "Test Plan"]
+        assert result["sections"] == [{"name": "Summary", "content": "What changed"}]
+
+    def test_template_without_sections(self):
+        index = PlaybookIndex(make_payload(checklist=["One"]))
+        result = index.project(sections=["Summary"], summary_only=True)
+        assert result["section_names"] == []
+        assert result["template_blocks"] == ["checklist"]
+        assert result["missing"] == ["Summary"]
+
+class TestDedupeSharedBlocks:
+    """Blocks repeated across a batch are sent once"""
+
+    def test_repeated_blocks_are_replaced_by_references(self):
+        shared_section = {"name": "Summary", "content": "What changed"}
+        first = make_payload("first", sections=[shared_section, {"name": "Only First", "content": "a"}], links={"wiki": "W"})
+        second = make_payload("second", sections=[{"name": "Only Second", "content": "b"}, dict(shared_section)], links={"wiki": "W"})
+        originals = copy.deepcopy([first, second])
+
+        payloads, shared = dedupe_shared_blocks([PlaybookIndex(first), PlaybookIndex(second)])
+
+        section_key = payloads[0]["template"]["sections"][0]["$shared"]
+        links_key = payloads[0]["template"]["links"]["$shared"]
+        # Identical usage instructions are hoisted too
+        usage_key = payloads[0]["usage_instructions"]["$shared"]
+        assert shared == {section_key: shared_section, links_key: {"wiki": "W"}, usage_key: "Fill in every section"}
+        assert payloads[0]["template"]["sections"][1] == {"name": "Only First", "content": "a"}
+        assert payloads[1]["template"]["sections"] == [{"name": "Only Second", "content": "b"}, {"$shared": section_key}]
+        assert payloads[1]["template"]["links"] == {"$shared": links_key}
+        assert payloads[1]["usage_instructions"] == {"$shared": usage_key}
+        assert [first, second] == originals
+
+    def test_expanding_references_restores_the_payloads(self):
+        payloads = [make_payload("first"), make_payload("second"), make_payload("third", checklist=["Other"])]
+        deduped, shared = dedupe_shared_blocks([PlaybookIndex(payload) for payload in payloads])
+
+        def expand(value):
+            if isinstance(value, dict):
+                if set(value) == {"$shared"}:
+                    return shared[value["$shared"]]
+                return {key: expand(item) for key, item in value.items()}
+            if isinstance(value, list):
+                return [expand(item) for item in value]
+            return value
+
+        assert [expand(payload) for payload in deduped] == payloads
+        assert deduped[2]["template"] == {"checklist": ["Other"]}
+
+    def test_nothing_shared_returns_the_payloads_unchanged(self):
+        payloads = [make_payload("first", checklist=["A"]), make_payload("second", checklist=["B"])]
+        payloads[1]["usage_instructions"] = "Other"
+        deduped, shared = dedupe_shared_blocks([PlaybookIndex(payload) for payload in payloads])
+        assert shared == {}
+        assert deduped[0] is payloads[0] and deduped[1] is payloads[1]
+
+class TestGetPlaybooksLimit:
+    """get_playbooks caps the number of IDs per call"""
+
+    def call(self, ids):
+        from src import server
+
+        async def scenario():
+            async with Client(server.mcp) as client:
+                return await client.call_tool("get_playbooks", {"ids": ids})
+
+        return asyncio.run(scenario())
+
+    def test_duplicates_are_served_once(self):
+        from src.server import MAX_BATCH_IDS
+
+        result = self.call(["code_review"] * MAX_BATCH_IDS)
+        assert result.structured_content["total_playbooks"] == 1
+
+    def test_too_many_ids_are_rejected(self):
+        from src.server import MAX_BATCH_IDS
+
+        with pytest.raises(ToolError, match="too long"):
+            self.call([f"id_{number}" for number in range(MAX_BATCH_IDS + 1)])
@@ -0,0 +1,120 @@
+"""Frozen playbook records: immutability, interning and thaw round trips"""
+
+import copy
+import json
+import pickle
+
+import pydantic_core
+import pytest
+
+from src.records import FrozenDict, PlaybookMetadata, freeze, thaw
+
+PLAYBOOK = {
+    "name": "Code Review",
+    "description": "Review checklist",
+    "category": "development",
+    "template": {
+        "sections": [{"name": "Summary", "content": "What changed"}, {"name": "Tests", "content": None}],
+        "checklist": ["Tests pass", "Docs updated"],
+        "settings": {"required": True, "reviewers": 2, 7: "numeric key"}
+    }
+}
+
+@pytest.fixture
+def frozen():
+    return freeze(PLAYBOOK)
+
+class TestFreeze:
+    def test_containers_become_frozen_dicts_and_tuples(self, frozen):
+        assert isinstance(frozen, FrozenDict) and isinstance(frozen, dict)
+        sections = frozen["template"]["sections"]
+        assert isinstance(sections, tuple)
+        assert isinstance(sections[0], FrozenDict)
+        assert frozen["template"]["checklist"] == ("Tests pass", "Docs updated")
+        assert frozen["template"]["settings"]["7"] == "numeric key"
+
+    def test_strings_are_interned(self, frozen):
+        # Built at runtime, so not the same object as the literal until interned
+        text = "".join(["What ", "changed"])
+        assert freeze({"content": text})["content"] is frozen["template"]["sections"][0]["content"]
+
+    def test_frozen_input_is_returned_as_is(self, frozen):
+        assert freeze(frozen) is frozen
+        assert freeze({"wrapper": frozen})["wrapper"] is frozen
+
+    def test_input_is_not_modified(self, frozen):
+        assert isinstance(PLAYBOOK["template"]["checklist"], list)
+        assert 7 in PLAYBOOK["template"]["settings"]
+
+class TestFrozenDict:
+    @pytest.mark.parametrize("mutate", [
+        lambda value: value.__setitem__("name", "x"),
+        lambda value: value.__delitem__("name"),
+        lambda value: value.update(name="x"),
+        lambda value: value.setdefault("new", 1),
+        lambda value: value.pop("name"),
+        lambda value: value.popitem(),
+        lambda value: value.clear()
+    ])
+    def test_mutation_raises(self, frozen, mutate):
+        with pytest.raises(TypeError, match="immutable"):
+            mutate(frozen)
+        assert frozen == freeze(PLAYBOOK)
+
+    def test_in_place_union_raises(self, frozen):
+        value = frozen
+        with pytest.raises(TypeError):
+            value |= {"name": "x"}
+        assert frozen["name"] == "Code Review"
+
+    def test_nested_values_are_immutable_too(self, frozen):
+        with pytest.raises(TypeError):
+            frozen["template"]["settings"]["required"] = False
+        with pytest.raises(TypeError):
+            frozen["template"]["checklist"][0] = "x"
+
+    def test_copies_share_the_original(self, frozen):
+        assert copy.copy(frozen) is frozen
+        assert copy.deepcopy(frozen) is frozen
+
+    def test_pickle_round_trip(self, frozen):
+        restored = pickle.loads(pickle.dumps(frozen))
+        assert isinstance(restored, FrozenDict)
+        assert restored == frozen
+        with pytest.raises(TypeError):
+            restored["name"] = "x"
+
+class TestThaw:
+    def test_thaw_gives_plain_containers(self, frozen):
+        plain = thaw(frozen)
+        assert type(plain) is dict
+        assert type(plain["template"]["sections"][0]) is dict
+        plain["name"] = "Changed"
+        assert frozen["name"] == "Code Review"
+
+    def test_round_trip(self, frozen):
+        assert freeze(thaw(frozen)) == frozen
+        expected = json.loads(json.dumps(PLAYBOOK))
+        assert json.loads(json.dumps(thaw(frozen))) == expected
+        assert json.loads(pydantic_core.to_json(frozen)) == expected
+
+    def test_scalars_pass_through(self):
+        assert [thaw(value) for value in ("text", 1, 2.5, True, None)] == ["text", 1, 2.5, True, None]
+
+class TestPlaybookMetadata:
+    def test_mapping_interface(self):
+        metadata = PlaybookMetadata.from_mapping(PLAYBOOK)
+        assert metadata["category"] == "development"
+        assert dict(**metadata) == {"name": "Code Review", "description": "Review checklist", "category": "development"}
+        assert PlaybookMetadata.from_mapping(metadata) is metadata
+        with pytest.raises(KeyError):
+            metadata["template"]
+
+    def test_immutable_and_hashable(self):
+        metadata = PlaybookMetadata("Code Review", "Review checklist", "development")
+        with pytest.raises(AttributeError):
+            metadata.name = "x"
+        with pytest.raises(AttributeError, match="immutable"):
+            del metadata.name
+        assert metadata == PlaybookMetadata.from_mapping(PLAYBOOK)
+        assert len({metadata, PlaybookMetadata.from_mapping(PLAYBOOK)}) == 1
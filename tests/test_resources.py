@@ -0,0 +1,107 @@
+"""playbook:// resources: detecting what a registry swap changed and notifying sessions"""
+
+import asyncio
+
+from src.registry import Registry
+from src.resources import PlaybookResources, changed_playbooks, playbook_id_from_uri, playbook_uri
+
+def playbook(name, steps="Do the thing", description=None):
+    return {"name": name, "description": description or f"{name} checklist", "category": "ops", "template": {"steps": [steps]}}
+
+BASE = {"deploy": playbook("Deploy"), "wiki": playbook("Wiki")}
+
+def registry(**changes):
+    playbooks = dict(BASE)
+    for playbook_id, value in changes.items():
+        if value is None:
+            del playbooks[playbook_id]
+        else:
+            playbooks[playbook_id] = value
+    return Registry.from_playbooks(playbooks)
+
+class TestUris:
+    def test_round_trip(self):
+        assert playbook_uri("code_review") == "playbook://code_review"
+        assert playbook_id_from_uri(playbook_uri("code_review")) == "code_review"
+        assert playbook_id_from_uri("file:///etc/passwd") is None
+
+class TestChangedPlaybooks:
+    def test_identical_registries(self):
+        assert changed_playbooks(registry(), registry()) == (False, [])
+
+    def test_body_change_updates_without_relisting(self):
+        assert changed_playbooks(registry(), registry(wiki=playbook("Wiki", steps="New"))) == (False, ["wiki"])
+
+    def test_metadata_change_relists_and_updates(self):
+        new = registry(deploy=playbook("Deploy", description="Ship it"))
+        assert changed_playbooks(registry(), new) == (True, ["deploy"])
+
+    def test_added_and_removed_playbooks_only_relist(self):
+        assert changed_playbooks(registry(), registry(review=playbook("Review"))) == (True, [])
+        assert changed_playbooks(registry(), registry(wiki=None)) == (True, [])
+
+class FakeSession:
+    def __init__(self, fail=False):
+        self.sent = []
+        self.fail = fail
+
+    async def send_resource_list_changed(self):
+        if self.fail:
+            raise ConnectionError("closed")
+        self.sent.append("list_changed")
+
+    async def send_resource_updated(self, uri):
+        self.sent.append(uri)
+
+class TestNotify:
+    """notify() runs on the reload thread and schedules sends on each session's loop"""
+
+    def run(self, old, new, subscriptions):
+        resources = PlaybookResources(reader=None)
+
+        async def scenario():
+            sessions = []
+            for uris in subscriptions:
+                session = FakeSession(fail=uris is None)
+                resources._track(session)
+                for uri in uris or ():
+                    resources._track(session, uri)
+                sessions.append(session)
+            await asyncio.to_thread(resources.notify, old, new)
+            for _ in range(5):
+                await asyncio.sleep(0)
+            return sessions, resources
+
+        return asyncio.run(scenario())
+
+    def test_only_subscribers_of_a_changed_playbook_hear_about_it(self):
+        old, new = registry(), registry(wiki=playbook("Wiki", steps="New"))
+        sessions, _ = self.run(old, new, [["playbook://wiki"], ["playbook://deploy"], []])
+        assert [session.sent for session in sessions] == [["playbook://wiki"], [], []]
+
+    def test_list_change_reaches_every_session(self):
+        old, new = registry(), registry(deploy=playbook("Deploy", description="Ship it", steps="New"))
+        sessions, _ = self.run(old, new, [["playbook://deploy", "playbook://wiki"], []])
+        assert [session.sent for session in sessions] == [["list_changed", "playbook://deploy"], ["list_changed"]]
+
+    def test_no_change_sends_nothing(self):
+        sessions, _ = self.run(registry(), registry(), [["playbook://wiki"]])
+        assert sessions[0].sent == []
+
+    def test_unsubscribe(self):
+        resources = PlaybookResources(reader=None)
+        session = FakeSession()
+
+        async def scenario():
+            resources._track(session, "playbook://wiki")
+            resources._untrack(session, "playbook://wiki")
+            resources.notify(registry(), registry(wiki=playbook("Wiki", steps="New")))
+            await asyncio.sleep(0)
+
+        asyncio.run(scenario())
+        assert session.sent == []
+
+    def test_failed_session_is_dropped(self):
+        sessions, resources = self.run(registry(), registry(wiki=None), [None, []])
+        assert sessions[1].sent == ["list_changed"]
+        assert list(resources._sessions) == [sessions[1]]
@@ -0,0 +1,133 @@
+"""BM25 search: ranked top results against a brute-force scorer, and incremental re-indexing"""
+
+import math
+
+import pytest
+
+from src import search
+from src.registry import Registry
+from src.search import BM25_B, BM25_K1, SearchIndex, _document_terms, tokenize
+
+WORDS = "deploy review epic story wiki checklist release test api schema metric alert".split()
+
+def make_playbook(name, category, sections):
+    return {
+        "name": name,
+        "description": f"{name} playbook",
+        "category": category,
+        "template": {"sections": [{"name": title, "content": text} for title, text in sections]}
+    }
+
+def catalog():
+    """Playbooks mixing a small vocabulary, plus identical copies so some scores tie"""
+    playbooks = {}
+    for number in range(24):
+        words = [WORDS[(number * step) % len(WORDS)] for step in (1, 3, 5, 7)]
+        playbooks[f"pb{number:02d}"] = make_playbook(
+            f"Playbook {number}",
+            "ops" if number % 3 else "docs",
+            [("Steps", " ".join(words)), ("Notes", " ".join(words[: number % 4 + 1]))]
+        )
+    for copy in ("twin_a", "twin_b", "twin_c"):
+        playbooks[copy] = make_playbook("Twin", "ops", [("Steps", "deploy review release")])
+    return playbooks
+
+def brute_force(playbooks, query, category=None):
+    """Every matching playbook's BM25 score, computed from scratch"""
+    documents = {playbook_id: _document_terms(playbook) for playbook_id, playbook in playbooks.items()}
+    lengths = {playbook_id: sum(terms.values()) for playbook_id, terms in documents.items()}
+    average = sum(lengths.values()) / len(lengths)
+    scores = {}
+    for term in dict.fromkeys(tokenize(query)):
+        matching = [playbook_id for playbook_id, terms in documents.items() if term in terms]
+        idf = math.log(1 + (len(documents) - len(matching) + 0.5) / (len(matching) + 0.5))
+        for playbook_id in matching:
+            frequency = documents[playbook_id][term]
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[playbook_id] / average)
+            scores[playbook_id] = scores.get(playbook_id, 0.0) + idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+    if category is not None:
+        scores = {playbook_id: score for playbook_id, score in scores.items() if playbooks[playbook_id]["category"] == category}
+    return scores
+
+def assert_top(results, expected, limit):
+    """Results are a valid top-``limit`` of the expected scores; equal scores may come in any order"""
+    ranked = sorted(expected.values(), reverse=True)[:limit]
+    assert [result["score"] for result in results] == [round(score, 4) for score in ranked]
+    for result in results:
+        assert expected[result["id"]] == pytest.approx(result["score"], abs=1e-4)
+    assert len({result["id"] for result in results}) == len(results)
+
+QUERIES = ["deploy", "deploy review", "release review deploy", "epic metric alert schema", "wiki test missing", "twin"]
+
+class TestRanking:
+    """Threshold-algorithm top-k matches exhaustive BM25 scoring"""
+
+    @pytest.fixture
+    def index(self):
+        index = SearchIndex()
+        index.sync(Registry.from_playbooks(catalog()))
+        return index
+
+    @pytest.mark.parametrize("query", QUERIES)
+    @pytest.mark.parametrize("limit", [1, 3, 10, 100])
+    def test_matches_brute_force(self, index, query, limit):
+        assert_top(index.search(query, limit=limit), brute_force(catalog(), query), limit)
+
+    @pytest.mark.parametrize("query", QUERIES)
+    def test_category_filter(self, index, query):
+        assert_top(index.search(query, category="docs", limit=4), brute_force(catalog(), query, "docs"), 4)
+
+    @pytest.mark.parametrize("query", QUERIES)
+    def test_summing_fallback_matches_brute_force(self, index, query, monkeypatch):
+        monkeypatch.setattr(search, "THRESHOLD_DEPTH", 1)
+        assert_top(index.search(query, limit=5), brute_force(catalog(), query), 5)
+
+    def test_tied_playbooks_split_at_the_limit(self, index):
+        expected = brute_force(catalog(), "twin")
+        assert sorted(expected) == ["twin_a", "twin_b", "twin_c"]
+        results = index.search("twin", limit=2)
+        assert len(results) == 2
+        assert results[0]["score"] == results[1]["score"]
+        assert {result["id"] for result in results} < set(expected)
+
+    def test_no_matching_terms(self, index):
+        assert index.search("nothing matches") == []
+        assert index.search("the and of") == []
+
+class TestSync:
+    """Re-indexing after a catalog change"""
+
+    def test_changed_playbook_is_reindexed(self):
+        playbooks = catalog()
+        index = SearchIndex()
+        index.sync(Registry.from_playbooks(playbooks))
+        assert index.search("kubernetes") == []
+
+        playbooks["pb05"] = make_playbook("Playbook 5", "docs", [("Steps", "kubernetes rollout deploy")])
+        changed = Registry.from_playbooks(playbooks)
+        index.sync(changed)
+        assert index.is_current(changed)
+        assert [result["id"] for result in index.search("kubernetes")] == ["pb05"]
+        assert index.search("kubernetes")[0]["matches"][0]["section"] == "Steps"
+        for query in QUERIES:
+            assert_top(index.search(query, limit=10), brute_force(playbooks, query), 10)
+
+    def test_removed_playbook_leaves_the_index(self):
+        playbooks = catalog()
+        index = SearchIndex()
+        index.sync(Registry.from_playbooks(playbooks))
+        del playbooks["twin_b"]
+        index.sync(Registry.from_playbooks(playbooks))
+        assert len(index) == len(playbooks)
+        assert [result["id"] for result in index.search("twin", limit=5)] == ["twin_a", "twin_c"]
+        for query in QUERIES:
+            assert_top(index.search(query, limit=10), brute_force(playbooks, query), 10)
+
+    def test_older_registry_is_ignored(self):
+        older = Registry.from_playbooks(catalog())
+        newer = Registry.from_playbooks({"only": make_playbook("Only", "ops", [("Steps", "deploy")])})
+        index = SearchIndex()
+        index.sync(newer)
+        index.sync(older)
+        assert index.is_current(newer)
+        assert len(index) == 1
@@ -0,0 +1,84 @@
+"""Registry snapshots: round trip, and rejection when the sources they were built from changed"""
+
+import marshal
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from src import snapshot
+from src.records import freeze
+from src.registry import Registry
+from src.search import SearchIndex
+from src.snapshot import SOURCES, build_snapshot, fingerprint, load_snapshot
+
+PLAYBOOKS = {
+    "deploy": {"name": "Deploy", "description": "Ship it", "category": "ops", "template": {"steps": ["Tag", "Publish"]}},
+    "wiki": {"name": "Wiki", "description": "Write docs", "category": "docs", "template": {"sections": [{"name": "Intro", "content": "Why"}]}}
+}
+
+@pytest.fixture
+def built(tmp_path):
+    playbooks = Registry.from_playbooks(PLAYBOOKS)
+    index = SearchIndex()
+    index.sync(playbooks)
+    path = tmp_path / "registry.snapshot"
+    build_snapshot(playbooks, index.export(), path)
+    return playbooks, index, path
+
+@pytest.fixture
+def sources(tmp_path, monkeypatch):
+    """Copies of the fingerprinted modules, standing in for the package"""
+    package = tmp_path / "src"
+    package.mkdir()
+    for name in SOURCES:
+        shutil.copy2(Path(snapshot.__file__).parent / name, package / name)
+    monkeypatch.setattr(snapshot, "__file__", str(package / "snapshot.py"))
+    return package
+
+class TestRoundTrip:
+    def test_registry_and_search_index_are_restored(self, built):
+        playbooks, index, path = built
+        restored, search_state = load_snapshot(path)
+        assert list(restored) == ["deploy", "wiki"]
+        assert restored.index == playbooks.index
+        assert restored.content_hash("wiki") == playbooks.content_hash("wiki")
+        assert restored["deploy"] == freeze(PLAYBOOKS["deploy"])
+        assert restored.is_loaded("wiki")
+
+        restored_index = SearchIndex()
+        restored_index.restore(restored, search_state)
+        assert restored_index.search("publish docs") == index.search("publish docs")
+
+class TestStaleSnapshots:
+    def test_changed_source_file_invalidates_the_snapshot(self, tmp_path, sources):
+        path = tmp_path / "registry.snapshot"
+        build_snapshot(Registry.from_playbooks(PLAYBOOKS), SearchIndex().export(), path)
+        assert load_snapshot(path) is not None
+        stat = (sources / "search.py").stat()
+        os.utime(sources / "search.py", ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert load_snapshot(path) is None
+
+    def test_fingerprint_covers_every_source(self, sources):
+        before = fingerprint()
+        for name in SOURCES:
+            with open(sources / name, "a") as f:
+                f.write("\n")
+            after = fingerprint()
+            assert after != before, name
+            before = after
+
+    def test_other_format_version_is_rejected(self, built, monkeypatch):
+        _, _, path = built
+        monkeypatch.setattr(snapshot, "FORMAT_VERSION", snapshot.FORMAT_VERSION + 1)
+        assert load_snapshot(path) is None
+
+    @pytest.mark.parametrize("content", [b"", b"not marshal data", marshal.dumps((1, "fingerprint"))])
+    def test_corrupt_snapshot_is_ignored(self, tmp_path, content):
+        path = tmp_path / "registry.snapshot"
+        path.write_bytes(content)
+        assert load_snapshot(path) is None
+
+    def test_missing_snapshot_is_ignored(self, tmp_path):
+        assert load_snapshot(tmp_path / "missing.snapshot") is None
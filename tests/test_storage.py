@@ -0,0 +1,179 @@
+"""SQLite playbook store: seeding and import, revisions, FTS5 search, the read pool and the reload watcher"""
+
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+from src.records import freeze
+from src.registry import Registry
+from src.storage import ConnectionPool, SQLiteStore, StoreWatcher
+from src.versioning import playbook_hash
+
+def make_playbook(name, category, steps, description=None):
+    return {
+        "name": name,
+        "description": description or f"{name} checklist",
+        "category": category,
+        "template": {"sections": [{"name": "Steps", "content": steps}]}
+    }
+
+PLAYBOOKS = {
+    "deploy": make_playbook("Deploy", "ops", "Roll out the release and watch the alerts"),
+    "rollback": make_playbook("Rollback", "ops", "Revert a deploy when alerts fire"),
+    "wiki": make_playbook("Wiki", "docs", "Write the wiki page for the release")
+}
+
+@pytest.fixture
+def store(tmp_path):
+    store = SQLiteStore(tmp_path / "playbooks.db", pool_size=2)
+    store.seed(PLAYBOOKS)
+    return store
+
+class TestSeedAndImport:
+    def test_seed_fills_an_empty_database_once(self, tmp_path):
+        store = SQLiteStore(tmp_path / "playbooks.db")
+        assert store.seed(PLAYBOOKS) == 3
+        assert store.seed({"other": make_playbook("Other", "ops", "x")}) == 0
+        playbooks = store.load_registry()
+        assert list(playbooks) == ["deploy", "rollback", "wiki"]
+        assert playbooks["wiki"] == freeze(PLAYBOOKS["wiki"])
+        assert playbooks.index["deploy"]["category"] == "ops"
+
+    def test_import_command_loads_the_built_in_playbooks(self, tmp_path):
+        path = tmp_path / "imported.db"
+        command = [sys.executable, "-m", "src.storage", "import", str(path)]
+        root = Path(__file__).resolve().parent.parent
+        first = subprocess.run(command, cwd=root, capture_output=True, text=True, check=True)
+        again = subprocess.run(command, cwd=root, capture_output=True, text=True, check=True)
+        count = len(SQLiteStore(path).load_registry())
+        assert count > 0
+        assert f"Imported {count} playbooks" in first.stdout
+        assert f"({count} new or changed)" in first.stdout
+        assert "(0 new or changed)" in again.stdout
+
+class TestRevisions:
+    def test_put_of_unchanged_content_is_a_no_op(self, store):
+        assert store.put("deploy", PLAYBOOKS["deploy"]) is False
+
+    def test_put_records_a_new_revision_and_keeps_the_old_one(self, store):
+        before = store.load_registry()
+        old_hash = before.content_hash("deploy")
+        changed = make_playbook("Deploy", "ops", "Canary first, then roll out")
+        assert store.put("deploy", changed) is True
+
+        after = store.load_registry()
+        assert after.content_hash("deploy") == playbook_hash(changed) != old_hash
+        assert after["deploy"] == freeze(changed)
+        assert store.version("deploy", old_hash) == PLAYBOOKS["deploy"]
+        # A registry built before the write still serves the body its hash names
+        assert before["deploy"] == freeze(PLAYBOOKS["deploy"])
+        assert list(after) == ["deploy", "rollback", "wiki"]
+
+    def test_unchanged_bodies_are_reused(self, store):
+        before = store.load_registry()
+        wiki = before["wiki"]
+        store.put("deploy", make_playbook("Deploy", "ops", "Canary first"))
+        after = store.load_registry(previous=before)
+        assert after.is_loaded("wiki") and after["wiki"] is wiki
+        assert not after.is_loaded("deploy")
+
+    def test_delete_removes_from_listing_and_search(self, store):
+        digest = store.load_registry().content_hash("wiki")
+        assert store.delete("wiki") is True
+        assert store.delete("wiki") is False
+        assert "wiki" not in store.load_registry()
+        assert store.search("wiki") == []
+        assert store.version("wiki", digest) == PLAYBOOKS["wiki"]
+        with pytest.raises(KeyError):
+            store.version("wiki", "no-such-hash")
+
+class TestSearch:
+    def test_name_hits_outrank_body_hits(self, store):
+        results = store.search("deploy")
+        assert [result["id"] for result in results] == ["deploy", "rollback"]
+        assert results[0]["score"] > results[1]["score"] > 0
+        assert results[1]["matches"] == [{"section": "Steps", "snippet": "Revert a deploy when alerts fire"}]
+
+    def test_more_matching_terms_rank_higher(self, store):
+        results = store.search("release alerts")
+        assert results[0]["id"] == "deploy"
+        assert {result["id"] for result in results} == {"deploy", "rollback", "wiki"}
+
+    def test_category_filter_and_limit(self, store):
+        assert [result["id"] for result in store.search("release", category="docs")] == ["wiki"]
+        assert len(store.search("release alerts", limit=1)) == 1
+
+    def test_updated_playbook_is_reindexed(self, store):
+        store.put("wiki", make_playbook("Wiki", "docs", "Document the kubernetes cluster"))
+        assert [result["id"] for result in store.search("kubernetes")] == ["wiki"]
+        assert [result["id"] for result in store.search("release", category="docs")] == []
+
+    def test_query_syntax_is_not_interpreted(self, store):
+        assert store.search('deploy" OR name:*') == store.search("deploy")
+        assert store.search("the and of") == []
+
+class TestConnectionPool:
+    def test_connections_are_returned_and_reused(self, store):
+        pool = ConnectionPool(store.path, 2)
+        with pool.connection() as first:
+            with pool.connection() as second:
+                assert first is not second
+        with pool.connection() as again:
+            assert again in (first, second)
+        assert pool._idle.qsize() == 2
+
+    def test_connections_are_read_only(self, store):
+        with store.pool.connection() as connection:
+            with pytest.raises(Exception):
+                connection.execute("DELETE FROM playbooks")
+
+    def test_checkout_blocks_at_the_size_limit(self, store):
+        pool = ConnectionPool(store.path, 1)
+        entered = threading.Event()
+
+        def borrow():
+            with pool.connection():
+                entered.set()
+
+        with pool.connection():
+            thread = threading.Thread(target=borrow)
+            thread.start()
+            assert not entered.wait(0.05)
+        thread.join(1)
+        assert entered.is_set()
+
+    def test_connection_is_returned_when_the_caller_fails(self, store):
+        pool = ConnectionPool(store.path, 1)
+        with pytest.raises(ValueError):
+            with pool.connection():
+                raise ValueError
+        with pool.connection() as connection:
+            assert connection.execute("SELECT count(*) FROM playbooks").fetchone() == (3,)
+
+class TestStoreWatcher:
+    def test_reloads_after_a_commit_from_another_connection(self, store, monkeypatch):
+        reloaded = []
+        ready = threading.Event()
+        current = store.load_registry()
+        monkeypatch.setattr("src.registry.current", lambda: current)
+
+        def on_reload(playbooks):
+            reloaded.append(playbooks)
+            ready.set()
+
+        watcher = StoreWatcher(store, interval=0.01, on_reload=on_reload)
+        watcher.start()
+        try:
+            assert not ready.wait(0.05)
+            SQLiteStore(store.path).put("deploy", make_playbook("Deploy", "ops", "Canary first"))
+            assert ready.wait(2)
+        finally:
+            watcher.stop()
+            watcher.join(1)
+        playbooks = reloaded[0]
+        assert isinstance(playbooks, Registry)
+        assert playbooks["deploy"]["template"]["sections"][0]["content"] == "Canary first"
+        assert playbooks.content_hash("wiki") == current.content_hash("wiki")
@@ -0,0 +1,115 @@
+"""Tenant overlays: merge-patch semantics, $append, and validation of overlay files"""
+
+import json
+
+import pytest
+
+from src.records import freeze
+from src.registry import Registry
+from src.tenants import TenantOverlay, TenantView, apply_overlay, load_overlays
+
+BASE = freeze({
+    "name": "Code Review",
+    "description": "Review checklist",
+    "category": "development",
+    "template": {
+        "instructions": ["Read the diff", "Run the tests"],
+        "atlassian_integration": {"enabled": True, "project": "ENG"}
+    }
+})
+
+class TestApplyOverlay:
+    """JSON Merge Patch plus $append, applied to frozen playbooks"""
+
+    def test_null_removes_a_key(self):
+        merged = apply_overlay(BASE, {"template": {"atlassian_integration": None}})
+        assert "atlassian_integration" not in merged["template"]
+        assert merged["template"]["instructions"] == ("Read the diff", "Run the tests")
+
+    def test_null_for_a_missing_key_is_ignored(self):
+        assert apply_overlay(BASE, {"template": {"missing": None}}) == BASE
+
+    def test_null_nested_inside_a_new_object_is_dropped(self):
+        merged = apply_overlay(BASE, {"template": {"review": {"owner": "team-a", "backup": None}}})
+        assert merged["template"]["review"] == {"owner": "team-a"}
+
+    def test_append_adds_to_a_list(self):
+        merged = apply_overlay(BASE, {"template": {"instructions": {"$append": ["Link the ticket"]}}})
+        assert merged["template"]["instructions"] == ("Read the diff", "Run the tests", "Link the ticket")
+
+    def test_append_a_single_value(self):
+        merged = apply_overlay(BASE, {"template": {"instructions": {"$append": "Link the ticket"}}})
+        assert merged["template"]["instructions"][-1] == "Link the ticket"
+
+    def test_append_to_a_missing_list_starts_one(self):
+        merged = apply_overlay(BASE, {"template": {"checks": {"$append": ["Security"]}}})
+        assert merged["template"]["checks"] == ("Security",)
+
+    def test_lists_are_replaced_without_append(self):
+        merged = apply_overlay(BASE, {"template": {"instructions": ["Only this"]}})
+        assert merged["template"]["instructions"] == ("Only this",)
+
+    def test_untouched_subtrees_are_shared_and_the_base_is_unchanged(self):
+        merged = apply_overlay(BASE, {"description": "Team checklist"})
+        assert merged["template"] is BASE["template"]
+        assert BASE["description"] == "Review checklist"
+
+class TestLoadOverlays:
+    """Overlay files are validated when they are loaded"""
+
+    def write(self, directory, tenant, document):
+        (directory / f"{tenant}.json").write_text(json.dumps(document))
+
+    def test_valid_overlay_is_loaded(self, tmp_path):
+        self.write(tmp_path, "team-a", {"code_review": {"description": "Team checklist"}})
+        overlays = load_overlays(tmp_path)
+        assert overlays["team-a"].patches == {"code_review": {"description": "Team checklist"}}
+
+    @pytest.mark.parametrize("value", [None, 42, ["a"], {"text": "x"}])
+    def test_overlay_that_removes_or_retypes_metadata_is_skipped(self, tmp_path, value):
+        self.write(tmp_path, "team-a", {"code_review": {"description": value}})
+        self.write(tmp_path, "team-b", {"code_review": {"name": "Team review"}})
+        overlays = load_overlays(tmp_path)
+        assert "team-a" not in overlays
+        assert "team-b" in overlays
+
+    def test_null_removes_body_keys_but_not_metadata(self, tmp_path):
+        self.write(tmp_path, "team-a", {"code_review": {"template": {"atlassian_integration": None}}})
+        assert "team-a" in load_overlays(tmp_path)
+
+    def test_non_object_patches_are_skipped(self, tmp_path):
+        self.write(tmp_path, "team-a", {"code_review": ["not", "an", "object"]})
+        assert load_overlays(tmp_path) == {}
+
+class TestTenantView:
+    """A tenant's registry with its overlay applied"""
+
+    def test_metadata_and_body_follow_the_overlay(self):
+        base = Registry.from_playbooks({"code_review": BASE})
+        overlay = TenantOverlay("team-a", {
+            "code_review": {"name": "Team Review", "template": {"instructions": {"$append": ["Link the ticket"]}}}
+        })
+        view = TenantView(base, overlay)
+        assert view.index["code_review"]["name"] == "Team Review"
+        assert view["code_review"]["template"]["instructions"][-1] == "Link the ticket"
+        assert view.content_hash("code_review") != base.content_hash("code_review")
+        assert base["code_review"] == BASE
+
+@pytest.fixture
+def server():
+    from src import server
+
+    yield server
+    server.tenant_views.load({})
+
+class TestTenantTools:
+    """Listing tools resolve the tenant like get_playbook does"""
+
+    def test_list_categories_applies_the_tenant_overlay(self, server):
+        server.tenant_views.load({"team-a": TenantOverlay("team-a", {"code_review": {"category": "Product Management"}})})
+        base = server.list_categories.fn(tenant=None)
+        tenant = server.list_categories.fn(tenant="team-a")
+        assert {"name": "Development", "count": 1} in base["categories"]
+        assert tenant["total_categories"] == base["total_categories"] - 1
+        assert {"name": "Product Management", "count": 4} in tenant["categories"]
+        assert server.list_categories.fn(tenant="team-b") == base
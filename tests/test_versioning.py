@@ -0,0 +1,153 @@
+"""Content hashes, JSON Patch diffs and if_none_match revalidation of playbooks"""
+
+import asyncio
+import copy
+import json
+
+import pytest
+
+from src.cache import ResponseCache
+from src.records import freeze
+from src.registry import Registry
+from src.versioning import json_diff, playbook_hash
+
+def apply_patch(document, patch):
+    """Apply the JSON Patch operations json_diff emits (add, remove, replace)"""
+    # Plain JSON copy, so frozen payloads can be patched too
+    document = json.loads(json.dumps(document))
+    for operation in patch:
+        if operation["path"] == "":
+            document = copy.deepcopy(operation["value"])
+            continue
+        *parents, last = [
+            token.replace("~1", "/").replace("~0", "~") for token in operation["path"].split("/")[1:]
+        ]
+        target = document
+        for token in parents:
+            target = target[int(token)] if isinstance(target, list) else target[token]
+        if isinstance(target, list):
+            if operation["op"] == "add" and last == "-":
+                target.append(operation["value"])
+            elif operation["op"] == "remove":
+                del target[int(last)]
+            else:
+                target[int(last)] = operation["value"]
+        elif operation["op"] == "remove":
+            del target[last]
+        else:
+            target[last] = operation["value"]
+    return document
+
+PLAYBOOK = {
+    "name": "Code Review",
+    "description": "Review checklist",
+    "category": "development",
+    "template": {
+        "sections": [{"name": "Scope", "items": ["Read the diff", "Run the tests"]}],
+        "atlassian_integration": {"instructions": ["Link the ticket"]}
+    }
+}
+
+class TestJsonDiff:
+    """json_diff produces small patches that turn the old document into the new one"""
+
+    def test_equal_documents_have_no_operations(self):
+        assert json_diff(PLAYBOOK, copy.deepcopy(PLAYBOOK)) == []
+
+    def test_changed_text_is_one_replace(self):
+        new = copy.deepcopy(PLAYBOOK)
+        new["description"] = "Updated checklist"
+        assert json_diff(PLAYBOOK, new) == [{"op": "replace", "path": "/description", "value": "Updated checklist"}]
+
+    def test_appended_and_removed_list_items(self):
+        new = copy.deepcopy(PLAYBOOK)
+        new["template"]["atlassian_integration"]["instructions"].append("Add a comment")
+        assert json_diff(PLAYBOOK, new) == [
+            {"op": "add", "path": "/template/atlassian_integration/instructions/-", "value": "Add a comment"}
+        ]
+        shorter = copy.deepcopy(PLAYBOOK)
+        shorter["template"]["sections"][0]["items"] = []
+        # Removed from the end so earlier indexes stay valid
+        assert [operation["path"] for operation in json_diff(PLAYBOOK, shorter)] == [
+            "/template/sections/0/items/1", "/template/sections/0/items/0"
+        ]
+
+    def test_keys_are_escaped_as_json_pointer_tokens(self):
+        assert json_diff({"a/b": 1, "c~d": 1}, {"a/b": 2}) == [
+            {"op": "remove", "path": "/c~0d"},
+            {"op": "replace", "path": "/a~1b", "value": 2}
+        ]
+
+    def test_changed_kind_is_replaced_whole(self):
+        assert json_diff({"x": [1]}, {"x": {"y": 1}}) == [{"op": "replace", "path": "/x", "value": {"y": 1}}]
+
+    def test_frozen_values_compare_like_json(self):
+        assert json_diff(freeze(copy.deepcopy(PLAYBOOK)), PLAYBOOK) == []
+
+    def test_patch_round_trips(self):
+        new = copy.deepcopy(PLAYBOOK)
+        new["name"] = "Code Review v2"
+        del new["template"]["atlassian_integration"]
+        new["template"]["sections"].append({"name": "Security", "items": ["Check inputs"]})
+        new["template"]["sections"][0]["items"][1] = "Run the full test suite"
+        assert apply_patch(PLAYBOOK, json_diff(PLAYBOOK, new)) == new
+
+class TestRevalidation:
+    """not_modified markers and diffs from the response cache"""
+
+    @pytest.fixture
+    def cache(self):
+        return ResponseCache(
+            lambda playbooks: {"playbooks": list(playbooks)},
+            lambda playbooks, playbook_id, playbook: {
+                "id": playbook_id, "hash": playbooks.content_hash(playbook_id), "playbook": playbook
+            }
+        )
+
+    def test_not_modified_marker_carries_the_current_hash(self, cache):
+        playbooks = Registry.from_playbooks({"code_review": PLAYBOOK})
+        marker = cache.not_modified(playbooks, "code_review").structured_content
+        assert marker == {"id": "code_review", "hash": playbook_hash(PLAYBOOK), "not_modified": True}
+
+    def test_diff_from_a_version_served_before_a_reload(self, cache):
+        old = Registry.from_playbooks({"code_review": PLAYBOOK})
+        served = cache.playbook(old, "code_review").structured_content
+        changed = copy.deepcopy(PLAYBOOK)
+        changed["template"]["atlassian_integration"]["instructions"].append("Add a comment")
+        new = Registry.from_playbooks({"code_review": changed})
+
+        patch = cache.diff(new, "code_review", served["hash"]).structured_content
+        assert patch["base_hash"] == served["hash"]
+        assert patch["hash"] == playbook_hash(changed)
+        current = cache.playbook(new, "code_review").structured_content
+        assert apply_patch(served, patch["patch"]) == json.loads(json.dumps(current))
+
+    def test_unknown_base_version_has_no_diff(self, cache):
+        playbooks = Registry.from_playbooks({"code_review": PLAYBOOK})
+        assert cache.diff(playbooks, "code_review", "0" * 16) is None
+
+@pytest.fixture(scope="module")
+def server():
+    from src import server
+    return server
+
+class TestGetPlaybookIfNoneMatch:
+    """if_none_match on the get_playbook tool"""
+
+    def call(self, server, **arguments):
+        arguments = {
+            "sections": None, "fields": None, "summary_only": False,
+            "if_none_match": None, "diff": False, "tenant": None, **arguments
+        }
+        result = asyncio.run(server.get_playbook.fn(**arguments))
+        return getattr(result, "structured_content", result)
+
+    def test_current_hash_is_not_modified(self, server):
+        full = self.call(server, playbook_id="code_review")
+        marker = self.call(server, playbook_id="code_review", if_none_match=full["hash"])
+        assert marker == {"id": "code_review", "hash": full["hash"], "not_modified": True}
+
+    def test_stale_hash_returns_the_full_playbook(self, server):
+        full = self.call(server, playbook_id="code_review")
+        assert self.call(server, playbook_id="code_review", if_none_match="0" * 16) == full
+        assert self.call(server, playbook_id="code_review", if_none_match="0" * 16, diff=True) == full